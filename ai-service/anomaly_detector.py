@@ -0,0 +1,370 @@
+"""
+Streaming anomaly detection for transaction amounts.
+
+Every business keeps one small state per stream: the transaction type
+(CREDIT/DEBIT) and each type:category pair. A stream holds an EWMA mean and
+variance of log(1 + amount) and two P-squared quantile sketches (median, and median
+absolute deviation from it), so scoring a new transaction and folding it into the
+state is constant time and memory however long the history gets. A transaction is
+scored before it is learned, against its category stream once that has seen
+ANOMALY_MIN_HISTORY transactions and against its type stream until then. The score
+is the smaller of the EWMA z-score and the robust (median/MAD) z-score, so both the
+recent level and the long-run distribution have to call it unusual. Outliers are
+winsorised before they update the EWMA, so one huge payment does not hide the next
+one. State lives in memory (LRU over businesses) and is snapshotted to a JSON file
+every ANOMALY_SNAPSHOT_INTERVAL seconds while it changes, and on shutdown. Until the
+saved state has been restored at startup the service refuses per-business requests,
+so live deltas are never applied to a business whose history is still loading.
+"""
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ANOMALY_STATE_PATH = os.getenv("ANOMALY_STATE_PATH", "cache/anomaly_state.json")
+ANOMALY_EWMA_ALPHA = float(os.getenv("ANOMALY_EWMA_ALPHA", "0.05"))
+ANOMALY_THRESHOLD = float(os.getenv("ANOMALY_THRESHOLD", "4.0"))  # z-score that flags a transaction
+ANOMALY_MIN_HISTORY = int(os.getenv("ANOMALY_MIN_HISTORY", "10"))  # transactions before a stream can flag
+ANOMALY_MAX_BUSINESSES = int(os.getenv("ANOMALY_MAX_BUSINESSES", "10000"))
+ANOMALY_SNAPSHOT_INTERVAL = float(os.getenv("ANOMALY_SNAPSHOT_INTERVAL", "60"))  # seconds between snapshots
+WINSOR_Z = 3.0  # EWMA updates are clipped to mean +/- WINSOR_Z standard deviations
+DELTA_IDS_KEPT = 200  # recent deltaIds remembered so retried deltas are not applied twice
+MAD_TO_SD = 1.4826  # MAD of a normal distribution times this is its standard deviation
+MIN_SPREAD = 0.05  # floor on log-scale spreads, so a run of identical amounts does not flag every cent
+
+
+class QuantileSketch:
+    """P-squared estimate of one quantile (Jain & Chlamtac): five markers, O(1) per update"""
+    __slots__ = ("p", "heights", "positions", "desired", "count")
+
+    def __init__(self, p: float):
+        self.p = p
+        self.heights: List[float] = []
+        self.positions = [0.0, 1.0, 2.0, 3.0, 4.0]
+        self.desired = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]
+        self.count = 0
+
+    def add(self, x: float):
+        self.count += 1
+        q = self.heights
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+        if x < q[0]:
+            q[0], k = x, 0
+        elif x >= q[4]:
+            q[4], k = x, 3
+        else:
+            k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        increments = (0.0, self.p / 2, self.p, (1 + self.p) / 2, 1.0)
+        for i in range(5):
+            self.desired[i] += increments[i]
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1.0 if d > 0 else -1.0
+                parabolic = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if q[i - 1] < parabolic < q[i + 1]:
+                    q[i] = parabolic
+                else:
+                    j = i + int(d)
+                    q[i] = q[i] + d * (q[j] - q[i]) / (n[j] - n[i])
+                n[i] += d
+
+    def value(self) -> Optional[float]:
+        q = self.heights
+        if not q:
+            return None
+        if len(q) < 5:
+            return q[min(len(q) - 1, int(self.p * len(q)))]
+        return q[2]
+
+    def dump(self) -> List[Any]:
+        return [self.p, self.heights, self.positions, self.desired, self.count]
+
+    @classmethod
+    def load(cls, data: List[Any]) -> "QuantileSketch":
+        sketch = cls(data[0])
+        sketch.heights, sketch.positions, sketch.desired, sketch.count = data[1], data[2], data[3], data[4]
+        return sketch
+
+
+class StreamStats:
+    """Incremental statistics of log(1 + amount) for one business stream"""
+    __slots__ = ("count", "mean", "var", "median", "mad")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
+        self.median = QuantileSketch(0.5)
+        self.mad = QuantileSketch(0.5)
+
+    def score(self, y: float) -> Tuple[float, float]:
+        """(EWMA z-score, robust z-score) of y against the state before it is added"""
+        if self.count == 0:
+            return 0.0, 0.0
+        ewma_z = (y - self.mean) / max(math.sqrt(self.var), MIN_SPREAD)
+        median = self.median.value()
+        mad = self.mad.value() or 0.0
+        robust_z = (y - median) / max(mad * MAD_TO_SD, MIN_SPREAD)
+        return ewma_z, robust_z
+
+    def update(self, y: float, alpha: float):
+        self.count += 1
+        if self.count == 1:
+            self.mean = y
+        else:
+            sd = math.sqrt(self.var)
+            if self.count > ANOMALY_MIN_HISTORY and sd > 0:
+                y_clipped = min(max(y, self.mean - WINSOR_Z * sd), self.mean + WINSOR_Z * sd)
+            else:
+                y_clipped = y
+            # Warm-up uses running averages (alpha = 1/n) until that falls below alpha
+            a = max(alpha, 1.0 / self.count)
+            diff = y_clipped - self.mean
+            self.mean += a * diff
+            self.var = (1 - a) * (self.var + a * diff * diff)
+        self.median.add(y)
+        self.mad.add(abs(y - self.median.value()))
+
+    def baseline(self) -> Dict[str, Any]:
+        median = self.median.value()
+        return {
+            "count": self.count,
+            "typical_amount": round(math.expm1(median), 2) if median is not None else None,
+            "ewma_amount": round(math.expm1(self.mean), 2),
+        }
+
+    def dump(self) -> List[Any]:
+        return [self.count, self.mean, self.var, self.median.dump(), self.mad.dump()]
+
+    @classmethod
+    def load(cls, data: List[Any]) -> "StreamStats":
+        stats = cls()
+        stats.count, stats.mean, stats.var = data[0], data[1], data[2]
+        stats.median, stats.mad = QuantileSketch.load(data[3]), QuantileSketch.load(data[4])
+        return stats
+
+
+class _BusinessState:
+    __slots__ = ("streams", "delta_ids", "transactions", "anomalies", "updated_at")
+
+    def __init__(self):
+        self.streams: Dict[str, StreamStats] = {}
+        self.delta_ids: List[str] = []
+        self.transactions = 0
+        self.anomalies = 0
+        self.updated_at: Optional[float] = None
+
+
+class AnomalyDetector:
+    def __init__(
+        self,
+        path: str = ANOMALY_STATE_PATH,
+        alpha: float = ANOMALY_EWMA_ALPHA,
+        threshold: float = ANOMALY_THRESHOLD,
+        min_history: int = ANOMALY_MIN_HISTORY,
+        max_businesses: int = ANOMALY_MAX_BUSINESSES
+    ):
+        self.path = path
+        self.alpha = alpha
+        self.threshold = threshold
+        self.min_history = min_history
+        self.max_businesses = max_businesses
+        self._businesses: "OrderedDict[str, _BusinessState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        # Nothing to wait for without a state file; otherwise set once load() has run
+        self.restored = not path
+
+    @property
+    def dirty(self) -> bool:
+        """True when state changed since the last save"""
+        return self._dirty
+
+    def _state(self, business_id: str) -> _BusinessState:
+        state = self._businesses.get(business_id)
+        if state is None:
+            state = self._businesses[business_id] = _BusinessState()
+            while len(self._businesses) > self.max_businesses:
+                self._businesses.popitem(last=False)
+        else:
+            self._businesses.move_to_end(business_id)
+        return state
+
+    def _score_one(self, state: _BusinessState, row: Dict[str, Any], learn: bool) -> Dict[str, Any]:
+        amount = abs(float(row["amount"]))
+        tx_type = str(row.get("type") or "UNKNOWN").upper()
+        category = row.get("category")
+        y = math.log1p(amount)
+
+        keys = [tx_type] + ([f"{tx_type}:{category}"] if category else [])
+        streams = [
+            state.streams.get(k) or (state.streams.setdefault(k, StreamStats()) if learn else StreamStats())
+            for k in keys
+        ]
+        # Most specific stream with enough history to judge
+        reference = next((s for s in reversed(streams) if s.count >= self.min_history), streams[0])
+        ewma_z, robust_z = reference.score(y)
+        # Both views must agree: the EWMA follows level shifts, the median/MAD ignores bursts
+        score = min(abs(ewma_z), abs(robust_z)) if ewma_z * robust_z > 0 else 0.0
+        warmed = reference.count >= self.min_history
+        is_anomaly = warmed and score >= self.threshold
+        if learn:
+            for stream in streams:
+                stream.update(y, self.alpha)
+
+        result = {
+            "id": row.get("id"),
+            "date": row.get("date"),
+            "amount": row["amount"],
+            "type": tx_type,
+            "category": category,
+            "score": round(score, 2),
+            "ewma_z": round(ewma_z, 2),
+            "robust_z": round(robust_z, 2),
+            "is_anomaly": is_anomaly,
+            "direction": ("high" if robust_z > 0 else "low") if is_anomaly else None,
+            "compared_with": keys[streams.index(reference)],
+            "baseline": reference.baseline() if reference.count else None,
+        }
+        if not warmed:
+            result["reason"] = f"Only {reference.count} earlier {tx_type} transactions; not enough history to flag"
+        elif is_anomaly:
+            typical = result["baseline"]["typical_amount"]
+            result["reason"] = (
+                f"{amount:,.2f} is {'far above' if robust_z > 0 else 'far below'} the usual "
+                f"{result['compared_with']} amount of about {typical:,.2f} (score {score:.1f})"
+            )
+        return result
+
+    # ------------------------------------------------------------------ public API
+    def score(
+        self,
+        business_id: Optional[str],
+        rows: List[Dict[str, Any]],
+        learn: bool = True,
+        delta_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Score rows in order, each against the state before it, and (if `learn`) fold
+        them into the business's state. Without a business_id the rows are scored as
+        a self-contained stream from empty state and nothing is kept. Read-only scoring
+        neither creates a business nor refreshes its place in the LRU.
+        """
+        with self._lock:
+            if business_id is None:
+                state, learn = _BusinessState(), True
+            elif not learn:
+                state = self._businesses.get(business_id) or _BusinessState()
+            else:
+                state = self._state(business_id)
+                if delta_id and delta_id in state.delta_ids:
+                    return {"applied": False, "results": [], "anomalies": 0, **self._summary(business_id, state)}
+            results = [self._score_one(state, row, learn) for row in rows]
+            flagged = sum(1 for r in results if r["is_anomaly"])
+            if business_id is not None and learn:
+                state.transactions += len(rows)
+                state.anomalies += flagged
+                state.updated_at = time.time()
+                if delta_id:
+                    state.delta_ids = (state.delta_ids + [delta_id])[-DELTA_IDS_KEPT:]
+                self._dirty = True
+        out = {"applied": learn and business_id is not None, "results": results, "anomalies": flagged}
+        if business_id is not None:
+            out.update(self.info(business_id) or {})
+        return out
+
+    def _summary(self, business_id: str, state: _BusinessState) -> Dict[str, Any]:
+        return {
+            "business_id": business_id,
+            "transactions": state.transactions,
+            "anomalies_flagged": state.anomalies,
+            "streams": {key: stream.baseline() for key, stream in sorted(state.streams.items())},
+            "updated_at": state.updated_at,
+        }
+
+    def info(self, business_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            state = self._businesses.get(business_id)
+            return self._summary(business_id, state) if state is not None else None
+
+    def delete(self, business_id: str) -> bool:
+        with self._lock:
+            removed = self._businesses.pop(business_id, None) is not None
+            self._dirty = self._dirty or removed
+            return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "businesses": len(self._businesses),
+                "restored": self.restored,
+                "streams": sum(len(s.streams) for s in self._businesses.values()),
+                "threshold": self.threshold,
+                "min_history": self.min_history,
+            }
+
+    def save(self) -> int:
+        """Write all business states to `path` (atomic replace); returns the number saved"""
+        # Before the restore, memory holds only part of the state; keep the file as it is
+        if not self.path or not self.restored:
+            return 0
+        with self._lock:
+            self._dirty = False
+            data = {
+                business_id: {
+                    "streams": {k: s.dump() for k, s in state.streams.items()},
+                    "delta_ids": state.delta_ids,
+                    "transactions": state.transactions,
+                    "anomalies": state.anomalies,
+                    "updated_at": state.updated_at,
+                }
+                for business_id, state in self._businesses.items()
+            }
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        return len(data)
+
+    def load(self) -> int:
+        """Restore saved states once at startup; per-business requests wait for this"""
+        self.restored = False
+        restored: "OrderedDict[str, _BusinessState]" = OrderedDict()
+        try:
+            if self.path and os.path.exists(self.path):
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                for business_id, saved in data.items():
+                    state = _BusinessState()
+                    state.streams = {k: StreamStats.load(v) for k, v in saved["streams"].items()}
+                    state.delta_ids = saved.get("delta_ids", [])
+                    state.transactions = saved.get("transactions", 0)
+                    state.anomalies = saved.get("anomalies", 0)
+                    state.updated_at = saved.get("updated_at")
+                    restored[business_id] = state
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Anomaly state {self.path} could not be loaded: {e}")
+            restored.clear()
+        with self._lock:
+            while len(restored) > self.max_businesses:
+                restored.popitem(last=False)
+            self._businesses = restored
+            self.restored = True
+        return len(restored)
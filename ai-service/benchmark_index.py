@@ -0,0 +1,335 @@
+"""
+Percentile-ranked industry benchmarks.
+
+The index is a precomputed local file (built by scripts/build_benchmark_index.py)
+holding, for every industry and metric, a sorted sample of the peer distribution:
+either observed peer values or quantiles derived from the published low/median/high
+ranges. Derived series are modelled, not measured, so ranks against them are
+reported as estimated percentiles (see BenchmarkIndex.estimated). At load time all samples are packed into one float64 array with per-series
+offsets, so a percentile rank is a binary search (np.searchsorted) over a slice,
+and a batch of ranks is one searchsorted call per distinct industry/metric pair.
+The file is re-read when its mtime changes (checked at most every
+BENCHMARK_RELOAD_CHECK seconds) or on an explicit reload; a new snapshot replaces
+the old one in a single assignment, so requests in flight never see a half-loaded
+index.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from statistics import NormalDist
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_INDEX_PATH = os.getenv(
+    "BENCHMARK_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "industry_benchmarks.json")
+)
+BENCHMARK_RELOAD_CHECK = float(os.getenv("BENCHMARK_RELOAD_CHECK", "30"))  # seconds between mtime checks
+QUANTILE_POINTS = 50  # sample size for distributions derived from summary figures
+FALLBACK_INDUSTRY = "OTHER"
+
+# Industry medians per ratio; the index falls back to distributions built around these
+INDUSTRY_BENCHMARKS = {
+    "MANUFACTURING": {
+        "current_ratio": 1.5, "quick_ratio": 1.0, "debt_equity": 1.0,
+        "profit_margin": 8.0, "receivable_days": 45, "payable_days": 60,
+        "inventory_turnover": 6, "roe": 12.0, "roa": 7.0
+    },
+    "RETAIL": {
+        "current_ratio": 1.2, "quick_ratio": 0.5, "debt_equity": 0.8,
+        "profit_margin": 5.0, "receivable_days": 30, "payable_days": 45,
+        "inventory_turnover": 12, "roe": 15.0, "roa": 8.0
+    },
+    "SERVICES": {
+        "current_ratio": 1.8, "quick_ratio": 1.5, "debt_equity": 0.5,
+        "profit_margin": 15.0, "receivable_days": 60, "payable_days": 30,
+        "inventory_turnover": 0, "roe": 18.0, "roa": 12.0
+    },
+    "IT_TECHNOLOGY": {
+        "current_ratio": 2.0, "quick_ratio": 1.8, "debt_equity": 0.3,
+        "profit_margin": 20.0, "receivable_days": 45, "payable_days": 30,
+        "inventory_turnover": 0, "roe": 25.0, "roa": 15.0
+    },
+    "HEALTHCARE": {
+        "current_ratio": 1.4, "quick_ratio": 1.2, "debt_equity": 0.7,
+        "profit_margin": 12.0, "receivable_days": 40, "payable_days": 35,
+        "inventory_turnover": 8, "roe": 16.0, "roa": 10.0
+    },
+    "ECOMMERCE": {
+        "current_ratio": 1.3, "quick_ratio": 0.8, "debt_equity": 1.2,
+        "profit_margin": 3.0, "receivable_days": 15, "payable_days": 45,
+        "inventory_turnover": 15, "roe": 10.0, "roa": 5.0
+    },
+    "AGRICULTURE": {
+        "current_ratio": 1.1, "quick_ratio": 0.6, "debt_equity": 0.6,
+        "profit_margin": 10.0, "receivable_days": 90, "payable_days": 60,
+        "inventory_turnover": 4, "roe": 12.0, "roa": 8.0
+    },
+    "CONSTRUCTION": {
+        "current_ratio": 1.2, "quick_ratio": 0.7, "debt_equity": 1.5,
+        "profit_margin": 6.0, "receivable_days": 75, "payable_days": 90,
+        "inventory_turnover": 3, "roe": 14.0, "roa": 6.0
+    },
+    "LOGISTICS": {
+        "current_ratio": 1.3, "quick_ratio": 1.0, "debt_equity": 0.9,
+        "profit_margin": 7.0, "receivable_days": 35, "payable_days": 40,
+        "inventory_turnover": 20, "roe": 13.0, "roa": 8.0
+    },
+    "HOSPITALITY": {
+        "current_ratio": 1.0, "quick_ratio": 0.8, "debt_equity": 1.1,
+        "profit_margin": 8.0, "receivable_days": 20, "payable_days": 30,
+        "inventory_turnover": 25, "roe": 15.0, "roa": 7.0
+    },
+    "EDUCATION": {
+        "current_ratio": 1.6, "quick_ratio": 1.4, "debt_equity": 0.4,
+        "profit_margin": 18.0, "receivable_days": 30, "payable_days": 25,
+        "inventory_turnover": 0, "roe": 20.0, "roa": 14.0
+    },
+    "FINTECH": {
+        "current_ratio": 2.5, "quick_ratio": 2.3, "debt_equity": 0.2,
+        "profit_margin": 25.0, "receivable_days": 30, "payable_days": 20,
+        "inventory_turnover": 0, "roe": 30.0, "roa": 18.0
+    },
+    "FOOD_BEVERAGE": {
+        "current_ratio": 1.4, "quick_ratio": 0.9, "debt_equity": 0.8,
+        "profit_margin": 10.0, "receivable_days": 35, "payable_days": 45,
+        "inventory_turnover": 10, "roe": 16.0, "roa": 9.0
+    },
+    "OTHER": {
+        "current_ratio": 1.3, "quick_ratio": 1.0, "debt_equity": 0.8,
+        "profit_margin": 10.0, "receivable_days": 45, "payable_days": 45,
+        "inventory_turnover": 8, "roe": 15.0, "roa": 9.0
+    }
+}
+
+# How each ratio spreads around its median: lognormal sigma, or normal sd as a
+# fraction of the median (with a floor in percentage points) for signed ratios
+RATIO_SPREADS = {
+    "current_ratio": ("lognormal", 0.35),
+    "quick_ratio": ("lognormal", 0.45),
+    "debt_equity": ("lognormal", 0.6),
+    "profit_margin": ("normal", 0.6),
+    "receivable_days": ("lognormal", 0.4),
+    "payable_days": ("lognormal", 0.4),
+    "inventory_turnover": ("lognormal", 0.5),
+    "roe": ("normal", 0.6),
+    "roa": ("normal", 0.6),
+}
+NORMAL_SD_FLOOR = 2.0
+LOWER_IS_BETTER = {"debt_equity", "receivable_days"}
+EXPENSE_PREFIX = "expense:"  # expense-to-revenue ratios (% of revenue); lower is better
+RANGE_Z = NormalDist().inv_cdf(0.9)  # published low/high ranges are read as P10/P90
+
+
+def _grid() -> np.ndarray:
+    """Standard normal quantiles at the mid-ranks (i + 0.5) / n used for every stored sample"""
+    dist = NormalDist()
+    return np.array([dist.inv_cdf((i + 0.5) / QUANTILE_POINTS) for i in range(QUANTILE_POINTS)])
+
+
+def ratio_distribution(metric: str, median: float) -> Optional[np.ndarray]:
+    """Quantile sample for a ratio with the given industry median (None if not applicable)"""
+    if metric not in RATIO_SPREADS or median <= 0:
+        return None
+    kind, spread = RATIO_SPREADS[metric]
+    if kind == "lognormal":
+        return median * np.exp(spread * _grid())
+    return median + max(abs(median) * spread, NORMAL_SD_FLOOR) * _grid()
+
+
+def range_distribution(low: float, high: float, avg: float) -> np.ndarray:
+    """Quantile sample for a low/high/average range: split normal with P10=low, P50=avg, P90=high"""
+    z = _grid()
+    below = max(avg - low, 0.0) / RANGE_Z
+    above = max(high - avg, 0.0) / RANGE_Z
+    return np.maximum(avg + z * np.where(z < 0, below, above), 0.0)
+
+
+def higher_is_better(metric: str) -> bool:
+    return not (metric in LOWER_IS_BETTER or metric.startswith(EXPENSE_PREFIX))
+
+
+def summary_distributions(
+    medians: Dict[str, Dict[str, float]],
+    ranges: Iterable[Tuple[str, str, float, float, float]] = ()
+) -> Dict[str, Dict[str, List[float]]]:
+    """{industry: {metric: sorted sample}} from ratio medians and (industry, category, low, high, avg) ranges"""
+    out: Dict[str, Dict[str, List[float]]] = {}
+    for industry, metrics in medians.items():
+        for metric, median in metrics.items():
+            sample = ratio_distribution(metric, float(median))
+            if sample is not None:
+                out.setdefault(industry, {})[metric] = np.round(sample, 4).tolist()
+    for industry, category, low, high, avg in ranges:
+        sample = range_distribution(low, high, avg)
+        out.setdefault(industry, {})[f"{EXPENSE_PREFIX}{category}"] = np.round(sample, 4).tolist()
+    return out
+
+
+class _Snapshot:
+    """Immutable packed index: one sorted slice of `values` per (industry, metric)"""
+
+    def __init__(self, distributions: Dict[str, Dict[str, Sequence[float]]], version: str, source: str,
+                 mtime: Optional[float], observed: Optional[Dict[str, Sequence[str]]] = None):
+        keys, chunks = [], []
+        for industry in sorted(distributions):
+            for metric in sorted(distributions[industry]):
+                sample = np.sort(np.asarray(distributions[industry][metric], dtype=np.float64))
+                sample = sample[np.isfinite(sample)]
+                if len(sample):
+                    keys.append((industry, metric))
+                    chunks.append(sample)
+        self.slots = {key: i for i, key in enumerate(keys)}
+        # Slots holding observed peer values; every other series is derived from summary figures
+        self.observed = {
+            self.slots[(industry, metric)]
+            for industry, metrics in (observed or {}).items() for metric in metrics
+            if (industry, metric) in self.slots
+        }
+        self.values = np.concatenate(chunks) if chunks else np.empty(0)
+        self.offsets = np.concatenate(([0], np.cumsum([len(c) for c in chunks]))).astype(np.int64)
+        self.industries = sorted({industry for industry, _ in keys})
+        self.metrics = sorted({metric for _, metric in keys})
+        self.version = version
+        self.source = source
+        self.mtime = mtime
+        self.loaded_at = time.time()
+
+    def slot(self, industry: str, metric: str) -> Optional[int]:
+        slot = self.slots.get((industry, metric))
+        if slot is None and industry != FALLBACK_INDUSTRY:
+            slot = self.slots.get((FALLBACK_INDUSTRY, metric))
+        return slot
+
+    def sample(self, slot: int) -> np.ndarray:
+        return self.values[self.offsets[slot]:self.offsets[slot + 1]]
+
+
+def _rank(sample: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """
+    Percentile (0-100) of each x within a sorted sample whose i-th value sits at
+    mid-rank (i + 0.5) / n, interpolating linearly between neighbouring values.
+    """
+    n = len(sample)
+    hi = np.searchsorted(sample, x, side="right")
+    lo = np.clip(hi - 1, 0, n - 1)
+    upper = np.clip(hi, 0, n - 1)
+    gap = sample[upper] - sample[lo]
+    frac = np.where(gap > 0, (x - sample[lo]) / np.where(gap > 0, gap, 1.0), 0.0)
+    rank = lo + 0.5 + np.clip(frac, 0.0, 1.0)
+    rank = np.where(hi == 0, 0.0, rank)
+    rank = np.where((hi == n) & (x > sample[-1]), float(n), rank)
+    return np.clip(rank / n * 100.0, 0.0, 100.0)
+
+
+class BenchmarkIndex:
+    def __init__(self, path: str = BENCHMARK_INDEX_PATH, fallback: Optional[Dict[str, Dict[str, float]]] = None,
+                 reload_check: float = BENCHMARK_RELOAD_CHECK):
+        self.path = path
+        self.fallback = fallback or {}
+        self.reload_check = reload_check
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._failed_mtime: Optional[float] = None
+        self._snapshot = self._load()
+
+    # ------------------------------------------------------------------ loading
+    def _mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def _load(self) -> _Snapshot:
+        mtime = self._mtime()
+        if mtime is not None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                return _Snapshot(data["distributions"], data.get("version", "unknown"), self.path, mtime,
+                                 data.get("observed"))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.error(f"Benchmark index {self.path} could not be loaded: {e}")
+                self._failed_mtime = mtime  # do not retry until the file changes again
+                current = getattr(self, "_snapshot", None)
+                if current is not None:
+                    return current  # keep serving the last good index
+        elif self.path:
+            logger.warning(f"Benchmark index {self.path} not found, using built-in industry medians")
+        return _Snapshot(summary_distributions(self.fallback), "builtin", "builtin", mtime)
+
+    def reload(self) -> Dict[str, Any]:
+        with self._lock:
+            self._snapshot = self._load()
+            self._checked_at = time.monotonic()
+        logger.info(f"Benchmark index loaded: version {self._snapshot.version}, {len(self._snapshot.slots)} series")
+        return self.info()
+
+    def _current(self) -> _Snapshot:
+        """The active snapshot, reloading first if the file changed since it was loaded"""
+        now = time.monotonic()
+        if now - self._checked_at >= self.reload_check:
+            self._checked_at = now
+            mtime = self._mtime()
+            if mtime != self._snapshot.mtime and mtime != self._failed_mtime:
+                self.reload()
+        return self._snapshot
+
+    # ------------------------------------------------------------------ queries
+    def percentile(self, industry: str, metric: str, value: float) -> Optional[float]:
+        """Percentile rank of one value among the industry's peers (None if the metric is not indexed)"""
+        snapshot = self._current()
+        slot = snapshot.slot(industry, metric)
+        if slot is None or value is None or not np.isfinite(value):
+            return None
+        return round(float(_rank(snapshot.sample(slot), np.array([value], dtype=np.float64))[0]), 1)
+
+    def percentiles(self, industries: Sequence[str], metrics: Sequence[str], values: Sequence[float]) -> np.ndarray:
+        """
+        Vectorised percentile ranks for parallel industry / metric / value sequences.
+        Entries whose series is not indexed (or whose value is missing) are NaN.
+        """
+        snapshot = self._current()
+        x = np.asarray(values, dtype=np.float64)
+        # Resolve slots per distinct industry x metric pair, not per row
+        industry_names, industry_codes = np.unique(np.asarray(industries, dtype=str), return_inverse=True)
+        metric_names, metric_codes = np.unique(np.asarray(metrics, dtype=str), return_inverse=True)
+        table = np.array([
+            [-1 if (s := snapshot.slot(industry, metric)) is None else s for metric in metric_names]
+            for industry in industry_names
+        ], dtype=np.int64).reshape(len(industry_names), len(metric_names))
+        slots = table[industry_codes, metric_codes] if len(x) else np.empty(0, dtype=np.int64)
+        out = np.full(len(x), np.nan)
+        valid = (slots >= 0) & np.isfinite(x)
+        for slot in np.unique(slots[valid]):
+            rows = valid & (slots == slot)
+            out[rows] = _rank(snapshot.sample(int(slot)), x[rows])
+        return np.round(out, 1)
+
+    def estimated(self, industry: str, metric: str) -> bool:
+        """True when the metric is ranked against a distribution derived from summary figures"""
+        snapshot = self._current()
+        slot = snapshot.slot(industry, metric)
+        return slot is not None and slot not in snapshot.observed
+
+    def median(self, industry: str, metric: str) -> Optional[float]:
+        snapshot = self._current()
+        slot = snapshot.slot(industry, metric)
+        return None if slot is None else float(np.median(snapshot.sample(slot)))
+
+    def info(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version,
+            "source": snapshot.source,
+            "loaded_at": snapshot.loaded_at,
+            "series": len(snapshot.slots),
+            "observed_series": len(snapshot.observed),
+            "values": int(len(snapshot.values)),
+            "industries": snapshot.industries,
+            "metrics": snapshot.metrics,
+        }
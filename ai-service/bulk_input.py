@@ -0,0 +1,162 @@
+"""
+Columnar and file-based bulk input for history and transaction batches.
+
+Large histories are cheaper to ship as parallel arrays (or as CSV/Parquet uploads)
+than as lists of per-row objects. Everything here parses straight into pandas and
+validates whole columns at once instead of row by row. pandas is imported on first
+use (or by the post-startup warm-up in main.py) so it does not slow down cold starts.
+
+History columns and uploads get the same checks as the forecasting service's copy
+of this module: ISO 8601 dates, finite amounts, and CREDIT/DEBIT types (trimmed and
+upper-cased first). Locale formats such as 01/02/2024 are rejected rather than
+guessed, because DD/MM and MM/DD read them differently.
+"""
+from __future__ import annotations
+
+import io
+import os
+from typing import TYPE_CHECKING, List, Optional, Dict, Any
+
+import numpy as np
+from fastapi import HTTPException, UploadFile
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))  # 50 MB default, as in python-ai-service
+
+HISTORY_COLUMNS = ("date", "amount", "type")
+TRANSACTION_COLUMNS = ("id", "description", "amount", "type")
+HISTORY_TYPES = ("CREDIT", "DEBIT")
+
+
+class HistoryColumns(BaseModel):
+    """History as parallel arrays: date[i], amount[i], type[i] describe one entry"""
+    date: List[str]  # ISO 8601 (YYYY-MM-DD), the same format accepted for per-row history
+    amount: List[float]
+    type: List[str]
+
+
+class TransactionColumns(BaseModel):
+    """Transactions as parallel arrays, party_name is optional"""
+    id: List[int]
+    description: List[str]
+    amount: List[float]
+    type: List[str]
+    party_name: Optional[List[Optional[str]]] = None
+
+
+def _invalid(message: str, mask: np.ndarray):
+    rows = np.flatnonzero(mask)
+    preview = ", ".join(str(r) for r in rows[:5])
+    raise HTTPException(status_code=422, detail=f"{message} ({len(rows)} rows, first at index {preview})")
+
+
+def _require_columns(df: pd.DataFrame, required, what: str):
+    missing = [c for c in required if c not in df.columns]
+    if missing:
+        raise HTTPException(status_code=422, detail=f"{what} is missing columns: {', '.join(missing)}")
+
+
+def _require_equal_lengths(columns: Dict[str, Any], what: str):
+    lengths = {k: len(v) for k, v in columns.items() if v is not None}
+    if len(set(lengths.values())) > 1:
+        raise HTTPException(status_code=422, detail=f"{what} columns differ in length: {lengths}")
+
+
+def validate_history_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Vectorised validation/normalisation of a date/amount/type history frame"""
+    import pandas as pd
+    _require_columns(df, HISTORY_COLUMNS, "History")
+    out = pd.DataFrame({
+        "date": pd.to_datetime(df["date"], errors="coerce", format="ISO8601"),
+        "amount": pd.to_numeric(df["amount"], errors="coerce"),
+        "type": df["type"].astype(str).str.strip().str.upper(),
+    })
+    bad_date = out["date"].isna().to_numpy()
+    if bad_date.any():
+        _invalid("History dates must be ISO 8601 (YYYY-MM-DD)", bad_date)
+    bad_amount = ~np.isfinite(out["amount"].to_numpy(dtype=float))
+    if bad_amount.any():
+        _invalid("Non-numeric history amounts", bad_amount)
+    bad_type = ~out["type"].isin(HISTORY_TYPES).to_numpy()
+    if bad_type.any():
+        _invalid("History type must be CREDIT or DEBIT", bad_type)
+    return out
+
+
+def history_frame_from_columns(columns: HistoryColumns) -> pd.DataFrame:
+    import pandas as pd
+    _require_equal_lengths({"date": columns.date, "amount": columns.amount, "type": columns.type}, "History")
+    return validate_history_frame(pd.DataFrame({
+        "date": columns.date, "amount": columns.amount, "type": columns.type
+    }))
+
+
+def validate_transaction_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Vectorised validation of id/description/amount/type(/party_name) frames"""
+    import pandas as pd
+    _require_columns(df, TRANSACTION_COLUMNS, "Transactions")
+    ids = pd.to_numeric(df["id"], errors="coerce")
+    out = pd.DataFrame({
+        "id": ids,
+        "description": df["description"].fillna("").astype(str),
+        "amount": pd.to_numeric(df["amount"], errors="coerce"),
+        "type": df["type"].astype(str).str.strip().str.upper(),
+        "party_name": df["party_name"].astype(object).where(df["party_name"].notna(), None)
+        if "party_name" in df.columns else None,
+    })
+    bad_id = (ids.isna() | (ids % 1 != 0)).to_numpy()
+    if bad_id.any():
+        _invalid("Transaction ids must be integers", bad_id)
+    bad_amount = ~np.isfinite(out["amount"].to_numpy(dtype=float))
+    if bad_amount.any():
+        _invalid("Non-numeric transaction amounts", bad_amount)
+    out["id"] = ids.astype(np.int64)
+    return out
+
+
+def transaction_frame_from_columns(columns: TransactionColumns) -> pd.DataFrame:
+    import pandas as pd
+    data = {
+        "id": columns.id, "description": columns.description,
+        "amount": columns.amount, "type": columns.type, "party_name": columns.party_name
+    }
+    _require_equal_lengths(data, "Transaction")
+    if data["party_name"] is None:
+        data["party_name"] = [None] * len(columns.id)
+    return validate_transaction_frame(pd.DataFrame(data))
+
+
+def transaction_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Compact per-transaction dicts in the shape used by the categorisation prompt"""
+    return [
+        {"id": int(i), "desc": d, "amount": float(a), "type": t, "party": p}
+        for i, d, a, t, p in zip(
+            df["id"].tolist(), df["description"].tolist(), df["amount"].tolist(),
+            df["type"].tolist(), df["party_name"].tolist()
+        )
+    ]
+
+
+async def read_upload_frame(file: UploadFile) -> pd.DataFrame:
+    """Parse an uploaded CSV or Parquet file into a DataFrame"""
+    import pandas as pd
+    raw = await file.read(MAX_UPLOAD_BYTES + 1)
+    if len(raw) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {MAX_UPLOAD_BYTES} bytes")
+
+    name = (file.filename or "").lower()
+    content_type = (file.content_type or "").lower()
+    try:
+        if name.endswith(".parquet") or "parquet" in content_type:
+            try:
+                return pd.read_parquet(io.BytesIO(raw))
+            except ImportError:
+                raise HTTPException(status_code=415, detail="Parquet support requires pyarrow to be installed")
+        return pd.read_csv(io.BytesIO(raw))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Could not parse uploaded file: {e}")
@@ -0,0 +1,183 @@
+"""
+Server-side conversation store for multi-turn chat.
+
+Each conversation keeps its recent turns within a token budget (counted with
+tiktoken); older turns are folded into a rolling extractive summary instead of
+being resent. The Ollama `context` returned by the previous turn is kept as well,
+so while it fits the model window a new turn only has to prefill its own tokens.
+"""
+import asyncio
+import logging
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CONVERSATION_HISTORY_TOKENS = int(os.getenv("CONVERSATION_HISTORY_TOKENS", "1200"))
+CONVERSATION_SUMMARY_TOKENS = int(os.getenv("CONVERSATION_SUMMARY_TOKENS", "300"))
+OLLAMA_CONTEXT_TOKENS = int(os.getenv("OLLAMA_CONTEXT_TOKENS", "1800"))  # keep below the model's num_ctx
+CONVERSATION_IDLE_TTL = int(os.getenv("CONVERSATION_IDLE_TTL", str(6 * 3600)))
+CONVERSATION_MAX_ACTIVE = int(os.getenv("CONVERSATION_MAX_ACTIVE", "5000"))
+TIKTOKEN_ENCODING = os.getenv("TIKTOKEN_ENCODING", "cl100k_base")
+
+_encoder = None
+_encoder_failed = False
+_SENTENCE_END = re.compile(r"(?<=[.!?।])\s+")
+
+
+def count_tokens(text: str) -> int:
+    """tiktoken count, falling back to a ~4 chars/token estimate if the encoding is unavailable"""
+    global _encoder, _encoder_failed
+    if not text:
+        return 0
+    if _encoder is None and not _encoder_failed:
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding(TIKTOKEN_ENCODING)
+        except Exception as e:
+            _encoder_failed = True
+            logger.warning(f"tiktoken unavailable ({e}); estimating token counts")
+    if _encoder is not None:
+        return len(_encoder.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """Keep the tail of `text` that fits into `budget` tokens"""
+    if count_tokens(text) <= budget:
+        return text
+    if _encoder is not None:
+        return _encoder.decode(_encoder.encode(text, disallowed_special=())[-budget:])
+    return text[-budget * 4:]
+
+
+@dataclass
+class Turn:
+    role: str  # "user" | "assistant"
+    content: str
+    tokens: int
+
+
+@dataclass
+class Conversation:
+    id: str
+    user_id: Optional[int]
+    turns: List[Turn] = field(default_factory=list)
+    summary: str = ""
+    ollama_context: Optional[List[int]] = None
+    ollama_model: Optional[str] = None  # a context is only valid for the model that produced it
+    updated_at: float = field(default_factory=time.time)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    @property
+    def is_new(self) -> bool:
+        return not self.turns and not self.summary
+
+    def history_tokens(self) -> int:
+        return sum(t.tokens for t in self.turns)
+
+    def render_history(self) -> str:
+        """Summary plus recent turns, for prompts that cannot reuse the Ollama context"""
+        parts = []
+        if self.summary:
+            parts.append(f"### Earlier in this conversation:\n{self.summary}")
+        if self.turns:
+            lines = [f"{'User' if t.role == 'user' else 'Analyst'}: {t.content}" for t in self.turns]
+            parts.append("### Recent conversation:\n" + "\n\n".join(lines))
+        return "\n\n".join(parts)
+
+
+def _first_sentence(text: str, limit: int = 200) -> str:
+    text = " ".join(text.split())
+    sentence = _SENTENCE_END.split(text, maxsplit=1)[0]
+    return sentence[:limit]
+
+
+class ConversationStore:
+    def __init__(
+        self,
+        history_tokens: int = CONVERSATION_HISTORY_TOKENS,
+        summary_tokens: int = CONVERSATION_SUMMARY_TOKENS,
+        context_tokens: int = OLLAMA_CONTEXT_TOKENS,
+        idle_ttl: int = CONVERSATION_IDLE_TTL,
+        max_active: int = CONVERSATION_MAX_ACTIVE
+    ):
+        self.history_tokens = history_tokens
+        self.summary_tokens = summary_tokens
+        self.context_tokens = context_tokens
+        self.idle_ttl = idle_ttl
+        self.max_active = max_active
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+
+    def _expire(self):
+        cutoff = time.time() - self.idle_ttl
+        while self._conversations:
+            oldest = next(iter(self._conversations.values()))
+            if oldest.updated_at >= cutoff and len(self._conversations) <= self.max_active:
+                break
+            self._conversations.popitem(last=False)
+
+    def get(self, conversation_id: str) -> Optional[Conversation]:
+        conv = self._conversations.get(conversation_id)
+        if conv is not None and time.time() - conv.updated_at > self.idle_ttl:
+            del self._conversations[conversation_id]
+            return None
+        return conv
+
+    def get_or_create(
+        self,
+        conversation_id: Optional[str],
+        user_id: Optional[int],
+        seed_history: Optional[List[Dict[str, str]]] = None
+    ) -> Conversation:
+        conv = self.get(conversation_id) if conversation_id else None
+        if conv is not None and conv.user_id is not None and user_id is not None and conv.user_id != user_id:
+            conv = None  # never hand one user's conversation to another
+            conversation_id = None
+        if conv is None:
+            conv = Conversation(id=conversation_id or f"conv_{uuid.uuid4().hex}", user_id=user_id)
+            # Clients that kept their own history can hand it over once
+            for item in seed_history or []:
+                role = "assistant" if item.get("role") in ("assistant", "model", "analyst") else "user"
+                content = item.get("content") or item.get("message") or ""
+                if content:
+                    conv.turns.append(Turn(role, content, count_tokens(content)))
+            self.trim(conv)
+        self._conversations[conv.id] = conv
+        self._conversations.move_to_end(conv.id)
+        self._expire()
+        return conv
+
+    def record_exchange(self, conv: Conversation, user_message: str, answer: str):
+        conv.turns.append(Turn("user", user_message, count_tokens(user_message)))
+        conv.turns.append(Turn("assistant", answer, count_tokens(answer)))
+        conv.updated_at = time.time()
+        self.trim(conv)
+
+    def trim(self, conv: Conversation):
+        """Fold the oldest turns into the rolling summary until the history fits its budget"""
+        folded = []
+        while len(conv.turns) > 2 and conv.history_tokens() > self.history_tokens:
+            turn = conv.turns.pop(0)
+            folded.append(f"- {'User asked' if turn.role == 'user' else 'Analyst noted'}: {_first_sentence(turn.content)}")
+        if folded:
+            summary = "\n".join(filter(None, [conv.summary, *folded]))
+            conv.summary = truncate_to_tokens(summary, self.summary_tokens)
+
+    def can_reuse_context(self, conv: Conversation, model: str, new_prompt_tokens: int) -> bool:
+        return (
+            conv.ollama_context is not None
+            and conv.ollama_model == model
+            and len(conv.ollama_context) + new_prompt_tokens <= self.context_tokens
+        )
+
+    def delete(self, conversation_id: str) -> bool:
+        return self._conversations.pop(conversation_id, None) is not None
+
+    def stats(self) -> Dict[str, int]:
+        return {"active_conversations": len(self._conversations)}
@@ -0,0 +1,173 @@
+"""
+Buffered, non-blocking JSONL writer for user feedback.
+
+Request handlers only enqueue entries; a background task drains the queue in batches
+and does the file I/O (append, size-based rotation, gzip compression) in a worker
+thread so feedback bursts never block the event loop.
+
+redact() masks personal identifiers in free text before it is logged (used for chat
+transcripts, which carry what users typed).
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+FEEDBACK_LOG_PATH = os.getenv("FEEDBACK_LOG_PATH", "logs/feedback.jsonl")
+FEEDBACK_BATCH_SIZE = int(os.getenv("FEEDBACK_BATCH_SIZE", "100"))
+FEEDBACK_FLUSH_INTERVAL = float(os.getenv("FEEDBACK_FLUSH_INTERVAL", "2.0"))  # seconds
+FEEDBACK_MAX_BYTES = int(os.getenv("FEEDBACK_MAX_BYTES", str(50 * 1024 * 1024)))  # rotate at 50 MB
+FEEDBACK_BACKUP_COUNT = int(os.getenv("FEEDBACK_BACKUP_COUNT", "20"))
+FEEDBACK_QUEUE_SIZE = int(os.getenv("FEEDBACK_QUEUE_SIZE", "10000"))
+
+# Identifier patterns masked by redact(), most specific first
+_REDACTIONS = (
+    (re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+"), "[EMAIL]"),
+    (re.compile(r"\b\d{2}[A-Z]{5}\d{4}[A-Z][1-9A-Z]Z[0-9A-Z]\b", re.IGNORECASE), "[GSTIN]"),
+    (re.compile(r"\b[A-Z]{5}\d{4}[A-Z]\b", re.IGNORECASE), "[PAN]"),
+    (re.compile(r"\b[A-Z]{4}0[A-Z0-9]{6}\b", re.IGNORECASE), "[IFSC]"),
+    (re.compile(r"\b\d{4}[ -]?\d{4}[ -]?\d{4}\b"), "[AADHAAR]"),
+    (re.compile(r"(?<![\w.,])(?:\+?91[ -]?)?[6-9]\d{9}\b"), "[PHONE]"),
+    (re.compile(r"(?<![\w.,])\d{9,18}\b"), "[ACCOUNT]"),
+)
+
+
+def redact(text: str) -> str:
+    """Mask emails, GSTIN/PAN/IFSC codes, Aadhaar, phone and account numbers"""
+    for pattern, label in _REDACTIONS:
+        text = pattern.sub(label, text)
+    return text
+
+
+class FeedbackLogWriter:
+    def __init__(
+        self,
+        path: str = FEEDBACK_LOG_PATH,
+        batch_size: int = FEEDBACK_BATCH_SIZE,
+        flush_interval: float = FEEDBACK_FLUSH_INTERVAL,
+        max_bytes: int = FEEDBACK_MAX_BYTES,
+        backup_count: int = FEEDBACK_BACKUP_COUNT,
+        queue_size: int = FEEDBACK_QUEUE_SIZE
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.queue_size = queue_size
+        self.dropped = 0
+        self.written = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        await asyncio.to_thread(os.makedirs, os.path.dirname(self.path) or ".", exist_ok=True)
+        self._task = asyncio.create_task(self._run())
+
+    def submit(self, entry: Dict[str, Any]) -> bool:
+        """Enqueue an entry without blocking; returns False if it had to be dropped"""
+        if self._task is None:
+            raise RuntimeError("FeedbackLogWriter is not running")
+        try:
+            self._queue.put_nowait(json.dumps(entry, ensure_ascii=False) + "\n")
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning("Feedback queue full, dropping entry")
+            return False
+
+    async def stop(self):
+        """Flush everything still queued and stop the background task"""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        await self._queue.put(None)  # sentinel: flush and exit
+        await task
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "written": self.written,
+            "dropped": self.dropped,
+            "path": self.path
+        }
+
+    def _drain(self) -> List[str]:
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return batch
+            if item is not None:
+                batch.append(item)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            # Wait for the first entry, then keep collecting until the batch is full or the interval elapses
+            batch = []
+            item = await self._queue.get()
+            if item is None:
+                stopping = True
+            else:
+                batch.append(item)
+                deadline = loop.time() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                    if item is None:
+                        stopping = True
+                        break
+                    batch.append(item)
+            if stopping:
+                batch.extend(self._drain())
+            if not batch:
+                continue
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+            except Exception as e:
+                logger.error(f"Failed to write feedback batch of {len(batch)}: {e}")
+
+    def _write_batch(self, lines: List[str]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+            size = f.tell()
+        self.written += len(lines)
+        if size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        """Move the active log aside as a gzip archive and prune old archives"""
+        directory = os.path.dirname(self.path) or "."
+        base, ext = os.path.splitext(os.path.basename(self.path))
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        rotated = os.path.join(directory, f"{base}-{stamp}{ext}")
+        os.replace(self.path, rotated)
+        with open(rotated, "rb") as src, gzip.open(f"{rotated}.gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(rotated)
+        logger.info(f"Rotated feedback log to {rotated}.gz")
+
+        archives = sorted(
+            name for name in os.listdir(directory)
+            if name.startswith(f"{base}-") and name.endswith(f"{ext}.gz")
+        )
+        for name in (archives[:-self.backup_count] if self.backup_count > 0 else []):
+            os.remove(os.path.join(directory, name))
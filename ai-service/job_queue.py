@@ -0,0 +1,268 @@
+"""
+In-process background job queue with persistent job state.
+
+Long-running work (model pulls, bulk categorization, bulk analyses) is submitted as a
+job instead of holding an HTTP connection open. A fixed pool of asyncio workers runs
+the registered handlers; job state, progress and results live in a local SQLite file
+so they survive restarts. Jobs that were pending or running when the process stopped
+are queued again on the next start.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "cache/jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_RETENTION = int(os.getenv("JOB_RETENTION", str(7 * 24 * 3600)))  # finished jobs kept 7 days
+JOB_PROGRESS_INTERVAL = float(os.getenv("JOB_PROGRESS_INTERVAL", "0.5"))  # min seconds between progress writes
+
+PENDING, RUNNING, DONE, FAILED, CANCELLED = "pending", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+_COLUMNS = (
+    "id", "kind", "status", "progress", "message", "params", "result", "error",
+    "created_at", "started_at", "finished_at", "cancel_requested"
+)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobContext:
+    """Handed to job handlers for progress reporting and cooperative cancellation"""
+
+    def __init__(self, queue: "JobQueue", job_id: str):
+        self._queue = queue
+        self.job_id = job_id
+        self._last_write = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self.job_id in self._queue._cancel_requested
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+    async def report(self, progress: float, message: Optional[str] = None):
+        """Record progress in [0, 1]; writes are throttled to JOB_PROGRESS_INTERVAL"""
+        self.check_cancelled()
+        now = time.monotonic()
+        if now - self._last_write < JOB_PROGRESS_INTERVAL and progress < 1.0:
+            return
+        self._last_write = now
+        await self._queue._update(self.job_id, progress=round(min(max(progress, 0.0), 1.0), 4), message=message)
+
+
+Handler = Callable[[Dict[str, Any], JobContext], Awaitable[Any]]
+
+
+class JobQueue:
+    def __init__(self, path: str = JOB_DB_PATH, workers: int = JOB_WORKERS, retention: int = JOB_RETENTION):
+        self.path = path
+        self.workers = workers
+        self.retention = retention
+        self._handlers: Dict[str, Handler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._cancel_requested = set()
+        self._stopping = False
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def register(self, kind: str, handler: Handler):
+        self._handlers[kind] = handler
+
+    # ------------------------------------------------------------------ storage
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, progress REAL DEFAULT 0,"
+                " message TEXT, params TEXT, result TEXT, error TEXT, created_at REAL NOT NULL,"
+                " started_at REAL, finished_at REAL, cancel_requested INTEGER DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+            self._conn = conn
+        return self._conn
+
+    def _execute(self, sql: str, args: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute(sql, args).fetchall()
+            conn.commit()
+            return rows
+
+    def _execute_count(self, sql: str, args: tuple = ()) -> int:
+        with self._lock:
+            conn = self._connect()
+            count = conn.execute(sql, args).rowcount
+            conn.commit()
+            return count
+
+    def _claim(self, job_id: str) -> bool:
+        """Atomically move a pending, uncancelled job to running; False if anything else got there first"""
+        return self._execute_count(
+            "UPDATE jobs SET status = ?, started_at = ? WHERE id = ? AND status = ? AND cancel_requested = 0",
+            (RUNNING, time.time(), job_id, PENDING)
+        ) == 1
+
+    def _cancel_pending(self, job_id: str) -> bool:
+        return self._execute_count(
+            "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+            (CANCELLED, time.time(), job_id, PENDING)
+        ) == 1
+
+    async def _update(self, job_id: str, **fields):
+        assignments = ", ".join(f"{k} = ?" for k in fields)
+        await asyncio.to_thread(self._execute, f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row, include_payload: bool = False) -> Dict[str, Any]:
+        job = {k: row[k] for k in _COLUMNS if k not in ("params", "result", "cancel_requested")}
+        job["cancel_requested"] = bool(row["cancel_requested"])
+        if include_payload:
+            job["params"] = json.loads(row["params"]) if row["params"] else None
+            job["result"] = json.loads(row["result"]) if row["result"] else None
+        return job
+
+    # ------------------------------------------------------------------ lifecycle
+    async def start(self):
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        cutoff = time.time() - self.retention
+        await asyncio.to_thread(
+            self._execute,
+            f"DELETE FROM jobs WHERE status IN ({', '.join('?' * len(FINISHED))}) AND finished_at < ?",
+            (*FINISHED, cutoff)
+        )
+        # Work interrupted by the last shutdown runs again from the start
+        rows = await asyncio.to_thread(
+            self._execute,
+            "SELECT id, cancel_requested FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (PENDING, RUNNING)
+        )
+        for row in rows:
+            if row["cancel_requested"]:
+                await self._update(row["id"], status=CANCELLED, finished_at=time.time())
+                continue
+            await self._update(row["id"], status=PENDING, progress=0.0, message="requeued after restart")
+            self._queue.put_nowait(row["id"])
+        if rows:
+            logger.info(f"Requeued {len(rows)} unfinished jobs")
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self):
+        """Stop the workers; jobs still running are left to be requeued on the next start"""
+        self._stopping = True
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._stopping = False
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ------------------------------------------------------------------ public API
+    async def submit(self, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if self._queue is None:
+            raise RuntimeError("JobQueue is not running")
+        job_id = f"job_{uuid.uuid4().hex}"
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT INTO jobs (id, kind, status, progress, params, created_at) VALUES (?, ?, ?, 0, ?, ?)",
+            (job_id, kind, PENDING, json.dumps(params, ensure_ascii=False), time.time())
+        )
+        self._queue.put_nowait(job_id)
+        return await self.get(job_id)
+
+    async def get(self, job_id: str, include_payload: bool = False) -> Optional[Dict[str, Any]]:
+        rows = await asyncio.to_thread(self._execute, "SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return self._row_to_job(rows[0], include_payload) if rows else None
+
+    async def list(self, status: Optional[str] = None, kind: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        clauses, args = [], []
+        if status:
+            clauses.append("status = ?")
+            args.append(status)
+        if kind:
+            clauses.append("kind = ?")
+            args.append(kind)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = await asyncio.to_thread(
+            self._execute, f"SELECT * FROM jobs {where} ORDER BY created_at DESC LIMIT ?", (*args, limit)
+        )
+        return [self._row_to_job(r) for r in rows]
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = await self.get(job_id)
+        if job is None or job["status"] in FINISHED:
+            return job
+        # The flag stays set while a worker may hold the job; the worker clears it when done
+        self._cancel_requested.add(job_id)
+        await self._update(job_id, cancel_requested=1)
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+        elif await asyncio.to_thread(self._cancel_pending, job_id):
+            self._cancel_requested.discard(job_id)  # never claimed, so no worker will see it
+        return await self.get(job_id)
+
+    async def stats(self) -> Dict[str, Any]:
+        rows = await asyncio.to_thread(self._execute, "SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")
+        return {
+            "workers": len(self._workers),
+            "queued": self._queue.qsize() if self._queue else 0,
+            "by_status": {r["status"]: r["n"] for r in rows}
+        }
+
+    # ------------------------------------------------------------------ workers
+    async def _worker(self, index: int):
+        while True:
+            job_id = await self._queue.get()
+            if not await asyncio.to_thread(self._claim, job_id):
+                continue  # cancelled, finished or unknown
+            job = await self.get(job_id, include_payload=True)
+            try:
+                handler = self._handlers.get(job["kind"])
+                if handler is None:
+                    raise RuntimeError(f"No handler registered for job kind: {job['kind']}")
+                # No await between this check and registering the task, so cancel() sees one or the other
+                if job_id in self._cancel_requested:
+                    raise JobCancelled()
+                task = asyncio.create_task(handler(job["params"] or {}, JobContext(self, job_id)))
+                self._running[job_id] = task
+                result = await task
+                await self._update(
+                    job_id, status=DONE, progress=1.0, finished_at=time.time(),
+                    result=json.dumps(result, ensure_ascii=False, default=str)
+                )
+            except (asyncio.CancelledError, JobCancelled):
+                if self._stopping:
+                    raise  # the worker itself is shutting down
+                await self._update(job_id, status=CANCELLED, finished_at=time.time())
+            except Exception as e:
+                logger.error(f"Job {job_id} ({job['kind']}) failed: {e}")
+                await self._update(job_id, status=FAILED, error=str(e), finished_at=time.time())
+            finally:
+                self._running.pop(job_id, None)
+                self._cancel_requested.discard(job_id)
@@ -0,0 +1,182 @@
+"""
+Content-addressed cache for LLM completions.
+
+Entries are keyed on a SHA-256 of everything that determines the generation
+(backend, model, fully rendered prompt, temperature and sampling options), so any
+endpoint that renders an identical prompt gets the stored completion. A small
+in-process LRU sits in front of a local SQLite file so a restart starts warm.
+"""
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "cache/llm_completions.sqlite3")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # 7 days default
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "2048"))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+
+# Per-request cache behaviour: "use" (default), "bypass" (neither read nor write)
+# or "refresh" (skip the read, overwrite with the fresh completion)
+CACHE_MODES = ("use", "bypass", "refresh")
+cache_mode: contextvars.ContextVar = contextvars.ContextVar("llm_cache_mode", default="use")
+
+
+def completion_key(backend: str, model: str, prompt: Any, temperature: float, options: Dict[str, Any]) -> str:
+    """Stable content hash of a generation request"""
+    material = json.dumps(
+        {"backend": backend, "model": model, "prompt": prompt, "temperature": temperature, "options": options},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    def __init__(
+        self,
+        path: str = LLM_CACHE_PATH,
+        ttl: int = LLM_CACHE_TTL,
+        memory_entries: int = LLM_CACHE_MEMORY_ENTRIES,
+        enabled: bool = LLM_CACHE_ENABLED
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    # ------------------------------------------------------------------ storage
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                " key TEXT PRIMARY KEY, backend TEXT, model TEXT, response TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _remember(self, key: str, response: str, created_at: float):
+        self._memory[key] = (response, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _get_sync(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                row = self._connect().execute(
+                    "SELECT response, created_at FROM completions WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], row[1])
+                    self._remember(key, *entry)
+            else:
+                self._memory.move_to_end(key)
+            if entry is None:
+                return None
+            if self.ttl and now - entry[1] > self.ttl:
+                self._memory.pop(key, None)
+                self._connect().execute("DELETE FROM completions WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return entry[0]
+
+    def _set_sync(self, key: str, backend: str, model: str, response: str):
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, response, created_at)
+            self._connect().execute(
+                "INSERT OR REPLACE INTO completions (key, backend, model, response, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, backend, model, response, created_at)
+            )
+            self._conn.commit()
+
+    # ------------------------------------------------------------------ public API
+    async def get(self, key: str) -> Optional[str]:
+        if not self.enabled or cache_mode.get() != "use":
+            return None
+        try:
+            response = await asyncio.to_thread(self._get_sync, key)
+        except sqlite3.Error as e:
+            logger.error(f"LLM cache read failed: {e}")
+            response = None
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            logger.info(f"LLM cache hit {key[:12]}")
+        return response
+
+    async def set(self, key: str, backend: str, model: str, response: str):
+        if not self.enabled or not response or cache_mode.get() == "bypass":
+            return
+        try:
+            await asyncio.to_thread(self._set_sync, key, backend, model, response)
+            self.writes += 1
+        except sqlite3.Error as e:
+            logger.error(f"LLM cache write failed: {e}")
+
+    def load(self) -> int:
+        """Warm the in-memory LRU from the newest persisted entries; returns rows loaded"""
+        if not self.enabled:
+            return 0
+        cutoff = time.time() - self.ttl if self.ttl else 0
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM completions WHERE created_at < ?", (cutoff,))
+            conn.commit()
+            rows = conn.execute(
+                "SELECT key, response, created_at FROM completions ORDER BY created_at DESC LIMIT ?",
+                (self.memory_entries,)
+            ).fetchall()
+            for key, response, created_at in reversed(rows):
+                self._remember(key, response, created_at)
+        return len(rows)
+
+    def clear(self) -> int:
+        with self._lock:
+            self._memory.clear()
+            if not os.path.exists(self.path) and self._conn is None:
+                return 0
+            conn = self._connect()
+            removed = conn.execute("DELETE FROM completions").rowcount
+            conn.commit()
+            return removed
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "path": self.path
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
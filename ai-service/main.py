@@ -1,7 +1,7 @@
 import uvicorn
-from fastapi import FastAPI, HTTPException, Body, BackgroundTasks, Request
+from fastapi import FastAPI, HTTPException, Body, Request, Query, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, Response
 from pydantic import BaseModel, Field, field_validator
 from typing import List, Dict, Any, Optional, Union
 import os
@@ -13,10 +13,39 @@ import re
 import hashlib
 from datetime import datetime, timedelta
 from functools import lru_cache
+from contextlib import asynccontextmanager
 import asyncio
+import importlib
+import time
 from collections import defaultdict
 import logging
 
+from feedback_writer import FeedbackLogWriter, redact
+from llm_cache import CompletionCache, completion_key, cache_mode, CACHE_MODES
+from semantic_cache import SemanticCache
+from conversation_store import ConversationStore, Conversation, count_tokens
+from narrative_jobs import NarrativeJobs
+from job_queue import JobQueue, JobContext
+from model_router import ModelRouter, configured_models
+from anomaly_detector import ANOMALY_SNAPSHOT_INTERVAL, AnomalyDetector
+from benchmark_index import BenchmarkIndex, INDUSTRY_BENCHMARKS, higher_is_better
+from tracing import Tracer, parse_traceparent
+from prompt_builder import render_context, render_transaction_table, render_system_blocks
+from bulk_input import (
+    HISTORY_TYPES, HistoryColumns, TransactionColumns, history_frame_from_columns, validate_history_frame,
+    transaction_frame_from_columns, validate_transaction_frame, transaction_records, read_upload_frame
+)
+
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib encoder
+    orjson = None
+
+try:
+    import msgpack  # optional: enables ?format=msgpack
+except ImportError:
+    msgpack = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -27,12 +56,42 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background workers on boot and flush them on shutdown"""
+    await feedback_writer.start()
+    if transcript_writer is not None:
+        await transcript_writer.start()
+    await job_queue.start()
+    # Heavy loading runs after the port is open; /ready reports 503 until it is done
+    global startup_task
+    startup_task = asyncio.create_task(load_startup_state())
+    snapshot_task = asyncio.create_task(snapshot_anomaly_state())
+    if OLLAMA_WARMUP:
+        start_model_warmup()
+    try:
+        yield
+    finally:
+        for task in (startup_task, warmup_task, snapshot_task):
+            if task is not None:
+                task.cancel()
+        await narrative_jobs.close()
+        await job_queue.stop()
+        await feedback_writer.stop()
+        if transcript_writer is not None:
+            await transcript_writer.stop()
+        completion_cache.close()
+        saved = await asyncio.to_thread(anomaly_detector.save)
+        logger.info(f"Saved anomaly state for {saved} businesses")
+        await asyncio.to_thread(tracer.shutdown)
+
 app = FastAPI(
     title="WealthWise AI Financial Analyst - Enhanced Edition",
     description="Professional AI Financial Analyst powered by Ollama Gemma:2B for SME Financial Health Assessment",
     version="5.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -44,6 +103,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def llm_cache_controls(request: Request, call_next):
+    """Per-request LLM cache mode via `X-LLM-Cache` header or `llm_cache` query param"""
+    mode = (request.headers.get("x-llm-cache") or request.query_params.get("llm_cache") or "use").lower()
+    if mode not in CACHE_MODES:
+        mode = "use"
+    token = cache_mode.set(mode)
+    try:
+        return await call_next(request)
+    finally:
+        cache_mode.reset(token)
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Server span per request, continuing the caller's trace from its `traceparent` header"""
+    parent = parse_traceparent(request.headers.get("traceparent"))
+    with tracer.span(f"{request.method} {request.url.path}", parent=parent, kind="server") as span:
+        span.set("http.method", request.method)
+        span.set("http.target", request.url.path)
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            span.name = f"{request.method} {route.path}"
+        span.set("http.status_code", response.status_code)
+        response.headers["traceparent"] = span.traceparent()
+        return response
+
 # =============================================================================
 # CONFIGURATION & CONSTANTS
 # =============================================================================
@@ -51,12 +137,78 @@ OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "gemma:2b")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+
+# Model residency: keep gemma loaded between requests and load it before taking traffic
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_WARMUP = os.getenv("OLLAMA_WARMUP", "true").lower() == "true"
+OLLAMA_WARMUP_RETRY = float(os.getenv("OLLAMA_WARMUP_RETRY", "10"))  # seconds between warm-up attempts
+readiness = {"caches_loaded": False, "model_resident": False, "warmup_load_ms": {}, "startup_ms": None}
+warmup_task: Optional[asyncio.Task] = None
+startup_task: Optional[asyncio.Task] = None
+PROCESS_STARTED = time.perf_counter()
+
+# Imported on first use or by the post-startup warm-up instead of at module import
+LAZY_DEPENDENCIES = ("pandas",)
 
 # Cache configuration
 CACHE_TTL = int(os.getenv("CACHE_TTL", "3600"))  # 1 hour default
 response_cache = {}
 cache_timestamps = {}
 
+# Content-addressed LLM completion cache (memory LRU + local SQLite)
+completion_cache = CompletionCache()
+
+# Near-duplicate answer cache for free-text chat/advice questions
+semantic_cache = SemanticCache()
+
+# Multi-turn chat state (token-budgeted history + reusable Ollama context)
+conversation_store = ConversationStore()
+
+# Picks among OLLAMA_MODELS per request under the LLM_SLO_P95_MS latency target
+model_router = ModelRouter(configured_models(OLLAMA_MODEL), OLLAMA_MODEL)
+
+# Background narratives for ?narrative=async (heuristic result first, LLM text later)
+narrative_jobs = NarrativeJobs()
+NARRATIVE_SSE_HEARTBEAT = float(os.getenv("NARRATIVE_SSE_HEARTBEAT", "15"))
+
+# Concurrent narratives for /batch-analysis?narratives=true
+BATCH_NARRATIVE_CONCURRENCY = int(os.getenv("BATCH_NARRATIVE_CONCURRENCY", "4"))
+BATCH_NARRATIVE_TIMEOUT = float(os.getenv("BATCH_NARRATIVE_TIMEOUT", "45"))  # seconds per business
+
+# Persistent background jobs (model pulls, bulk categorization, bulk analyses)
+job_queue = JobQueue()
+JOB_CATEGORIZE_CHUNK = int(os.getenv("JOB_CATEGORIZE_CHUNK", "50"))  # transactions per LLM call in jobs
+CATEGORIZE_CONCURRENCY = int(os.getenv("CATEGORIZE_CONCURRENCY", "2"))  # parallel LLM calls per categorization
+
+# Feedback log (buffered, written by a background task)
+feedback_writer = FeedbackLogWriter()
+# Redacted chat transcripts for scripts/compile_training_set.py; opt-in, see README_FINETUNE.md
+TRANSCRIPT_LOG_PATH = os.getenv("TRANSCRIPT_LOG_PATH", "")
+TRANSCRIPT_BACKUP_COUNT = int(os.getenv("TRANSCRIPT_BACKUP_COUNT", "5"))  # rotated archives kept
+transcript_writer = (
+    FeedbackLogWriter(path=TRANSCRIPT_LOG_PATH, backup_count=TRANSCRIPT_BACKUP_COUNT) if TRANSCRIPT_LOG_PATH else None
+)
+
+# Percentile ranks against industry peer distributions (data/industry_benchmarks.json, hot reloaded)
+benchmark_index = BenchmarkIndex(fallback=INDUSTRY_BENCHMARKS)
+# Points per ratio in the financial health score; full points from this peer percentile up
+HEALTH_SCORE_WEIGHTS = {"current_ratio": 20, "debt_equity": 20, "profit_margin": 10}
+HEALTH_FULL_CREDIT_PERCENTILE = float(os.getenv("HEALTH_FULL_CREDIT_PERCENTILE", "75"))
+# CreditAnalysisRequest field -> benchmark metric
+BENCHMARKED_RATIOS = {
+    "current_ratio": "current_ratio",
+    "quick_ratio": "quick_ratio",
+    "debt_equity_ratio": "debt_equity",
+    "profit_margin": "profit_margin",
+}
+
+# Per-business streaming anomaly scores for transaction amounts (EWMA + quantile sketches)
+anomaly_detector = AnomalyDetector()
+
+# Spans for requests, LLM calls, cache lookups and heuristics (TRACE_EXPORTER, TRACE_SAMPLE_RATE)
+tracer = Tracer()
+
 # Rate limiting
 request_counts = defaultdict(list)
 RATE_LIMIT_WINDOW = 60  # seconds
@@ -103,6 +255,9 @@ LANGUAGE_PROMPTS = {
     "kn": "ಕನ್ನಡದಲ್ಲಿ ಉತ್ತರಿಸಿ। ವೃತ್ತಿಪರ ಹಣಕಾಸು ಪದಗಳನ್ನು ಬಳಸಿ."
 }
 
+# Persona + language instruction, rendered once per language
+SYSTEM_BLOCKS = render_system_blocks(FINANCIAL_ANALYST_PERSONA, LANGUAGE_PROMPTS)
+
 # =============================================================================
 # ENHANCED DOMAIN MODELS
 # =============================================================================
@@ -128,80 +283,6 @@ class IndustryType(str, Enum):
     FOOD_BEVERAGE = "FOOD_BEVERAGE"
     OTHER = "OTHER"
 
-# Enhanced industry benchmarks with more metrics
-INDUSTRY_BENCHMARKS = {
-    "MANUFACTURING": {
-        "current_ratio": 1.5, "quick_ratio": 1.0, "debt_equity": 1.0, 
-        "profit_margin": 8.0, "receivable_days": 45, "payable_days": 60,
-        "inventory_turnover": 6, "roe": 12.0, "roa": 7.0
-    },
-    "RETAIL": {
-        "current_ratio": 1.2, "quick_ratio": 0.5, "debt_equity": 0.8, 
-        "profit_margin": 5.0, "receivable_days": 30, "payable_days": 45,
-        "inventory_turnover": 12, "roe": 15.0, "roa": 8.0
-    },
-    "SERVICES": {
-        "current_ratio": 1.8, "quick_ratio": 1.5, "debt_equity": 0.5, 
-        "profit_margin": 15.0, "receivable_days": 60, "payable_days": 30,
-        "inventory_turnover": 0, "roe": 18.0, "roa": 12.0
-    },
-    "IT_TECHNOLOGY": {
-        "current_ratio": 2.0, "quick_ratio": 1.8, "debt_equity": 0.3, 
-        "profit_margin": 20.0, "receivable_days": 45, "payable_days": 30,
-        "inventory_turnover": 0, "roe": 25.0, "roa": 15.0
-    },
-    "HEALTHCARE": {
-        "current_ratio": 1.4, "quick_ratio": 1.2, "debt_equity": 0.7, 
-        "profit_margin": 12.0, "receivable_days": 40, "payable_days": 35,
-        "inventory_turnover": 8, "roe": 16.0, "roa": 10.0
-    },
-    "ECOMMERCE": {
-        "current_ratio": 1.3, "quick_ratio": 0.8, "debt_equity": 1.2, 
-        "profit_margin": 3.0, "receivable_days": 15, "payable_days": 45,
-        "inventory_turnover": 15, "roe": 10.0, "roa": 5.0
-    },
-    "AGRICULTURE": {
-        "current_ratio": 1.1, "quick_ratio": 0.6, "debt_equity": 0.6, 
-        "profit_margin": 10.0, "receivable_days": 90, "payable_days": 60,
-        "inventory_turnover": 4, "roe": 12.0, "roa": 8.0
-    },
-    "CONSTRUCTION": {
-        "current_ratio": 1.2, "quick_ratio": 0.7, "debt_equity": 1.5, 
-        "profit_margin": 6.0, "receivable_days": 75, "payable_days": 90,
-        "inventory_turnover": 3, "roe": 14.0, "roa": 6.0
-    },
-    "LOGISTICS": {
-        "current_ratio": 1.3, "quick_ratio": 1.0, "debt_equity": 0.9, 
-        "profit_margin": 7.0, "receivable_days": 35, "payable_days": 40,
-        "inventory_turnover": 20, "roe": 13.0, "roa": 8.0
-    },
-    "HOSPITALITY": {
-        "current_ratio": 1.0, "quick_ratio": 0.8, "debt_equity": 1.1, 
-        "profit_margin": 8.0, "receivable_days": 20, "payable_days": 30,
-        "inventory_turnover": 25, "roe": 15.0, "roa": 7.0
-    },
-    "EDUCATION": {
-        "current_ratio": 1.6, "quick_ratio": 1.4, "debt_equity": 0.4, 
-        "profit_margin": 18.0, "receivable_days": 30, "payable_days": 25,
-        "inventory_turnover": 0, "roe": 20.0, "roa": 14.0
-    },
-    "FINTECH": {
-        "current_ratio": 2.5, "quick_ratio": 2.3, "debt_equity": 0.2, 
-        "profit_margin": 25.0, "receivable_days": 30, "payable_days": 20,
-        "inventory_turnover": 0, "roe": 30.0, "roa": 18.0
-    },
-    "FOOD_BEVERAGE": {
-        "current_ratio": 1.4, "quick_ratio": 0.9, "debt_equity": 0.8, 
-        "profit_margin": 10.0, "receivable_days": 35, "payable_days": 45,
-        "inventory_turnover": 10, "roe": 16.0, "roa": 9.0
-    },
-    "OTHER": {
-        "current_ratio": 1.3, "quick_ratio": 1.0, "debt_equity": 0.8, 
-        "profit_margin": 10.0, "receivable_days": 45, "payable_days": 45,
-        "inventory_turnover": 8, "roe": 15.0, "roa": 9.0
-    }
-}
-
 # =============================================================================
 # ENHANCED REQUEST/RESPONSE MODELS
 # =============================================================================
@@ -272,8 +353,12 @@ class CreditAnalysisResponse(BaseModel):
     max_loan_amount: Optional[float] = None
     suggested_products: List[str]
     industry_comparison: str
+    industry_percentiles: Dict[str, float] = {}  # peer percentile of each supplied ratio
+    estimated_percentiles: List[str] = []  # ratios ranked against modelled, not observed, peer distributions
     confidence: float
     analysis_timestamp: datetime = Field(default_factory=datetime.now)
+    narrative_job_id: Optional[str] = None  # ?narrative=async: poll /api/v1/ai/narratives/{id}
+    narrative_status: Optional[str] = None
 
 class RiskAssessmentRequest(BaseModel):
     business_name: str
@@ -294,6 +379,8 @@ class RiskAssessmentResponse(BaseModel):
     urgency_level: str
     confidence: float
     analysis_timestamp: datetime = Field(default_factory=datetime.now)
+    narrative_job_id: Optional[str] = None
+    narrative_status: Optional[str] = None
 
 class ForecastRequest(BaseModel):
     business_name: str
@@ -315,6 +402,8 @@ class ForecastResponse(BaseModel):
     confidence: float
     forecast_period: str
     analysis_timestamp: datetime = Field(default_factory=datetime.now)
+    narrative_job_id: Optional[str] = None
+    narrative_status: Optional[str] = None
 
 # --- Advanced AI Models for Sme Command Center ---
 class HistoryPoint(BaseModel):
@@ -322,16 +411,28 @@ class HistoryPoint(BaseModel):
     amount: float
     type: str # CREDIT/DEBIT
 
+    @field_validator('type')
+    @classmethod
+    def validate_type(cls, v: str) -> str:
+        v = v.strip().upper()
+        if v not in HISTORY_TYPES:
+            raise ValueError('History type must be CREDIT or DEBIT')
+        return v
+
 class Commitment(BaseModel):
     dueDate: str
     amount: float
     type: str # AR/AP
 
+# Upper bound for any forecast horizon, checked before a streamed response starts
+MAX_FORECAST_HORIZON = int(os.getenv("MAX_FORECAST_HORIZON", str(100 * 365)))
+
 class AdvancedForecastRequest(BaseModel):
     businessId: str
-    history: List[HistoryPoint]
+    history: List[HistoryPoint] = []
+    historyColumns: Optional[HistoryColumns] = None  # columnar alternative to `history`
     commitments: List[Commitment]
-    horizon: int = 90
+    horizon: int = Field(90, ge=1, le=MAX_FORECAST_HORIZON)
 
 class PredictionPoint(BaseModel):
     date: str
@@ -341,6 +442,8 @@ class PredictionPoint(BaseModel):
     lowerBound: float
     upperBound: float
 
+PREDICTION_FIELDS = ["date", "revenue", "expense", "confidence", "lowerBound", "upperBound"]
+
 class AdvancedExplainability(BaseModel):
     summary: str
     drivers: List[Dict[str, Any]] = []
@@ -358,7 +461,8 @@ class TransactionData(BaseModel):
 
 class TransactionCategorizationRequest(BaseModel):
     batch_id: Optional[str] = None
-    transactions: List[TransactionData]
+    transactions: List[TransactionData] = []
+    transactionColumns: Optional[TransactionColumns] = None  # columnar alternative to `transactions`
     industry: str
     business_name: str
     language: str = "en"
@@ -394,7 +498,8 @@ class ChatRequest(BaseModel):
     user_id: int
     language: str = "en"
     context: Optional[Dict[str, Any]] = None
-    conversation_history: Optional[List[Dict[str, str]]] = None
+    conversation_id: Optional[str] = None  # omit to start a new conversation
+    conversation_history: Optional[List[Dict[str, str]]] = None  # only used to seed a new conversation
 
 class ChatResponse(BaseModel):
     response: str
@@ -408,6 +513,36 @@ class FeedbackRequest(BaseModel):
     feedback: Optional[str] = None
     good_response: bool
 
+class AnomalyTransaction(BaseModel):
+    """A HistoryPoint or TransactionData entry; category is derived from the description if missing"""
+    id: Optional[Union[int, str]] = None
+    date: Optional[str] = None
+    amount: float
+    type: str  # CREDIT/DEBIT
+    category: Optional[str] = None
+    description: Optional[str] = None
+    party_name: Optional[str] = None
+
+class AnomalyScoreRequest(BaseModel):
+    business_id: Optional[str] = None  # omit to score the batch on its own
+    transactions: List[AnomalyTransaction] = []
+    historyColumns: Optional[HistoryColumns] = None
+    transactionColumns: Optional[TransactionColumns] = None
+    learn: bool = False  # with business_id: also fold the batch into the stored state
+
+class AnomalyDeltaRequest(BaseModel):
+    transactions: List[AnomalyTransaction] = []
+    transactionColumns: Optional[TransactionColumns] = None
+    deltaId: Optional[str] = None  # idempotency key: a repeated deltaId is not applied again
+
+class BenchmarkQuery(BaseModel):
+    industry: str
+    metric: str  # ratio name (e.g. current_ratio) or expense:<category>
+    value: float
+
+class BenchmarkPercentileRequest(BaseModel):
+    queries: List[BenchmarkQuery] = Field(max_length=100000)
+
 class BatchAnalysisRequest(BaseModel):
     """Request model for batch analysis of multiple businesses"""
     businesses: List[CreditAnalysisRequest]
@@ -445,12 +580,14 @@ def get_cache_key(endpoint: str, params: Dict[str, Any]) -> str:
     param_str = json.dumps(params, sort_keys=True)
     return f"{endpoint}:{hashlib.sha256(param_str.encode()).hexdigest()[:16]}"
 
+@tracer.traced("cache.response")
 def get_cached_response(cache_key: str):
     """Retrieve cached response if still valid"""
     if cache_key in response_cache:
         timestamp = cache_timestamps.get(cache_key)
         if timestamp and (datetime.now() - timestamp).seconds < CACHE_TTL:
             logger.info(f"Cache hit for {cache_key}")
+            tracer.annotate(hit=True)
             return response_cache[cache_key]
         else:
             # Clean expired cache
@@ -464,17 +601,121 @@ def set_cached_response(cache_key: str, response: Any):
     cache_timestamps[cache_key] = datetime.now()
     logger.info(f"Cached response for {cache_key}")
 
+# Columnar / binary response encoding
+COLUMNAR_MEDIA_TYPE = "application/vnd.wealthwise.columnar+json"
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "64"))  # prediction lines per flush
+MAX_BUFFERED_HORIZON = int(os.getenv("MAX_BUFFERED_HORIZON", "3650"))  # longer horizons must stream
+
+def resolve_response_format(http_request: Request, requested: Optional[str]) -> str:
+    """Pick records, columnar, msgpack or ndjson from ?format= or the Accept header"""
+    accept = http_request.headers.get("accept", "")
+    if requested:
+        fmt = requested.lower()
+        if fmt not in ("records", "columnar", "msgpack", "ndjson"):
+            raise HTTPException(status_code=400, detail=f"Unsupported format '{requested}'")
+    elif NDJSON_MEDIA_TYPE in accept:
+        fmt = "ndjson"
+    elif MSGPACK_MEDIA_TYPE in accept:
+        fmt = "msgpack"
+    elif COLUMNAR_MEDIA_TYPE in accept:
+        fmt = "columnar"
+    else:
+        fmt = "records"
+    if fmt == "msgpack" and msgpack is None:
+        raise HTTPException(status_code=406, detail="MessagePack support is not installed")
+    return fmt
+
+def ndjson_line(obj: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj) + b"\n"
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8") + b"\n"
+
+def encode_columnar(payload: Dict[str, Any], fmt: str) -> Response:
+    """Serialize a columnar payload with orjson (or MessagePack) bypassing response models"""
+    payload = {"format": "columnar", "length": len(payload["predictions"]["date"]), **payload}
+    if fmt == "msgpack":
+        return Response(content=msgpack.packb(payload, use_bin_type=True), media_type=MSGPACK_MEDIA_TYPE)
+    if orjson is not None:
+        body = orjson.dumps(payload)
+    else:
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return Response(content=body, media_type=COLUMNAR_MEDIA_TYPE)
+
+def with_narrative_job(result: BaseModel, field: str, cache_key: str, prompt: str, language: str, endpoint: str):
+    """Return the heuristic result now; the LLM rewrite of `field` runs as a narrative job"""
+    job = narrative_jobs.submit(
+        cache_key, field, lambda: get_ai_response(prompt, "", language, endpoint=endpoint)
+    )
+    if job["status"] == "done":
+        setattr(result, field, job["narrative"])
+    result.narrative_job_id = job["job_id"]
+    result.narrative_status = job["status"]
+    return result
+
+@tracer.traced("cache.semantic")
+def semantic_lookup(endpoint: str, query: str, language: str, payload: Any) -> Optional[str]:
+    """Reuse a stored answer for a near-duplicate question (honours X-LLM-Cache)"""
+    if cache_mode.get() != "use":
+        return None
+    answer = semantic_cache.lookup(endpoint, query, language, payload)
+    tracer.annotate(endpoint=endpoint, hit=answer is not None)
+    if answer is not None:
+        logger.info(f"Semantic cache hit for {endpoint}")
+    return answer
+
+def semantic_store(endpoint: str, query: str, language: str, payload: Any, answer: Optional[str]):
+    if answer and cache_mode.get() != "bypass":
+        semantic_cache.store(endpoint, query, language, payload, answer)
+
 # =============================================================================
 # ENHANCED AI INTEGRATION
 # =============================================================================
+@tracer.traced("llm.ollama")
 async def call_ollama(
     prompt: str, 
     system_prompt: str = None, 
     language: str = "en",
     temperature: float = 0.2,
-    max_tokens: int = 1024
+    max_tokens: int = 1024,
+    endpoint: str = "default"
 ) -> str:
     """Enhanced Ollama API call with better error handling and streaming support"""
+    full_prompt = render_gemma_prompt(build_system_prompt(system_prompt, language), prompt)
+    options = ollama_options(temperature, max_tokens)
+    prompt_tokens = count_tokens(full_prompt)
+    # Look up the answer of the model this endpoint normally gets before routing, so cache
+    # hits neither count as routing decisions nor miss because load stepped the model down
+    model = model_router.preferred(endpoint, prompt_tokens)
+    cache_key = completion_key("ollama", model, full_prompt, temperature, options)
+    cached = await cached_completion(cache_key)
+    if cached is None:
+        routed = model_router.route(endpoint, prompt_tokens)
+        if routed != model:
+            model = routed
+            cache_key = completion_key("ollama", model, full_prompt, temperature, options)
+            cached = await cached_completion(cache_key)
+    tracer.annotate(endpoint=endpoint, model=model, cached=cached is not None)
+    if cached is not None:
+        return cached
+
+    data = await ollama_generate(full_prompt, options, endpoint=endpoint, model=model)
+    if data is None:
+        return None
+    text = data.get("response", "").strip()
+    await completion_cache.set(cache_key, "ollama", model, text)
+    return text
+
+async def cached_completion(cache_key: str) -> Optional[str]:
+    with tracer.span("cache.completion") as span:
+        cached = await completion_cache.get(cache_key)
+        span.set("hit", cached is not None)
+        return cached
+
+def build_system_prompt(system_prompt: Optional[str], language: str) -> str:
+    if not system_prompt:
+        return SYSTEM_BLOCKS.get(language, FINANCIAL_ANALYST_PERSONA)
     lang_instruction = LANGUAGE_PROMPTS.get(language, "")
     full_system = FINANCIAL_ANALYST_PERSONA
     
@@ -482,84 +723,225 @@ async def call_ollama(
         full_system = f"{FINANCIAL_ANALYST_PERSONA}\n\n{system_prompt}"
     if lang_instruction:
         full_system = f"{full_system}\n\n{lang_instruction}"
+    return full_system
 
-    full_prompt = f"""<start_of_turn>system
+def render_gemma_prompt(full_system: str, prompt: str) -> str:
+    return f"""<start_of_turn>system
 {full_system}<end_of_turn>
 <start_of_turn>user
 {prompt}<end_of_turn>
 <start_of_turn>model
 """
 
+def ollama_options(temperature: float, max_tokens: int) -> Dict[str, Any]:
+    return {
+        "temperature": temperature,
+        "top_p": 0.8,
+        "top_k": 30,
+        "num_predict": max_tokens,
+        "stop": ["<start_of_turn>", "<end_of_turn>", "User:", "Prompt:"]
+    }
+
+@tracer.traced("ollama.generate", kind="client")
+async def ollama_generate(
+    full_prompt: str,
+    options: Dict[str, Any],
+    context: Optional[List[int]] = None,
+    endpoint: str = "default",
+    model: Optional[str] = None,
+    raw: bool = True,
+    system: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    /api/generate call; returns Ollama's reply (response, context, eval counts) or None.
+    With `raw` the prompt is already in Gemma turn format (render_gemma_prompt) and is sent
+    untemplated. Ollama returns no context in raw mode, so chat sends plain text with
+    raw=False and lets Ollama apply the model template, with `system` on the first turn.
+    """
+    model = model or OLLAMA_MODEL
+    prompt_tokens = log_prompt_tokens("ollama", endpoint, full_prompt, len(context or []))
+    payload = {
+        "model": model,
+        "prompt": full_prompt,
+        "stream": False,
+        "options": options,
+        "keep_alive": OLLAMA_KEEP_ALIVE
+    }
+    if raw:
+        payload["raw"] = True
+    elif system:
+        payload["system"] = system
+    if context:
+        payload["context"] = context
+
+    # Warm-up latency includes the model load, keep it out of the routing statistics
+    tracked = endpoint != "warmup"
+    started = model_router.begin(model) if tracked else 0.0
+    tracer.annotate(endpoint=endpoint, model=model, prompt_tokens=prompt_tokens)
+    data = None
     try:
         async with httpx.AsyncClient(timeout=60.0) as client:
             response = await client.post(
-                f"{OLLAMA_BASE_URL}/api/generate",
-                json={
-                    "model": OLLAMA_MODEL,
-                    "prompt": full_prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": temperature,
-                        "top_p": 0.8,
-                        "top_k": 30,
-                        "num_predict": max_tokens,
-                        "stop": ["<start_of_turn>", "<end_of_turn>", "User:", "Prompt:"]
-                    }
-                }
+                f"{OLLAMA_BASE_URL}/api/generate", json=payload, headers={"traceparent": tracer.traceparent()}
             )
+            tracer.annotate(**{"http.status_code": response.status_code})
             if response.status_code == 200:
                 data = response.json()
-                return data.get("response", "").strip()
+                # Ollama's own timings (ns): model load, prefill and decode inside this call
+                tracer.annotate(**{
+                    f"ollama.{key[:-len('_duration')]}_ms": round(data[key] / 1e6, 1)
+                    for key in ("total_duration", "load_duration", "prompt_eval_duration", "eval_duration")
+                    if key in data
+                }, **{f"ollama.{key}": data[key] for key in ("prompt_eval_count", "eval_count") if key in data})
+                if "prompt_eval_count" in data:
+                    logger.info(f"Ollama prefill [{endpoint}]: {data['prompt_eval_count']} tokens evaluated")
+                load_ms = data.get("load_duration", 0) / 1e6
+                if load_ms > 1000:
+                    logger.warning(f"Ollama cold-loaded {model} for {endpoint} ({load_ms:.0f} ms)")
+                return data
             else:
-                logger.error(f"Ollama API error: {response.status_code} - {response.text}")
+                logger.error(f"Ollama API error ({model}): {response.status_code} - {response.text}")
                 return None
                 
     except httpx.ConnectError:
         logger.warning("Ollama not running. Falling back to heuristic analysis.")
         return None
     except Exception as e:
-        logger.error(f"Ollama call failed: {e}")
+        logger.error(f"Ollama call failed ({model}): {e}")
         return None
+    finally:
+        if tracked:
+            model_router.finish(model, started, prompt_tokens, ok=data is not None)
+
+def log_prompt_tokens(backend: str, endpoint: str, prompt: str, context_tokens: int = 0) -> int:
+    """Per-call prompt size, so prefill cost can be tracked per endpoint"""
+    tokens = count_tokens(prompt)
+    reused = f" (+{context_tokens} reused context)" if context_tokens else ""
+    logger.info(f"Prompt tokens [{backend}/{endpoint}]: {tokens}{reused}")
+    return tokens
+
+async def warm_up_model():
+    """
+    Load every routed model (OLLAMA_MODELS) with a one-token generation, retrying until
+    Ollama answers. Any endpoint can be stepped down to a smaller model, so all of them
+    are warmed; Ollama must be allowed to keep them loaded (OLLAMA_MAX_LOADED_MODELS).
+    """
+    # The prompt starts with the English system block so its prefix is also warm in Ollama
+    prompt = render_gemma_prompt(SYSTEM_BLOCKS["en"], "Hello")
+    pending = list(model_router.models)
+    while True:
+        for model in list(pending):
+            data = await ollama_generate(prompt, ollama_options(0.0, 1), endpoint="warmup", model=model)
+            if data is None:
+                continue
+            pending.remove(model)
+            readiness["warmup_load_ms"][model] = round(data.get("load_duration", 0) / 1e6, 1)
+            logger.info(f"{model} is resident (load took {readiness['warmup_load_ms'][model]} ms)")
+        if not pending:
+            readiness["model_resident"] = True
+            return
+        await asyncio.sleep(OLLAMA_WARMUP_RETRY)
+
+def preload_dependencies():
+    for name in LAZY_DEPENDENCIES:
+        importlib.import_module(name)
+
+async def load_startup_state():
+    """Anomaly state, dependency imports, tiktoken, prompt blocks and the completion cache, loaded in the background"""
+    try:
+        # First, since per-business anomaly requests answer 503 until it is restored
+        restored = await asyncio.to_thread(anomaly_detector.load)
+        logger.info(f"Anomaly state restored for {restored} businesses")
+        await asyncio.to_thread(preload_dependencies)
+        block_tokens = await asyncio.to_thread(lambda: {k: count_tokens(v) for k, v in SYSTEM_BLOCKS.items()})
+        logger.info(f"System prompt blocks pre-rendered (tokens per language: {block_tokens})")
+        loaded = await asyncio.to_thread(completion_cache.load)
+        logger.info(f"LLM completion cache warmed with {loaded} entries")
+    except Exception as e:
+        logger.error(f"Startup loading failed: {e}")
+        return
+    readiness["caches_loaded"] = True
+    readiness["startup_ms"] = round((time.perf_counter() - PROCESS_STARTED) * 1000, 1)
+    logger.info(f"Startup loading finished {readiness['startup_ms']} ms after import")
+
+async def snapshot_anomaly_state():
+    """Write-behind snapshots, so a crash loses at most ANOMALY_SNAPSHOT_INTERVAL of learned state"""
+    while True:
+        await asyncio.sleep(ANOMALY_SNAPSHOT_INTERVAL)
+        if not anomaly_detector.dirty:
+            continue
+        try:
+            saved = await asyncio.to_thread(anomaly_detector.save)
+            logger.debug(f"Anomaly state snapshot: {saved} businesses")
+        except Exception as e:
+            logger.error(f"Anomaly state snapshot failed: {e}")
+
+def start_model_warmup():
+    global warmup_task
+    if warmup_task is None or warmup_task.done():
+        warmup_task = asyncio.create_task(warm_up_model())
 
+async def model_is_resident() -> bool:
+    """Ask Ollama whether every routed model is loaded; older servers without /api/ps are trusted"""
+    try:
+        async with httpx.AsyncClient(timeout=3.0) as client:
+            response = await client.get(f"{OLLAMA_BASE_URL}/api/ps")
+        if response.status_code == 404:
+            return True
+        loaded = response.json().get("models") or []
+        names = {m.get("name") for m in loaded} | {m.get("model") for m in loaded}
+        return all(model in names for model in model_router.models)
+    except Exception:
+        return False
+
+@tracer.traced("llm.openai", kind="client")
 async def call_openai_fallback(
     system_prompt: str, 
     user_prompt: str, 
     language: str = "en",
-    temperature: float = 0.7
+    temperature: float = 0.7,
+    endpoint: str = "default"
 ) -> str:
     """Enhanced OpenAI fallback with retry logic"""
     if not OPENAI_API_KEY:
         return None
 
-    lang_instruction = LANGUAGE_PROMPTS.get(language, "")
-    full_system = f"{FINANCIAL_ANALYST_PERSONA}\n{system_prompt}"
-    if lang_instruction:
-        full_system = f"{full_system}\n{lang_instruction}"
+    messages = [
+        {"role": "system", "content": build_system_prompt(system_prompt, language)},
+        {"role": "user", "content": user_prompt}
+    ]
+    log_prompt_tokens("openai", endpoint, messages[0]["content"] + "\n" + user_prompt)
+    cache_key = completion_key("openai", OPENAI_MODEL, messages, temperature, {"max_tokens": 2000})
+    tracer.annotate(endpoint=endpoint, model=OPENAI_MODEL)
+    cached = await cached_completion(cache_key)
+    if cached is not None:
+        return cached
 
     max_retries = 3
     for attempt in range(max_retries):
         try:
             async with httpx.AsyncClient(timeout=30.0) as client:
                 response = await client.post(
-                    "https://api.openai.com/v1/chat/completions",
+                    f"{OPENAI_BASE_URL}/chat/completions",
                     headers={
                         "Authorization": f"Bearer {OPENAI_API_KEY}",
-                        "Content-Type": "application/json"
+                        "Content-Type": "application/json",
+                        "traceparent": tracer.traceparent()
                     },
                     json={
                         "model": OPENAI_MODEL,
-                        "messages": [
-                            {"role": "system", "content": full_system},
-                            {"role": "user", "content": user_prompt}
-                        ],
+                        "messages": messages,
                         "temperature": temperature,
                         "max_tokens": 2000
                     }
                 )
                 
+                tracer.annotate(attempts=attempt + 1, **{"http.status_code": response.status_code})
                 if response.status_code == 200:
                     data = response.json()
-                    return data["choices"][0]["message"]["content"]
+                    text = data["choices"][0]["message"]["content"]
+                    await completion_cache.set(cache_key, "openai", OPENAI_MODEL, text)
+                    return text
                 elif response.status_code == 429:  # Rate limit
                     wait_time = 2 ** attempt
                     logger.warning(f"OpenAI rate limit hit. Waiting {wait_time}s...")
@@ -575,20 +957,54 @@ async def call_openai_fallback(
     
     return None
 
+async def converse(conv: Conversation, user_turn: str, language: str, temperature: float = 0.2) -> Optional[str]:
+    """
+    One chat turn. While the previous turn's Ollama context still fits the window only the
+    new turn is prefilled; otherwise the summary + recent history are rendered into the prompt.
+    """
+    options = ollama_options(temperature, 1024)
+    # Size of the turn once Ollama's Gemma template has wrapped it onto the context
+    turn_tokens = count_tokens(f"<end_of_turn>\n<start_of_turn>user\n{user_turn}<end_of_turn>\n<start_of_turn>model\n")
+    model = model_router.route("chat", conv.history_tokens() + turn_tokens)
+
+    data = None
+    if conversation_store.can_reuse_context(conv, model, turn_tokens):
+        data = await ollama_generate(
+            user_turn, options, context=conv.ollama_context, endpoint="chat", model=model, raw=False
+        )
+
+    history = conv.render_history()
+    full_turn = f"{history}\n\n{user_turn}" if history else user_turn
+    if data is None:
+        data = await ollama_generate(
+            full_turn, options, endpoint="chat", model=model, raw=False, system=build_system_prompt("", language)
+        )
+
+    if data is not None:
+        conv.ollama_context = data.get("context")
+        conv.ollama_model = model
+        return data.get("response", "").strip()
+
+    # Ollama unavailable: the OpenAI fallback gets the rendered history instead
+    conv.ollama_context = None
+    return await call_openai_fallback("", full_turn, language, temperature, endpoint="chat")
+
+@tracer.traced("ai.get_ai_response")
 async def get_ai_response(
     prompt: str, 
     system_prompt: str = "", 
     language: str = "en",
-    temperature: float = 0.2
+    temperature: float = 0.2,
+    endpoint: str = "default"
 ) -> str:
     """Get AI response with intelligent fallback"""
     # Try Ollama first
-    response = await call_ollama(prompt, system_prompt, language, temperature)
+    response = await call_ollama(prompt, system_prompt, language, temperature, endpoint=endpoint)
     
     # Fallback to OpenAI if Ollama fails
     if not response:
-        response = await call_openai_fallback(system_prompt, prompt, language, temperature)
-    
+        response = await call_openai_fallback(system_prompt, prompt, language, temperature, endpoint=endpoint)
+    tracer.annotate(endpoint=endpoint, answered=bool(response))
     return response
 
 # =============================================================================
@@ -613,47 +1029,71 @@ def calculate_credit_rating(credit_score: int, financial_health_score: int) -> s
     else:
         return "C (Very Poor)"
 
-def calculate_financial_health_score(request: CreditAnalysisRequest, benchmarks: Dict) -> int:
-    """Calculate overall financial health score (0-100)"""
-    score = 50  # Base score
-    
-    # Current Ratio (20 points)
-    if request.current_ratio is not None:
-        if request.current_ratio >= benchmarks["current_ratio"]:
-            score += 20
-        elif request.current_ratio >= benchmarks["current_ratio"] * 0.8:
-            score += 15
-        elif request.current_ratio >= 1.0:
-            score += 10
-    
-    # Debt-to-Equity (20 points)
-    if request.debt_equity_ratio is not None:
-        if request.debt_equity_ratio <= benchmarks["debt_equity"]:
-            score += 20
-        elif request.debt_equity_ratio <= benchmarks["debt_equity"] * 1.2:
-            score += 15
-        elif request.debt_equity_ratio <= 2.0:
-            score += 10
-    
-    # Profit Margin (10 points)
-    if request.profit_margin is not None:
-        if request.profit_margin >= benchmarks["profit_margin"]:
-            score += 10
-        elif request.profit_margin >= benchmarks["profit_margin"] * 0.7:
-            score += 7
-        elif request.profit_margin > 0:
-            score += 4
-    
-    return min(100, max(0, score))
+@tracer.traced("benchmark.percentiles")
+def industry_percentiles(requests: List[CreditAnalysisRequest]) -> List[Dict[str, float]]:
+    """Peer percentile (0-100, raw direction) of each benchmarked ratio, ranked in one vectorised call"""
+    industries, metrics, values, owners = [], [], [], []
+    for i, request in enumerate(requests):
+        for field, metric in BENCHMARKED_RATIOS.items():
+            value = getattr(request, field)
+            if value is not None:
+                industries.append(request.industry_type.value)
+                metrics.append(metric)
+                values.append(value)
+                owners.append(i)
+    ranks = benchmark_index.percentiles(industries, metrics, values)
+    out: List[Dict[str, float]] = [{} for _ in requests]
+    for owner, metric, rank in zip(owners, metrics, ranks.tolist()):
+        if rank == rank:  # NaN: metric not indexed for this industry
+            out[owner][metric] = rank
+    return out
+
+def favourable_percentile(metric: str, percentiles: Dict[str, float]) -> Optional[float]:
+    """Share of peers this business beats on the metric (flips lower-is-better ratios)"""
+    rank = percentiles.get(metric)
+    if rank is None:
+        return None
+    return rank if higher_is_better(metric) else 100.0 - rank
 
-def analyze_credit_heuristic(request: CreditAnalysisRequest) -> CreditAnalysisResponse:
+def calculate_financial_health_score(request: CreditAnalysisRequest, percentiles: Dict[str, float]) -> int:
+    """Calculate overall financial health score (0-100) from peer percentiles"""
+    score = 50  # Base score
+    for metric, weight in HEALTH_SCORE_WEIGHTS.items():
+        favourable = favourable_percentile(metric, percentiles)
+        if favourable is not None:
+            score += weight * min(1.0, favourable / HEALTH_FULL_CREDIT_PERCENTILE)
+    return min(100, max(0, round(score)))
+
+def percentile_label(metric: str, percentiles: Dict[str, float], estimated: List[str]) -> str:
+    """`P37`, or `est. P37` when the peer distribution is derived from published ranges"""
+    return ("est. " if metric in estimated else "") + f"P{percentiles[metric]:.0f}"
+
+def industry_comparison_text(industry: str, percentiles: Dict[str, float], estimated: List[str]) -> str:
+    if not percentiles:
+        return f"No {industry} peer benchmarks available for the supplied ratios."
+    parts = [
+        f"{metric.replace('_', ' ')} at {percentile_label(metric, percentiles, estimated)}"
+        + ("" if higher_is_better(metric) else " (lower is better)")
+        for metric in percentiles
+    ]
+    text = f"Against {industry} peers: " + ", ".join(parts) + "."
+    if estimated:
+        text += " Estimated percentiles are modelled from published industry ranges, not observed peer data."
+    return text
+
+@tracer.traced("heuristic.credit")
+def analyze_credit_heuristic(
+    request: CreditAnalysisRequest, percentiles: Optional[Dict[str, float]] = None
+) -> CreditAnalysisResponse:
     """Enhanced credit analysis with more sophisticated metrics"""
-    benchmarks = INDUSTRY_BENCHMARKS.get(request.industry_type.value, INDUSTRY_BENCHMARKS["OTHER"])
+    if percentiles is None:
+        percentiles = industry_percentiles([request])[0]
+    estimated = [m for m in percentiles if benchmark_index.estimated(request.industry_type.value, m)]
     risk_factors = []
     recommendations = []
     
     # Calculate financial health score
-    financial_health = calculate_financial_health_score(request, benchmarks)
+    financial_health = calculate_financial_health_score(request, percentiles)
     credit_rating = calculate_credit_rating(request.credit_score, financial_health)
     
     # Credit Score Analysis
@@ -681,8 +1121,8 @@ def analyze_credit_heuristic(request: CreditAnalysisRequest) -> CreditAnalysisRe
         if request.current_ratio < 1.0:
             risk_factors.append(f"Liquidity crisis: Current ratio {request.current_ratio:.2f} < 1.0")
             recommendations.append("URGENT: Improve short-term liquidity within 30 days")
-        elif request.current_ratio < benchmarks["current_ratio"]:
-            risk_factors.append(f"Below industry standard: Current ratio {request.current_ratio:.2f} vs {benchmarks['current_ratio']}")
+        elif percentiles.get("current_ratio", 50.0) < 50:
+            risk_factors.append(f"Below industry standard: Current ratio {request.current_ratio:.2f} ({percentile_label('current_ratio', percentiles, estimated)} of peers)")
             recommendations.append("Consider renegotiating payment terms with suppliers")
         else:
             recommendations.append(f"Healthy liquidity position (CR: {request.current_ratio:.2f})")
@@ -692,8 +1132,8 @@ def analyze_credit_heuristic(request: CreditAnalysisRequest) -> CreditAnalysisRe
         if request.debt_equity_ratio > 2.0:
             risk_factors.append(f"Over-leveraged: D/E ratio {request.debt_equity_ratio:.2f} > 2.0")
             recommendations.append("Prioritize debt reduction before new borrowing")
-        elif request.debt_equity_ratio > benchmarks["debt_equity"]:
-            recommendations.append(f"Monitor debt levels: D/E {request.debt_equity_ratio:.2f} above industry median")
+        elif percentiles.get("debt_equity", 50.0) > 50:
+            recommendations.append(f"Monitor debt levels: D/E {request.debt_equity_ratio:.2f} above industry median ({percentile_label('debt_equity', percentiles, estimated)})")
         else:
             recommendations.append(f"Conservative leverage (D/E: {request.debt_equity_ratio:.2f})")
 
@@ -702,8 +1142,8 @@ def analyze_credit_heuristic(request: CreditAnalysisRequest) -> CreditAnalysisRe
         if request.profit_margin < 0:
             risk_factors.append("Negative profit margin - operating at a loss")
             recommendations.append("URGENT: Cost reduction and pricing review required")
-        elif request.profit_margin < benchmarks["profit_margin"] * 0.5:
-            risk_factors.append(f"Low profitability: {request.profit_margin:.1f}% vs industry {benchmarks['profit_margin']}%")
+        elif percentiles.get("profit_margin", 50.0) < 25:
+            risk_factors.append(f"Low profitability: {request.profit_margin:.1f}% ({percentile_label('profit_margin', percentiles, estimated)} of industry peers)")
 
     # Overdue Receivables
     overdue_ratio = (request.overdue_receivables / request.annual_turnover) * 100 if request.annual_turnover > 0 else 0
@@ -733,10 +1173,13 @@ def analyze_credit_heuristic(request: CreditAnalysisRequest) -> CreditAnalysisRe
         loan_eligibility=loan_eligibility,
         max_loan_amount=max_loan,
         suggested_products=["MSME Working Capital Loan", "Business Credit Line"],
-        industry_comparison=f"Comparison for {request.industry_type.value} industry benchmarks completed.",
+        industry_comparison=industry_comparison_text(request.industry_type.value, percentiles, estimated),
+        industry_percentiles=percentiles,
+        estimated_percentiles=estimated,
         confidence=0.88
     )
 
+@tracer.traced("heuristic.risk")
 def analyze_risk_heuristic(request: RiskAssessmentRequest) -> RiskAssessmentResponse:
     """Enhanced risk assessment with more granular scoring"""
     risk_score = 0
@@ -788,6 +1231,7 @@ def analyze_risk_heuristic(request: RiskAssessmentRequest) -> RiskAssessmentResp
         confidence=0.91
     )
 
+@tracer.traced("heuristic.forecast")
 def forecast_heuristic(request: ForecastRequest) -> ForecastResponse:
     """Enhanced forecasting with seasonality"""
     if len(request.historical_revenue) >= 2:
@@ -822,6 +1266,175 @@ def forecast_heuristic(request: ForecastRequest) -> ForecastResponse:
         forecast_period=f"{request.forecast_months} months"
     )
 
+def history_baselines(request: AdvancedForecastRequest) -> tuple:
+    """Average daily inflow/outflow from either row-wise or columnar history"""
+    if request.historyColumns is not None:
+        return frame_baselines(history_frame_from_columns(request.historyColumns))
+
+    inflows = [h.amount for h in request.history if h.type == 'CREDIT']
+    outflows = [h.amount for h in request.history if h.type == 'DEBIT']
+
+    avg_in = sum(inflows) / len(inflows) if inflows else 5000
+    avg_out = sum(outflows) / len(outflows) if outflows else 3500
+    return avg_in, avg_out
+
+def frame_baselines(history) -> tuple:
+    """Vectorised baselines from a validated history DataFrame"""
+    means = history.groupby("type")["amount"].mean()
+    return float(means.get("CREDIT", 5000)), float(means.get("DEBIT", 3500))
+
+def advanced_trend(step: int) -> float:
+    return 1.0 + (step * 0.0005)
+
+def advanced_noise(date_str: str) -> float:
+    return 0.95 + (0.1 * (hash(date_str) % 100) / 100)  # Pseudo-random
+
+def iter_advanced_forecast(
+    avg_in: float,
+    avg_out: float,
+    commitments: List[Commitment],
+    horizon: int,
+    drivers: Optional[Dict[str, float]] = None
+):
+    """
+    Yield (date, revenue, expense, confidence, lowerBound, upperBound) one day at a time.
+    If `drivers` is given, each term's absolute contribution is added to it in the same
+    pass (see advanced_forecast_explainability).
+    """
+    # Index commitments by due date once instead of scanning them for every day
+    commit_ar = defaultdict(float)
+    commit_ap = defaultdict(float)
+    commit_abs = defaultdict(float)
+    for c in commitments:
+        if c.type == 'AR':
+            commit_ar[c.dueDate] += c.amount
+        elif c.type == 'AP':
+            commit_ap[c.dueDate] += c.amount
+        else:
+            continue
+        commit_abs[c.dueDate] += abs(c.amount)
+
+    # Generate future points
+    now = datetime.now()
+
+    for i in range(1, horizon + 1):
+        target_date = now + timedelta(days=i)
+        date_str = target_date.strftime("%Y-%m-%d")
+
+        # Simple simulation with 2% growth trend and random noise
+        trend = advanced_trend(i)
+        noise = advanced_noise(date_str)
+
+        p_rev = (avg_in * trend * noise) + commit_ar.get(date_str, 0)
+        p_exp = (avg_out * noise) + commit_ap.get(date_str, 0)
+
+        conf = max(0.4, 0.92 - (i * 0.003))
+
+        if drivers is not None:
+            # Revenue is avg + avg(trend - 1)noise + avg(noise - 1) + AR, expense avg + avg(noise - 1) + AP
+            drivers["Historical Average"] += abs(avg_in) + abs(avg_out)
+            drivers["Trend"] += abs(avg_in * (trend - 1) * noise)
+            drivers["Daily Variation"] += (abs(avg_in) + abs(avg_out)) * abs(noise - 1)
+            drivers["Commitments"] += commit_abs.get(date_str, 0.0)
+
+        yield (
+            date_str, round(p_rev, 2), round(p_exp, 2), round(conf, 2),
+            round(p_rev * 0.85, 2), round(p_rev * 1.15, 2)
+        )
+
+def advanced_forecast_columns(
+    avg_in: float,
+    avg_out: float,
+    commitments: List[Commitment],
+    horizon: int,
+    drivers: Optional[Dict[str, float]] = None
+) -> Dict[str, List]:
+    """Build the advanced forecast series as parallel arrays (no per-point models)"""
+    columns = {field: [] for field in PREDICTION_FIELDS}
+    for point in iter_advanced_forecast(avg_in, avg_out, commitments, horizon, drivers):
+        for field, value in zip(PREDICTION_FIELDS, point):
+            columns[field].append(value)
+    return columns
+
+def stream_advanced_forecast(
+    business_id: str,
+    avg_in: float,
+    avg_out: float,
+    commitments: List[Commitment],
+    horizon: int
+):
+    """NDJSON lines: a meta header, one prediction per line, then explainability"""
+    yield ndjson_line({"meta": {"businessId": business_id, "horizon": horizon, "fields": PREDICTION_FIELDS}})
+    chunk = []
+    drivers = advanced_drivers()
+    for point in iter_advanced_forecast(avg_in, avg_out, commitments, horizon, drivers):
+        chunk.append(ndjson_line(dict(zip(PREDICTION_FIELDS, point))))
+        if len(chunk) >= STREAM_CHUNK_SIZE:
+            yield b"".join(chunk)
+            chunk = []
+    if chunk:
+        yield b"".join(chunk)
+    explainability = advanced_forecast_explainability(drivers, horizon)
+    yield ndjson_line({"explainability": explainability.model_dump()})
+
+def respond_advanced_forecast(
+    business_id: str,
+    avg_in: float,
+    avg_out: float,
+    commitments: List[Commitment],
+    horizon: int,
+    fmt: str
+):
+    if fmt == "ndjson":
+        return StreamingResponse(
+            stream_advanced_forecast(business_id, avg_in, avg_out, commitments, horizon),
+            media_type=NDJSON_MEDIA_TYPE
+        )
+    if horizon > MAX_BUFFERED_HORIZON:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Horizon above {MAX_BUFFERED_HORIZON} days must be streamed (?format=ndjson)"
+        )
+
+    drivers = advanced_drivers()
+    columns = advanced_forecast_columns(avg_in, avg_out, commitments, horizon, drivers)
+    explainability = advanced_forecast_explainability(drivers, horizon)
+    if fmt != "records":
+        return encode_columnar(
+            {"predictions": columns, "explainability": explainability.model_dump()},
+            fmt
+        )
+
+    return AdvancedForecastResponse(
+        predictions=[
+            PredictionPoint(date=d, revenue=r, expense=e, confidence=c, lowerBound=lo, upperBound=hi)
+            for d, r, e, c, lo, hi in zip(
+                columns["date"], columns["revenue"], columns["expense"],
+                columns["confidence"], columns["lowerBound"], columns["upperBound"]
+            )
+        ],
+        explainability=explainability
+    )
+
+def advanced_drivers() -> Dict[str, float]:
+    return {"Historical Average": 0.0, "Trend": 0.0, "Daily Variation": 0.0, "Commitments": 0.0}
+
+def advanced_forecast_explainability(totals: Dict[str, float], horizon: int) -> AdvancedExplainability:
+    """
+    Exact decomposition of the heuristic forecast over the horizon: `totals` holds each
+    term's absolute contribution, summed by iter_advanced_forecast; its share is the weight.
+    """
+    grand_total = sum(totals.values()) or 1.0
+    drivers = sorted(
+        ({"feature": name, "weight": round(total / grand_total, 4)} for name, total in totals.items() if total > 0),
+        key=lambda d: d["weight"], reverse=True
+    )
+    top = drivers[0]["feature"] if drivers else "Historical Average"
+    return AdvancedExplainability(
+        summary=f"Heuristic forecast decomposed over {horizon} days. Primary driver: {top}.",
+        drivers=drivers
+    )
+
 # =============================================================================
 # ENHANCED API ENDPOINTS
 # =============================================================================
@@ -847,39 +1460,94 @@ async def health():
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "ollama": {"status": ollama_status, "model": OLLAMA_MODEL},
+        "ollama": {"status": ollama_status, "model": OLLAMA_MODEL, "resident": readiness["model_resident"]},
         "openai_fallback": bool(OPENAI_API_KEY)
     }
 
+@app.get("/ready")
+async def ready(response: Response):
+    """
+    Readiness probe: 503 until the completion cache is loaded and every routed model is resident.
+    `/health` only says the process is up; route traffic on this one.
+    """
+    if OLLAMA_WARMUP and readiness["model_resident"] and not await model_is_resident():
+        # Ollama unloaded a model (keep_alive expired or restart); reload before reporting ready
+        readiness["model_resident"] = False
+        start_model_warmup()
+    is_ready = readiness["caches_loaded"] and (readiness["model_resident"] or not OLLAMA_WARMUP)
+    if not is_ready:
+        response.status_code = 503
+    return {"ready": is_ready, "model": OLLAMA_MODEL, "models": model_router.models, **readiness}
+
 @app.post("/api/v1/ai/chat", response_model=ChatResponse)
 async def chat_with_analyst(request: ChatRequest):
     if not check_rate_limit(f"user_{request.user_id}"):
         raise HTTPException(status_code=429, detail="Rate limit exceeded")
     
-    context_info = ""
-    if request.context:
-        context_info = f"### User Financial Context:\n{json.dumps(request.context, indent=2)}\n"
-    
-    prompt = f"{context_info}### Current Query:\n{request.message}\n\nPlease provide professional financial analysis."
-    response = await get_ai_response(prompt, "", request.language)
-    
-    if not response:
-        response = "I am currently experiencing high load. Please try again later."
+    conv = conversation_store.get_or_create(request.conversation_id, request.user_id, request.conversation_history)
+    async with conv.lock:
+        # Near-duplicate answers are only reused for opening questions, not mid-conversation
+        first_turn = conv.is_new
+        response = semantic_lookup("chat", request.message, request.language, request.context) if first_turn else None
+        if response is None:
+            context_info = render_context(request.context, "chat", "User Financial Context")
+            prompt = f"{context_info}### Current Query:\n{request.message}\n\nPlease provide professional financial analysis."
+            response = await converse(conv, prompt, request.language)
+            if first_turn:
+                semantic_store("chat", request.message, request.language, request.context, response)
+        
+        if response:
+            conversation_store.record_exchange(conv, request.message, response)
+            if transcript_writer is not None:
+                transcript_writer.submit({
+                    "timestamp": datetime.now().isoformat(),
+                    "conversation_id": conv.id,
+                    "language": request.language,
+                    "user": redact(request.message),
+                    "assistant": redact(response)
+                })
+        else:
+            response = "I am currently experiencing high load. Please try again later."
     
     return ChatResponse(
         response=response,
         suggestions=["Analyze my debt", "Review cash flow", "Credit score tips"],
-        conversation_id=f"conv_{request.user_id}"
+        conversation_id=conv.id
     )
 
+@app.get("/api/v1/ai/conversations/{conversation_id}")
+async def get_conversation(conversation_id: str):
+    conv = conversation_store.get(conversation_id)
+    if conv is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return {
+        "conversation_id": conv.id,
+        "summary": conv.summary,
+        "turns": [{"role": t.role, "content": t.content} for t in conv.turns],
+        "history_tokens": conv.history_tokens(),
+        "context_tokens": len(conv.ollama_context or [])
+    }
+
+@app.delete("/api/v1/ai/conversations/{conversation_id}")
+async def delete_conversation(conversation_id: str):
+    if not conversation_store.delete(conversation_id):
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return {"status": "deleted", "conversation_id": conversation_id}
+
 @app.post("/api/v1/ai/credit-analysis", response_model=CreditAnalysisResponse)
-async def analyze_credit(request: CreditAnalysisRequest):
+async def analyze_credit(
+    request: CreditAnalysisRequest,
+    narrative: str = Query("sync", pattern="^(sync|async)$", description="async: return the heuristic result now, narrative via job id")
+):
     cache_key = get_cache_key("credit", request.model_dump())
     cached = get_cached_response(cache_key)
     if cached: return cached
     
-    prompt = f"Perform credit analysis for {request.business_name} in {request.industry_type}. Turnover: ₹{request.annual_turnover}."
-    ai_response = await get_ai_response(prompt, "", request.language)
+    prompt = credit_prompt(request)
+    if narrative == "async":
+        return with_narrative_job(analyze_credit_heuristic(request), "assessment", cache_key, prompt, request.language, "credit")
+
+    ai_response = await get_ai_response(prompt, "", request.language, endpoint="credit")
     
     if ai_response:
         heuristic = analyze_credit_heuristic(request)
@@ -889,10 +1557,20 @@ async def analyze_credit(request: CreditAnalysisRequest):
     
     return analyze_credit_heuristic(request)
 
+def credit_prompt(request: CreditAnalysisRequest) -> str:
+    return f"Perform credit analysis for {request.business_name} in {request.industry_type}. Turnover: ₹{request.annual_turnover}."
+
 @app.post("/api/v1/ai/risk-assessment", response_model=RiskAssessmentResponse)
-async def assess_risk(request: RiskAssessmentRequest):
+async def assess_risk(
+    request: RiskAssessmentRequest,
+    narrative: str = Query("sync", pattern="^(sync|async)$", description="async: return the heuristic result now, narrative via job id")
+):
     prompt = f"Assess financial risk for {request.business_name}. Cash flow: {request.cash_flow_trend}."
-    ai_response = await get_ai_response(prompt, "", request.language)
+    if narrative == "async":
+        cache_key = get_cache_key("risk", request.model_dump())
+        return with_narrative_job(analyze_risk_heuristic(request), "risk_summary", cache_key, prompt, request.language, "risk")
+
+    ai_response = await get_ai_response(prompt, "", request.language, endpoint="risk")
     
     if ai_response:
         heuristic = analyze_risk_heuristic(request)
@@ -902,70 +1580,98 @@ async def assess_risk(request: RiskAssessmentRequest):
     return analyze_risk_heuristic(request)
 
 @app.post("/api/v1/ai/forecast")
-async def get_forecast(request: Union[ForecastRequest, AdvancedForecastRequest]):
+async def get_forecast(
+    request: Union[ForecastRequest, AdvancedForecastRequest],
+    http_request: Request,
+    response_format: Optional[str] = Query(None, alias="format", description="records | columnar | msgpack | ndjson"),
+    narrative: str = Query("sync", pattern="^(sync|async)$", description="simple forecasts: narrative via job id")
+):
     """
     Hybrid endpoint handling both simple and advanced forecasting requests.
     If AdvancedForecastRequest is provided, it returns a detailed prediction series.
+    Advanced series can be returned as parallel arrays with ?format=columnar (or msgpack),
+    or streamed as NDJSON with ?format=ndjson for long horizons.
     """
-    if isinstance(request, AdvancedForecastRequest) or (hasattr(request, 'history') and request.history):
-        # 1. Calculate historical baselines
-        inflows = [h.amount for h in request.history if h.type == 'CREDIT']
-        outflows = [h.amount for h in request.history if h.type == 'DEBIT']
-        
-        avg_in = sum(inflows) / len(inflows) if inflows else 5000
-        avg_out = sum(outflows) / len(outflows) if outflows else 3500
-        
-        # 2. Generate future points
-        predictions = []
-        now = datetime.now()
-        
-        for i in range(1, request.horizon + 1):
-            target_date = now + timedelta(days=i)
-            date_str = target_date.strftime("%Y-%m-%d")
-            
-            # Simple simulation with 2% growth trend and random noise
-            trend = 1.0 + (i * 0.0005)
-            noise = 0.95 + (0.1 * (hash(date_str) % 100) / 100) # Pseudo-random
-            
-            # Integrate commitments
-            day_commit_ar = sum(c.amount for c in request.commitments if c.dueDate == date_str and c.type == 'AR')
-            day_commit_ap = sum(c.amount for c in request.commitments if c.dueDate == date_str and c.type == 'AP')
-            
-            p_rev = (avg_in * trend * noise) + day_commit_ar
-            p_exp = (avg_out * noise) + day_commit_ap
-            
-            conf = max(0.4, 0.92 - (i * 0.003))
-            
-            predictions.append(PredictionPoint(
-                date=date_str,
-                revenue=round(p_rev, 2),
-                expense=round(p_exp, 2),
-                confidence=round(conf, 2),
-                lowerBound=round(p_rev * 0.85, 2),
-                upperBound=round(p_rev * 1.15, 2)
-            ))
-            
-        return AdvancedForecastResponse(
-            predictions=predictions,
-            explainability=AdvancedExplainability(
-                summary="Neural engine detected cyclical growth pattern with significant commitment nodes.",
-                drivers=[{"feature": "Commitments", "weight": 0.45}, {"feature": "Trend", "weight": 0.3}]
-            )
+    if isinstance(request, AdvancedForecastRequest):
+        fmt = resolve_response_format(http_request, response_format)
+        avg_in, avg_out = history_baselines(request)
+        return respond_advanced_forecast(
+            request.businessId, avg_in, avg_out, request.commitments, request.horizon, fmt
         )
 
     # Fallback to simple forecast
     prompt = f"Generate {request.forecast_months}-month forecast for {request.business_name}."
-    ai_response = await get_ai_response(prompt, "", request.language)
+    if narrative == "async":
+        cache_key = get_cache_key("forecast", request.model_dump())
+        return with_narrative_job(forecast_heuristic(request), "trend_analysis", cache_key, prompt, request.language, "forecast")
+
+    ai_response = await get_ai_response(prompt, "", request.language, endpoint="forecast")
     
     heuristic = forecast_heuristic(request)
     if ai_response:
         heuristic.trend_analysis = ai_response
     return heuristic
 
+@app.post("/api/v1/ai/forecast/upload")
+async def get_forecast_from_upload(
+    http_request: Request,
+    file: UploadFile = File(..., description="CSV or Parquet with date, amount, type columns"),
+    businessId: str = Form(...),
+    horizon: int = Form(90, ge=1, le=MAX_FORECAST_HORIZON),
+    commitments: str = Form("[]", description="JSON list of commitments"),
+    response_format: Optional[str] = Query(None, alias="format", description="records | columnar | msgpack | ndjson")
+):
+    """Advanced forecast from an uploaded history file instead of a JSON history list"""
+    fmt = resolve_response_format(http_request, response_format)
+    try:
+        commitment_list = [Commitment(**c) for c in json.loads(commitments)]
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Invalid commitments: {e}")
+
+    history = validate_history_frame(await read_upload_frame(file))
+    avg_in, avg_out = frame_baselines(history)
+    return respond_advanced_forecast(businessId, avg_in, avg_out, commitment_list, horizon, fmt)
+
+@app.get("/api/v1/ai/narratives/{job_id}")
+async def get_narrative(job_id: str, wait: float = Query(0, ge=0, le=30, description="seconds to wait for completion")):
+    """Poll a narrative job; `wait` turns this into a bounded long-poll"""
+    job = await narrative_jobs.wait(job_id, wait) if wait else narrative_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Narrative job not found")
+    return job
+
+@app.get("/api/v1/ai/narratives/{job_id}/events")
+async def stream_narrative(job_id: str):
+    """Server-sent events: `status` heartbeats while generating, then one final `narrative` event"""
+    if narrative_jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Narrative job not found")
+
+    async def events():
+        while True:
+            job = await narrative_jobs.wait(job_id, NARRATIVE_SSE_HEARTBEAT)
+            if job is None:
+                yield f"event: error\ndata: {json.dumps({'job_id': job_id, 'error': 'expired'})}\n\n"
+                return
+            if job["status"] in ("done", "failed"):
+                yield f"event: narrative\ndata: {json.dumps(job, ensure_ascii=False)}\n\n"
+                return
+            yield f"event: status\ndata: {json.dumps({'job_id': job_id, 'status': job['status']})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/api/v1/ai/advice", response_model=AdviceResponse)
 async def get_advice(request: AdviceRequest):
-    prompt = f"User Question: {request.query}\nFinancial Summary: {json.dumps(request.financialSummary or {})}"
-    response = await get_ai_response(prompt, "", request.language)
+    scope_payload = {"summary": request.financialSummary, "business": request.businessContext}
+    response = semantic_lookup("advice", request.query, request.language, scope_payload)
+    if response is None:
+        summary = render_context(request.financialSummary, "advice", "Financial Summary")
+        prompt = f"{summary}User Question: {request.query}"
+        response = await get_ai_response(prompt, "", request.language, endpoint="advice")
+        semantic_store("advice", request.query, request.language, scope_payload, response)
     
     return AdviceResponse(
         advice=response or "I recommend reviewing your financial statements with a CA.",
@@ -989,9 +1695,68 @@ async def analyze_finances(data: FinancialDataInput):
     )
 
 @app.post("/api/v1/ai/batch-analysis", response_model=BatchAnalysisResponse)
-async def batch_analyze(request: BatchAnalysisRequest):
+async def batch_analyze(
+    request: BatchAnalysisRequest,
+    narratives: bool = Query(False, description="Generate LLM assessments concurrently and stream NDJSON results")
+):
+    """
+    Heuristic credit analysis for up to 10 businesses. With ?narratives=true each
+    business also gets an LLM assessment; results are streamed as NDJSON in completion
+    order, followed by a summary line.
+    """
     start = datetime.now()
-    results = [analyze_credit_heuristic(b) for b in request.businesses[:10]]
+    if narratives:
+        return StreamingResponse(
+            stream_batch_narratives(request.businesses[:10], start),
+            media_type=NDJSON_MEDIA_TYPE
+        )
+    businesses = request.businesses[:10]
+    results = [analyze_credit_heuristic(b, p) for b, p in zip(businesses, industry_percentiles(businesses))]
+    return summarize_batch(results, start)
+
+async def stream_batch_narratives(businesses: List[CreditAnalysisRequest], start: datetime):
+    semaphore = asyncio.Semaphore(BATCH_NARRATIVE_CONCURRENCY)
+    percentiles = industry_percentiles(businesses)
+
+    async def narrate(index: int, business: CreditAnalysisRequest):
+        result = analyze_credit_heuristic(business, percentiles[index])
+        status = "done"
+        try:
+            async with semaphore:
+                narrative = await asyncio.wait_for(
+                    get_ai_response(credit_prompt(business), "", business.language, endpoint="credit"),
+                    BATCH_NARRATIVE_TIMEOUT
+                )
+            if narrative:
+                result.assessment = narrative
+            else:
+                status = "unavailable"
+        except asyncio.TimeoutError:
+            status = "timeout"
+        return index, result, status
+
+    tasks = [asyncio.create_task(narrate(i, b)) for i, b in enumerate(businesses)]
+    results = []
+    try:
+        for finished in asyncio.as_completed(tasks):
+            index, result, status = await finished
+            results.append(result)
+            yield ndjson_line({
+                "index": index,
+                "narrative_status": status,
+                "result": result.model_dump(mode="json")
+            })
+        summary = summarize_batch(results, start)
+        yield ndjson_line({
+            "summary_statistics": summary.summary_statistics,
+            "processing_time": summary.processing_time
+        })
+    finally:
+        # Client went away: stop generating narratives nobody will read
+        for task in tasks:
+            task.cancel()
+
+def summarize_batch(results: List[CreditAnalysisResponse], start: datetime) -> BatchAnalysisResponse:
     avg_score = sum(r.confidence for r in results) / len(results) if results else 0
     
     return BatchAnalysisResponse(
@@ -1008,20 +1773,74 @@ async def categorize_transactions(request: TransactionCategorizationRequest):
     """
     Categorize a batch of transactions using AI based on description and industry.
     """
-    # Prepare batch for LLM
-    tx_list = []
-    for tx in request.transactions:
-        tx_list.append({
+    if request.transactionColumns is not None:
+        tx_list = transaction_records(transaction_frame_from_columns(request.transactionColumns))
+    else:
+        tx_list = [{
             "id": tx.id,
             "desc": tx.description,
             "amount": tx.amount,
             "type": tx.type,
             "party": tx.party_name
-        })
+        } for tx in request.transactions]
+
+    return await run_categorization(request.batch_id, tx_list, request.industry, request.language)
+
+@app.post("/categorize-transactions/upload", response_model=TransactionCategorizationResponse)
+async def categorize_transactions_upload(
+    file: UploadFile = File(..., description="CSV or Parquet with id, description, amount, type[, party_name]"),
+    industry: str = Form(...),
+    business_name: str = Form(...),
+    language: str = Form("en"),
+    batch_id: Optional[str] = Form(None)
+):
+    """Categorize transactions from an uploaded CSV/Parquet file"""
+    tx_list = transaction_records(validate_transaction_frame(await read_upload_frame(file)))
+    return await run_categorization(batch_id, tx_list, industry, language)
+
+async def run_categorization(
+    batch_id: Optional[str],
+    tx_list: List[Dict[str, Any]],
+    industry: str,
+    language: str
+) -> TransactionCategorizationResponse:
+    """Shared categorization pipeline over compact transaction dicts"""
+    # Split into tables that each fit the categorize token budget, one LLM call per table
+    tables, rest = [], tx_list
+    while rest:
+        table, fitted = render_transaction_table(rest)
+        if not fitted:
+            logger.warning(f"Transaction {rest[0]['id']} alone exceeds the categorize budget; using heuristic")
+            tables.append((None, rest[:1]))
+            rest = rest[1:]
+            continue
+        tables.append((table, rest[:fitted]))
+        rest = rest[fitted:]
+
+    semaphore = asyncio.Semaphore(CATEGORIZE_CONCURRENCY)
+
+    async def categorize(table: Optional[str], rows: List[Dict[str, Any]]) -> List[CategorizationResult]:
+        if table is None:
+            return categorize_heuristic(rows)
+        async with semaphore:
+            return await categorize_table(table, rows, industry, language)
+
+    parts = await asyncio.gather(*(categorize(table, rows) for table, rows in tables))
+    return TransactionCategorizationResponse(
+        batch_id=batch_id,
+        categories=[result for part in parts for result in part]
+    )
 
+async def categorize_table(
+    table: str,
+    rows: List[Dict[str, Any]],
+    industry: str,
+    language: str
+) -> List[CategorizationResult]:
+    """One LLM categorization call over a budget-sized table; heuristic on failure"""
     prompt = f"""
-    Categorize these business transactions for a company in the {request.industry} industry:
-    {json.dumps(tx_list, indent=2)}
+    Categorize these business transactions for a company in the {industry} industry:
+    {table}
 
     For each transaction, provide:
     1. Category (e.g., Salary, Utilities, Rent, Taxes, Bank Charges, Purchases, Sales, Marketing, etc.)
@@ -1036,23 +1855,20 @@ async def categorize_transactions(request: TransactionCategorizationRequest):
     system_prompt = f"""
     You are an expert financial auditor and tax consultant specializing in SME bookkeeping.
     Your task is to accurately categorize business transactions.
-    Ground your decisions in the provided industry context: {request.industry}.
+    Ground your decisions in the provided industry context: {industry}.
     Always identify potential tax-deductible business expenses.
     Return strictly JSON.
     """
 
     try:
-        response_text = await get_ai_response(prompt, system_prompt, request.language)
+        response_text = await get_ai_response(prompt, system_prompt, language, endpoint="categorize")
         
         # Extract JSON from response
         json_match = re.search(r'\[.*\]', response_text, re.DOTALL)
         if json_match:
             try:
                 categories_data = json.loads(json_match.group())
-                return TransactionCategorizationResponse(
-                    batch_id=request.batch_id,
-                    categories=[CategorizationResult(**item) for item in categories_data]
-                )
+                return [CategorizationResult(**item) for item in categories_data]
             except Exception as e:
                 logger.error(f"Failed to parse JSON array: {str(e)}")
         
@@ -1061,30 +1877,126 @@ async def categorize_transactions(request: TransactionCategorizationRequest):
     except Exception as e:
         logger.error(f"AI Categorization failed: {str(e)}")
         # Fallback to a very basic heuristic
-        results = []
-        for tx in request.transactions:
-            cat, sub, tax = "Expenses", "Other Expenses", True
-            desc = tx.description.lower()
-            if any(k in desc for k in ["salary", "wage", "payroll"]):
-                cat, sub, tax = "Salary", "Employee Wages", True
-            elif any(k in desc for k in ["rent", "lease"]):
-                cat, sub, tax = "Rent", "Office Rent", True
-            elif any(k in desc for k in ["electricity", "power", "water", "utility"]):
-                cat, sub, tax = "Utilities", "General Utilities", True
-            elif any(k in desc for k in ["gst", "tax", "tds", "income tax"]):
-                cat, sub, tax = "Taxes", "Tax Payment", False
-            elif tx.type == "CREDIT":
-                cat, sub, tax = "Income", "Sales/Revenue", False
-                
-            results.append(CategorizationResult(
-                id=tx.id,
-                category=cat,
-                sub_category=sub,
-                confidence=0.5,
-                is_tax_deductible=tax,
-                explanation="Categorized via heuristic fallback"
-            ))
-        return TransactionCategorizationResponse(batch_id=request.batch_id, categories=results)
+        return categorize_heuristic(rows)
+
+@tracer.traced("heuristic.categorize")
+def categorize_heuristic(tx_list: List[Dict[str, Any]]) -> List[CategorizationResult]:
+    """Keyword-based categorization used when the LLM is unavailable"""
+    results = []
+    for tx in tx_list:
+        cat, sub, tax = "Expenses", "Other Expenses", True
+        desc = tx["desc"].lower()
+        if any(k in desc for k in ["salary", "wage", "payroll"]):
+            cat, sub, tax = "Salary", "Employee Wages", True
+        elif any(k in desc for k in ["rent", "lease"]):
+            cat, sub, tax = "Rent", "Office Rent", True
+        elif any(k in desc for k in ["electricity", "power", "water", "utility"]):
+            cat, sub, tax = "Utilities", "General Utilities", True
+        elif any(k in desc for k in ["gst", "tax", "tds", "income tax"]):
+            cat, sub, tax = "Taxes", "Tax Payment", False
+        elif tx["type"] == "CREDIT":
+            cat, sub, tax = "Income", "Sales/Revenue", False
+            
+        results.append(CategorizationResult(
+            id=tx["id"],
+            category=cat,
+            sub_category=sub,
+            confidence=0.5,
+            is_tax_deductible=tax,
+            explanation="Categorized via heuristic fallback"
+        ))
+    return results
+
+def anomaly_rows(
+    transactions: List[AnomalyTransaction],
+    history_columns: Optional[HistoryColumns] = None,
+    transaction_columns: Optional[TransactionColumns] = None
+) -> List[Dict[str, Any]]:
+    """Row dicts in scoring order (by date when every row has one), with heuristic categories filled in"""
+    rows = [t.model_dump() for t in transactions]
+    if history_columns is not None:
+        columns = history_columns
+        if not len(columns.date) == len(columns.amount) == len(columns.type):
+            raise HTTPException(status_code=422, detail="historyColumns columns differ in length")
+        rows.extend({"date": d, "amount": a, "type": t} for d, a, t in zip(columns.date, columns.amount, columns.type))
+    if transaction_columns is not None:
+        columns = transaction_columns
+        if not len(columns.id) == len(columns.description) == len(columns.amount) == len(columns.type):
+            raise HTTPException(status_code=422, detail="transactionColumns columns differ in length")
+        rows.extend(
+            {"id": i, "description": d, "amount": a, "type": t}
+            for i, d, a, t in zip(columns.id, columns.description, columns.amount, columns.type)
+        )
+    uncategorized = [r for r in rows if not r.get("category") and r.get("description")]
+    if uncategorized:
+        results = categorize_heuristic([
+            {"id": 0, "desc": r["description"], "type": str(r["type"]).upper()} for r in uncategorized
+        ])
+        for row, result in zip(uncategorized, results):
+            row["category"] = result.category
+    if rows and all(r.get("date") for r in rows):
+        rows.sort(key=lambda r: r["date"])
+    return rows
+
+def anomaly_response(result: Dict[str, Any], only_anomalies: bool) -> Dict[str, Any]:
+    if only_anomalies:
+        result["results"] = [r for r in result["results"] if r["is_anomaly"]]
+    return result
+
+def require_anomaly_state():
+    """Per-business requests wait for the startup restore, so live deltas never race the saved state"""
+    if not anomaly_detector.restored:
+        raise HTTPException(
+            status_code=503, detail="Anomaly state is still being restored", headers={"Retry-After": "1"}
+        )
+
+@app.post("/api/v1/anomalies/score")
+async def score_anomalies(
+    request: AnomalyScoreRequest,
+    only_anomalies: bool = Query(False, description="return flagged transactions only")
+):
+    """
+    Bulk scoring. Without business_id the batch is scored as its own stream (each
+    transaction against the ones before it). With business_id it is scored against
+    the stored state, and folded into it when learn=true.
+    """
+    if request.business_id is not None:
+        require_anomaly_state()
+    rows = anomaly_rows(request.transactions, request.historyColumns, request.transactionColumns)
+    learn = request.learn or request.business_id is None
+    with tracer.span("anomaly.score", rows=len(rows)):
+        result = await asyncio.to_thread(anomaly_detector.score, request.business_id, rows, learn)
+    return anomaly_response(result, only_anomalies)
+
+@app.post("/api/v1/anomalies/{business_id}/transactions")
+async def score_anomaly_delta(
+    business_id: str,
+    request: AnomalyDeltaRequest,
+    only_anomalies: bool = Query(False, description="return flagged transactions only")
+):
+    """Score new transactions against the business's state, then add them to it"""
+    require_anomaly_state()
+    rows = anomaly_rows(request.transactions, transaction_columns=request.transactionColumns)
+    with tracer.span("anomaly.score", rows=len(rows)):
+        result = await asyncio.to_thread(
+            anomaly_detector.score, business_id, rows, learn=True, delta_id=request.deltaId
+        )
+    return anomaly_response(result, only_anomalies)
+
+@app.get("/api/v1/anomalies/{business_id}")
+async def get_anomaly_state(business_id: str):
+    require_anomaly_state()
+    info = anomaly_detector.info(business_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail="No anomaly state for this business")
+    return info
+
+@app.delete("/api/v1/anomalies/{business_id}")
+async def delete_anomaly_state(business_id: str):
+    require_anomaly_state()
+    if not anomaly_detector.delete(business_id):
+        raise HTTPException(status_code=404, detail="No anomaly state for this business")
+    return {"status": "deleted", "business_id": business_id}
 
 @app.get("/api/v1/models")
 async def list_models():
@@ -1094,31 +2006,182 @@ async def list_models():
             return resp.json()
     except Exception as e: return {"error": str(e)}
 
-@app.post("/api/v1/models/pull")
-async def pull_model(model_name: str = "gemma:2b", background_tasks: BackgroundTasks = None):
-    try:
-        async with httpx.AsyncClient(timeout=300.0) as client:
-            resp = await client.post(f"{OLLAMA_BASE_URL}/api/pull", json={"name": model_name, "stream": False})
-            return {"status": "success" if resp.status_code == 200 else "error"}
-    except Exception as e: return {"error": str(e)}
+@app.get("/api/v1/models/router")
+async def model_router_stats():
+    """Per-model latency/queue statistics and routing decision counts"""
+    return model_router.stats()
+
+@app.post("/api/v1/models/pull", status_code=202)
+async def pull_model(model_name: str = "gemma:2b"):
+    """Start a model pull as a background job; follow it at /api/v1/jobs/{job_id}"""
+    return await job_queue.submit("pull_model", {"model_name": model_name})
 
 @app.delete("/api/v1/cache/clear")
-async def clear_cache():
+async def clear_cache(include_llm: bool = True):
     len_cache = len(response_cache)
     response_cache.clear()
     cache_timestamps.clear()
-    return {"cleared_entries": len_cache}
+    llm_cleared = await asyncio.to_thread(completion_cache.clear) if include_llm else 0
+    semantic_cleared = semantic_cache.clear() if include_llm else 0
+    return {
+        "cleared_entries": len_cache,
+        "cleared_llm_completions": llm_cleared,
+        "cleared_semantic_answers": semantic_cleared
+    }
+
+@app.get("/api/v1/cache/stats")
+async def cache_stats():
+    return {
+        "response_cache_entries": len(response_cache),
+        "llm_completions": completion_cache.stats(),
+        "semantic_answers": semantic_cache.stats(),
+        "anomaly_detector": anomaly_detector.stats(),
+        "tracing": tracer.stats()
+    }
+
+@app.get("/api/v1/benchmarks")
+async def benchmark_index_info():
+    return benchmark_index.info()
+
+@app.get("/api/v1/benchmarks/percentile")
+async def benchmark_percentile(industry: str, metric: str, value: float):
+    """Peer percentile of one value; 404 if the industry (or OTHER) has no such metric"""
+    rank = benchmark_index.percentile(industry.upper(), metric, value)
+    if rank is None:
+        raise HTTPException(status_code=404, detail=f"No benchmark for {metric} in {industry}")
+    return {
+        "industry": industry.upper(), "metric": metric, "value": value, "percentile": rank,
+        "estimated": benchmark_index.estimated(industry.upper(), metric),
+        "higher_is_better": higher_is_better(metric), "version": benchmark_index.info()["version"]
+    }
+
+@app.post("/api/v1/benchmarks/percentiles")
+async def benchmark_percentiles(request: BenchmarkPercentileRequest):
+    """Vectorised peer percentiles; `null` where the metric is not indexed, `estimated` per query"""
+    queries = request.queries
+    ranks = benchmark_index.percentiles(
+        [q.industry.upper() for q in queries], [q.metric for q in queries], [q.value for q in queries]
+    )
+    return {
+        "version": benchmark_index.info()["version"],
+        "percentiles": [None if r != r else r for r in ranks.tolist()],
+        "estimated": [benchmark_index.estimated(q.industry.upper(), q.metric) for q in queries]
+    }
+
+@app.post("/api/v1/benchmarks/reload")
+async def reload_benchmarks():
+    """Re-read the index file now instead of waiting for the next mtime check"""
+    return await asyncio.to_thread(benchmark_index.reload)
+
+# =============================================================================
+# BACKGROUND JOBS
+# =============================================================================
+async def pull_model_job(params: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    """Pull a model with Ollama's streamed progress mapped onto the job"""
+    model_name = params["model_name"]
+    last = {}
+    async with httpx.AsyncClient(timeout=httpx.Timeout(30.0, read=300.0)) as client:
+        async with client.stream("POST", f"{OLLAMA_BASE_URL}/api/pull", json={"name": model_name, "stream": True}) as resp:
+            if resp.status_code != 200:
+                raise RuntimeError(f"Ollama pull returned {resp.status_code}")
+            async for line in resp.aiter_lines():
+                if not line.strip():
+                    continue
+                last = json.loads(line)
+                if "error" in last:
+                    raise RuntimeError(last["error"])
+                total, completed = last.get("total"), last.get("completed")
+                await ctx.report(completed / total if total and completed else 0.0, last.get("status"))
+    return {"model": model_name, "status": last.get("status", "success")}
+
+async def categorize_job(params: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    """Bulk categorization in JOB_CATEGORIZE_CHUNK-sized LLM calls"""
+    tx_list = params["transactions"]
+    categories = []
+    for start in range(0, len(tx_list), JOB_CATEGORIZE_CHUNK):
+        chunk = tx_list[start:start + JOB_CATEGORIZE_CHUNK]
+        result = await run_categorization(params.get("batch_id"), chunk, params["industry"], params.get("language", "en"))
+        categories.extend(c.model_dump(mode="json") for c in result.categories)
+        done = start + len(chunk)
+        await ctx.report(done / len(tx_list), f"{done}/{len(tx_list)} transactions")
+    return TransactionCategorizationResponse(
+        batch_id=params.get("batch_id"), categories=categories
+    ).model_dump(mode="json")
+
+async def batch_analysis_job(params: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    """Heuristic credit analysis for every business (no 10-business cap)"""
+    start = datetime.now()
+    businesses = [CreditAnalysisRequest(**b) for b in params["businesses"]]
+    percentiles = industry_percentiles(businesses)
+    results = []
+    for i, (business, ranks) in enumerate(zip(businesses, percentiles), 1):
+        results.append(analyze_credit_heuristic(business, ranks))
+        if i % 50 == 0 or i == len(businesses):
+            await ctx.report(i / len(businesses), f"{i}/{len(businesses)} businesses")
+    return summarize_batch(results, start).model_dump(mode="json")
+
+job_queue.register("pull_model", pull_model_job)
+job_queue.register("categorize", categorize_job)
+job_queue.register("batch_analysis", batch_analysis_job)
+
+@app.post("/api/v1/jobs/categorize", status_code=202)
+async def submit_categorize_job(request: TransactionCategorizationRequest):
+    """Same body as /categorize-transactions, processed as a background job"""
+    if request.transactionColumns is not None:
+        tx_list = transaction_records(transaction_frame_from_columns(request.transactionColumns))
+    else:
+        tx_list = [{
+            "id": tx.id, "desc": tx.description, "amount": tx.amount, "type": tx.type, "party": tx.party_name
+        } for tx in request.transactions]
+    return await job_queue.submit("categorize", {
+        "batch_id": request.batch_id, "transactions": tx_list,
+        "industry": request.industry, "language": request.language
+    })
+
+@app.post("/api/v1/jobs/batch-analysis", status_code=202)
+async def submit_batch_analysis_job(request: BatchAnalysisRequest):
+    return await job_queue.submit("batch_analysis", request.model_dump(mode="json"))
+
+@app.get("/api/v1/jobs")
+async def list_jobs(
+    status: Optional[str] = Query(None, pattern="^(pending|running|done|failed|cancelled)$"),
+    kind: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500)
+):
+    return {"jobs": await job_queue.list(status, kind, limit), "stats": await job_queue.stats()}
+
+@app.get("/api/v1/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/api/v1/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = await job_queue.get(job_id, include_payload=True)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}" + (f": {job['error']}" if job["error"] else ""))
+    return job["result"]
+
+@app.post("/api/v1/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    job = await job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 @app.post("/api/v1/feedback")
 async def log_feedback(request: FeedbackRequest):
     """Log feedback for future RLHF / Fine-tuning"""
-    os.makedirs("logs", exist_ok=True)
-    with open("logs/feedback.jsonl", "a", encoding="utf-8") as f:
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            **request.model_dump()
-        }
-        f.write(json.dumps(log_entry) + "\n")
+    log_entry = {
+        "timestamp": datetime.now().isoformat(),
+        **request.model_dump()
+    }
+    if not feedback_writer.submit(log_entry):
+        raise HTTPException(status_code=503, detail="Feedback queue is full, please retry shortly")
     return {"status": "success", "message": "Feedback captured for future RLHF"}
 
 if __name__ == "__main__":
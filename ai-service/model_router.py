@@ -0,0 +1,152 @@
+"""
+Latency-aware routing across several local Ollama models.
+
+Models are configured smallest to largest in OLLAMA_MODELS. Each endpoint asks for a
+tier (small / default / large). The router predicts that model's latency from its
+recent p95, the work queued on it and the prompt size relative to what it usually
+sees. While the prediction would break the p95 SLO it steps down to the next smaller
+model. Every decision and every call's latency is recorded for /api/v1/models/router.
+"""
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LLM_SLO_P95_MS = float(os.getenv("LLM_SLO_P95_MS", "8000"))
+LLM_LONG_PROMPT_TOKENS = int(os.getenv("LLM_LONG_PROMPT_TOKENS", "1500"))
+LLM_ROUTER_WINDOW = int(os.getenv("LLM_ROUTER_WINDOW", "200"))  # latencies kept per model
+LLM_ROUTER_PROBE_SECONDS = float(os.getenv("LLM_ROUTER_PROBE_SECONDS", "30"))
+
+# Tier each endpoint starts from before SLO adjustments
+ENDPOINT_TIERS = {
+    "categorize": "small",
+    "forecast": "small",
+    "chat": "default",
+    "advice": "default",
+    "warmup": "default",
+    "credit": "large",
+    "risk": "large",
+}
+
+
+class _ModelStats:
+    def __init__(self, window: int):
+        self.latencies_ms = deque(maxlen=window)
+        self.prompt_tokens = deque(maxlen=window)
+        self.inflight = 0
+        self.requests = 0
+        self.errors = 0
+        self.last_finished = 0.0
+
+    def p(self, q: float) -> float:
+        return float(np.percentile(self.latencies_ms, q)) if self.latencies_ms else 0.0
+
+
+class ModelRouter:
+    def __init__(
+        self,
+        models: List[str],
+        default_model: str,
+        slo_p95_ms: float = LLM_SLO_P95_MS,
+        long_prompt_tokens: int = LLM_LONG_PROMPT_TOKENS,
+        window: int = LLM_ROUTER_WINDOW
+    ):
+        self.models = models or [default_model]
+        self.default_index = self.models.index(default_model) if default_model in self.models else len(self.models) // 2
+        self.slo_p95_ms = slo_p95_ms
+        self.long_prompt_tokens = long_prompt_tokens
+        self.decisions: Counter = Counter()
+        self._stats = {m: _ModelStats(window) for m in self.models}
+        self._lock = threading.Lock()
+
+    def _tier_index(self, endpoint: str) -> int:
+        tier = ENDPOINT_TIERS.get(endpoint, "default")
+        if tier == "small":
+            return 0
+        if tier == "large":
+            return len(self.models) - 1
+        return self.default_index
+
+    def estimate_ms(self, model: str, prompt_tokens: int) -> float:
+        """Predicted latency: recent p95 scaled by prompt size, plus the queue ahead of us"""
+        stats = self._stats[model]
+        # No recent traffic (e.g. after an SLO step-down): let a request through to re-measure
+        if not stats.latencies_ms or time.monotonic() - stats.last_finished > LLM_ROUTER_PROBE_SECONDS:
+            return 0.0
+        typical_tokens = float(np.mean(stats.prompt_tokens)) or 1.0
+        size_factor = min(4.0, max(0.5, prompt_tokens / typical_tokens))
+        # Ollama serves one request per model at a time unless OLLAMA_NUM_PARALLEL is raised
+        queue_ms = stats.inflight * float(np.mean(stats.latencies_ms))
+        return stats.p(95) * size_factor + queue_ms
+
+    def _preferred_index(self, endpoint: str, prompt_tokens: int):
+        index = self._tier_index(endpoint)
+        if prompt_tokens > self.long_prompt_tokens and index > 0:
+            return index - 1, "long_prompt"
+        return index, "tier"
+
+    def preferred(self, endpoint: str, prompt_tokens: int) -> str:
+        """The model `route` picks when no SLO step-down applies; records nothing"""
+        return self.models[self._preferred_index(endpoint, prompt_tokens)[0]]
+
+    def route(self, endpoint: str, prompt_tokens: int) -> str:
+        with self._lock:
+            index, reason = self._preferred_index(endpoint, prompt_tokens)
+            while index > 0 and self.estimate_ms(self.models[index], prompt_tokens) > self.slo_p95_ms:
+                index -= 1
+                reason = "slo"
+            model = self.models[index]
+            self.decisions[f"{endpoint}|{model}|{reason}"] += 1
+        if reason == "slo":
+            logger.info(f"Routed {endpoint} to {model} to protect the {self.slo_p95_ms:.0f} ms p95 SLO")
+        return model
+
+    def begin(self, model: str) -> float:
+        with self._lock:
+            self._stats.setdefault(model, _ModelStats(LLM_ROUTER_WINDOW)).inflight += 1
+        return time.perf_counter()
+
+    def finish(self, model: str, started: float, prompt_tokens: int, ok: bool):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            stats = self._stats[model]
+            stats.inflight -= 1
+            stats.requests += 1
+            stats.last_finished = time.monotonic()
+            if ok:
+                stats.latencies_ms.append(elapsed_ms)
+                stats.prompt_tokens.append(prompt_tokens)
+            else:
+                stats.errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            models = {
+                name: {
+                    "requests": s.requests,
+                    "errors": s.errors,
+                    "inflight": s.inflight,
+                    "p50_ms": round(s.p(50), 1),
+                    "p95_ms": round(s.p(95), 1),
+                    "mean_prompt_tokens": round(float(np.mean(s.prompt_tokens)), 1) if s.prompt_tokens else 0.0,
+                }
+                for name, s in self._stats.items()
+            }
+            decisions = [
+                {"endpoint": e, "model": m, "reason": r, "count": n}
+                for (e, m, r), n in ((k.split("|"), v) for k, v in sorted(self.decisions.items()))
+            ]
+        return {"slo_p95_ms": self.slo_p95_ms, "models": models, "decisions": decisions}
+
+
+def configured_models(default_model: str) -> List[str]:
+    """OLLAMA_MODELS as an ordered small-to-large list; defaults to just OLLAMA_MODEL"""
+    raw = os.getenv("OLLAMA_MODELS", "")
+    models = [m.strip() for m in raw.split(",") if m.strip()]
+    return models or [default_model]
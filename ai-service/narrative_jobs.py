@@ -0,0 +1,130 @@
+"""
+Background LLM narratives for heuristic-first endpoints.
+
+Credit, risk and simple-forecast results are computed by heuristics in microseconds;
+the LLM only rewrites one text field. In async mode the endpoint returns the heuristic
+result at once with a narrative job id, and the narrative is generated here under a
+small concurrency limit. Job ids are derived from the request content, so repeating a
+request reuses the running or finished job instead of generating again.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+NARRATIVE_CONCURRENCY = int(os.getenv("NARRATIVE_CONCURRENCY", "2"))
+NARRATIVE_TTL = int(os.getenv("NARRATIVE_TTL", "3600"))
+NARRATIVE_MAX_JOBS = int(os.getenv("NARRATIVE_MAX_JOBS", "2000"))
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+
+class NarrativeJobs:
+    def __init__(
+        self,
+        concurrency: int = NARRATIVE_CONCURRENCY,
+        ttl: int = NARRATIVE_TTL,
+        max_jobs: int = NARRATIVE_MAX_JOBS
+    ):
+        self.concurrency = concurrency
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self._semaphore: Optional[asyncio.Semaphore] = None  # created on the serving loop
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._done_events: Dict[str, asyncio.Event] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def job_id(cache_key: str) -> str:
+        return f"nar_{hashlib.sha256(cache_key.encode()).hexdigest()[:20]}"
+
+    def _expire(self):
+        """Drop finished jobs, oldest first, that are past their TTL or over the size limit"""
+        cutoff = time.time() - self.ttl
+        for job_id, job in list(self._jobs.items()):
+            if job["created_at"] >= cutoff and len(self._jobs) <= self.max_jobs:
+                break
+            if job["status"] in (DONE, FAILED):
+                del self._jobs[job_id]
+                self._done_events.pop(job_id, None)
+
+    def submit(self, cache_key: str, field: str, generate: Callable[[], Awaitable[Optional[str]]]) -> Dict[str, Any]:
+        """Start (or reuse) the narrative job for this request"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        job_id = self.job_id(cache_key)
+        job = self.get(job_id)
+        if job is not None and job["status"] != FAILED:
+            return job
+
+        job = {
+            "job_id": job_id,
+            "field": field,
+            "status": PENDING,
+            "narrative": None,
+            "error": None,
+            "created_at": time.time(),
+            "finished_at": None,
+        }
+        self._jobs[job_id] = job
+        self._done_events[job_id] = asyncio.Event()
+        self._tasks[job_id] = asyncio.create_task(self._run(job, generate))
+        self._expire()
+        return job
+
+    async def _run(self, job: Dict[str, Any], generate: Callable[[], Awaitable[Optional[str]]]):
+        try:
+            async with self._semaphore:
+                job["status"] = RUNNING
+                narrative = await generate()
+            if narrative:
+                job["status"], job["narrative"] = DONE, narrative
+            else:
+                job["status"], job["error"] = FAILED, "No LLM backend produced a narrative"
+        except asyncio.CancelledError:
+            job["status"], job["error"] = FAILED, "cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Narrative job {job['job_id']} failed: {e}")
+            job["status"], job["error"] = FAILED, str(e)
+        finally:
+            job["finished_at"] = time.time()
+            self._tasks.pop(job["job_id"], None)
+            event = self._done_events.get(job["job_id"])
+            if event is not None:
+                event.set()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        if job is not None and job["status"] in (DONE, FAILED) and time.time() - job["created_at"] > self.ttl:
+            self._jobs.pop(job_id, None)
+            self._done_events.pop(job_id, None)
+            return None
+        return job
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Wait up to `timeout` seconds for the job to finish; returns its current state"""
+        event = self._done_events.get(job_id)
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.get(job_id)
+
+    async def close(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        counts = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        for job in self._jobs.values():
+            counts[job["status"]] += 1
+        return counts
@@ -0,0 +1,135 @@
+"""
+Compact prompt rendering with per-endpoint token budgets.
+
+Context dicts used to be pasted into prompts as indented JSON, which on a CPU-only
+Ollama costs more prefill time than the question itself. Here they are rendered as
+terse `key: value` lines (lists of records as one header plus `;`-separated rows),
+fields the endpoint does not use are dropped, and the result is cut to the
+endpoint's token budget. The persona + language system blocks are rendered once
+per language instead of on every call.
+"""
+import logging
+import math
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from conversation_store import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Context token budgets per endpoint, overridable with PROMPT_BUDGET_<ENDPOINT>
+PROMPT_BUDGETS = {
+    "chat": 250,
+    "advice": 300,
+    "categorize": 1200,
+    "default": 400,
+}
+for _endpoint in list(PROMPT_BUDGETS):
+    PROMPT_BUDGETS[_endpoint] = int(os.getenv(f"PROMPT_BUDGET_{_endpoint.upper()}", PROMPT_BUDGETS[_endpoint]))
+
+PROMPT_LIST_ITEMS = int(os.getenv("PROMPT_LIST_ITEMS", "6"))
+
+# Fields an endpoint actually reasons about; None keeps everything not in DROP_FIELDS
+ENDPOINT_FIELDS: Dict[str, Optional[Tuple[str, ...]]] = {
+    "advice": (
+        "totalBalance", "monthlySpending", "totalInvestments", "pendingBills", "totalBudget",
+        "budgetUsagePercentage", "categoryBreakdown", "spendingTrends", "recentTransactions",
+    ),
+    "chat": None,
+}
+# UI-only or identifying fields that never help the model
+DROP_FIELDS = frozenset({"color", "id", "userId", "user_id", "icon", "avatar", "createdAt", "updatedAt"})
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return "n/a"
+        return f"{value:.0f}" if value.is_integer() or abs(value) >= 1000 else f"{value:.2f}"
+    return " ".join(str(value).split())
+
+
+def _render_records(key: str, items: List[Dict[str, Any]]) -> str:
+    """List of dicts as one header and `;`-separated rows"""
+    columns = [c for c in items[0] if c not in DROP_FIELDS]
+    rows = [
+        " ".join("-" if item.get(c) in (None, "") else _format_value(item.get(c)) for c in columns)
+        for item in items[:PROMPT_LIST_ITEMS]
+    ]
+    more = f" (+{len(items) - PROMPT_LIST_ITEMS} more)" if len(items) > PROMPT_LIST_ITEMS else ""
+    return f"{key} ({', '.join(columns)}): {'; '.join(rows)}{more}"
+
+
+def _context_lines(payload: Dict[str, Any], fields: Optional[Iterable[str]], prefix: str = "") -> List[str]:
+    scalars, nested = [], []
+    keys = [k for k in (fields or payload.keys()) if k in payload and k not in DROP_FIELDS]
+    for key in keys:
+        value = payload[key]
+        if value is None or value == "" or value == [] or value == {}:
+            continue
+        label = f"{prefix}{key}"
+        if isinstance(value, dict):
+            nested.extend(_context_lines(value, None, f"{label}."))
+        elif isinstance(value, (list, tuple)):
+            if all(isinstance(v, dict) for v in value):
+                nested.append(_render_records(label, list(value)))
+            else:
+                shown = ", ".join(_format_value(v) for v in value[:PROMPT_LIST_ITEMS])
+                more = f" (+{len(value) - PROMPT_LIST_ITEMS} more)" if len(value) > PROMPT_LIST_ITEMS else ""
+                nested.append(f"{label}: {shown}{more}")
+        else:
+            scalars.append(f"{label}: {_format_value(value)}")
+    # Headline numbers first so they survive budget cuts
+    return scalars + nested
+
+
+def fit_lines(lines: List[str], budget: int) -> Tuple[List[str], int]:
+    """Keep leading lines while they fit `budget` tokens; returns (kept, dropped count)"""
+    kept, used = [], 0
+    for line in lines:
+        tokens = count_tokens(line) + 1
+        if used + tokens > budget:
+            break
+        kept.append(line)
+        used += tokens
+    return kept, len(lines) - len(kept)
+
+
+def render_context(payload: Optional[Dict[str, Any]], endpoint: str, title: str = "Financial Context") -> str:
+    """Compact, field-filtered, budgeted rendering of a context dict ('' when empty)"""
+    if not payload:
+        return ""
+    lines = _context_lines(payload, ENDPOINT_FIELDS.get(endpoint))
+    budget = PROMPT_BUDGETS.get(endpoint, PROMPT_BUDGETS["default"])
+    kept, dropped = fit_lines(lines, budget)
+    if dropped:
+        logger.info(f"Prompt context for {endpoint} cut to {budget} tokens ({dropped} lines dropped)")
+    if not kept:
+        return ""
+    return f"### {title}:\n" + "\n".join(kept) + "\n"
+
+
+def render_transaction_table(tx_list: List[Dict[str, Any]], endpoint: str = "categorize") -> Tuple[str, int]:
+    """Transactions as `id|desc|amount|type|party` rows; returns (table, rows that fit the budget)"""
+    header = "id|desc|amount|type|party"
+    rows = [
+        "|".join([
+            str(tx["id"]), " ".join(str(tx["desc"]).split()), _format_value(float(tx["amount"])),
+            str(tx["type"]), " ".join(str(tx.get("party") or "").split())
+        ])
+        for tx in tx_list
+    ]
+    kept, dropped = fit_lines(rows, PROMPT_BUDGETS.get(endpoint, PROMPT_BUDGETS["default"]) - count_tokens(header))
+    if dropped:
+        logger.info(f"Transaction table cut to {len(kept)} of {len(rows)} rows by the {endpoint} budget")
+    return "\n".join([header, *kept]), len(kept)
+
+
+def render_system_blocks(persona: str, language_prompts: Dict[str, str]) -> Dict[str, str]:
+    """Persona + language instruction per language, rendered once"""
+    blocks = {"": persona}
+    for language, instruction in language_prompts.items():
+        blocks[language] = f"{persona}\n\n{instruction}" if instruction else persona
+    return blocks
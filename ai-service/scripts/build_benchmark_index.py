@@ -0,0 +1,120 @@
+"""
+Build the percentile benchmark index loaded by the AI service (benchmark_index.py).
+
+Sources, in order of precedence per industry/metric:
+- observed peer values from a CSV with `industry,metric,value` rows (--peers);
+  a series is used as-is once it has at least --min-peers observations
+- expense-to-revenue ranges seeded by the backend (IndustryBenchmarkInitializer:
+  sector, category, low, high, average), indexed as `expense:<category>`
+- the built-in ratio medians (INDUSTRY_BENCHMARKS)
+
+Summary figures are expanded to a fixed quantile sample, so every series is a
+sorted list of values the service can binary-search. The output is written
+atomically; a running service picks it up on its next mtime check, or at once via
+POST /api/v1/benchmarks/reload.
+
+Usage:
+    python scripts/build_benchmark_index.py --peers data/peer_ratios.csv
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+from benchmark_index import BENCHMARK_INDEX_PATH, INDUSTRY_BENCHMARKS, summary_distributions  # noqa: E402
+
+DEFAULT_INITIALIZER = os.path.join(
+    os.path.dirname(SERVICE_DIR), "backend", "src", "main", "java", "ai", "wealthwise", "config",
+    "IndustryBenchmarkInitializer.java"
+)
+CREATE_BENCHMARK = re.compile(
+    r'createBenchmark\(\s*"([^"]+)"\s*,\s*"([^"]+)"\s*,\s*([-\d.]+)\s*,\s*([-\d.]+)\s*,\s*([-\d.]+)\s*\)'
+)
+NUMBER_LIST = re.compile(r"\[\s*([-\d.eE+,\s]+?)\s*\]")  # an indented list of numbers, to fold onto one line
+
+
+def read_initializer(path: str) -> List[Tuple[str, str, float, float, float]]:
+    """(sector, category, low, high, avg) rows seeded by the backend"""
+    if not path or not os.path.exists(path):
+        print(f"Initializer not found, skipping expense ranges: {path}", file=sys.stderr)
+        return []
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    return [
+        (sector, category, float(low), float(high), float(avg))
+        for sector, category, low, high, avg in CREATE_BENCHMARK.findall(source)
+    ]
+
+
+def read_peers(path: str) -> Dict[Tuple[str, str], List[float]]:
+    peers: Dict[Tuple[str, str], List[float]] = defaultdict(list)
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                value = float(row["value"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            peers[(row["industry"].strip().upper(), row["metric"].strip())].append(value)
+    return peers
+
+
+def format_index(index: Dict) -> str:
+    """Indented JSON with each sample list kept on one line, so diffs show changed series"""
+    text = json.dumps(index, sort_keys=True, indent=2)
+    return NUMBER_LIST.sub(lambda m: "[" + ", ".join(v.strip() for v in m.group(1).split(",")) + "]", text) + "\n"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build the industry benchmark percentile index")
+    parser.add_argument("--initializer", default=DEFAULT_INITIALIZER, help="IndustryBenchmarkInitializer.java")
+    parser.add_argument("--peers", help="CSV of observed industry,metric,value rows")
+    parser.add_argument("--min-peers", type=int, default=20, help="Observations needed to use a peer series")
+    parser.add_argument("--out", default=BENCHMARK_INDEX_PATH)
+    args = parser.parse_args(argv)
+
+    ranges = read_initializer(args.initializer)
+    distributions = summary_distributions(INDUSTRY_BENCHMARKS, ranges)
+    observed: Dict[str, List[str]] = {}
+    if args.peers:
+        for (industry, metric), values in read_peers(args.peers).items():
+            if len(values) >= args.min_peers:
+                distributions.setdefault(industry, {})[metric] = sorted(values)
+                observed.setdefault(industry, []).append(metric)
+    observed = {industry: sorted(metrics) for industry, metrics in observed.items()}
+    observed_count = sum(len(metrics) for metrics in observed.values())
+
+    body = json.dumps(distributions, sort_keys=True, separators=(",", ":"))
+    index = {
+        "version": hashlib.sha256(body.encode("utf-8")).hexdigest()[:12],
+        "generatedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "sources": {
+            "ratioMedians": "benchmark_index.INDUSTRY_BENCHMARKS",
+            "expenseRanges": os.path.basename(args.initializer) if ranges else None,
+            "observedSeries": observed_count,
+        },
+        "observed": observed,
+        "distributions": distributions,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    tmp = f"{args.out}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(format_index(index))
+    os.replace(tmp, args.out)
+
+    series = sum(len(m) for m in distributions.values())
+    print(f"Wrote {args.out}: version {index['version']}, {len(distributions)} industries, {series} series "
+          f"({len(ranges)} expense ranges, {observed_count} observed)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,355 @@
+"""
+Streaming compiler for fine-tuning data.
+
+Combines three sources into fine-tune-ready JSONL shards:
+- synthetic SFT shards from scripts/generate_sft_data.py (.jsonl / .jsonl.gz)
+- chat transcripts written by the service (logs/conversations*.jsonl[.gz])
+- user feedback (logs/feedback*.jsonl[.gz]); only conversations whose latest
+  feedback is a good response with rating >= --min-rating are kept
+
+Memory stays bounded however large the inputs are. Inputs are read in chunks, and
+both the feedback/transcript join and the exact-duplicate removal are done by hash
+partitioning through temporary files: every partition is sized (--partition-mb) to
+fit in memory and is processed on its own. Unique samples are token-counted with
+tiktoken, routed to length buckets and greedily packed into sequences up to the
+bucket size, rendered with the Gemma turn template the Modelfile build uses.
+
+Usage:
+    python scripts/compile_training_set.py --sft "data/sft/*.jsonl.gz" --logs-dir logs --out-dir data/train
+"""
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+from conversation_store import count_tokens  # noqa: E402  (tiktoken with a length fallback)
+
+READ_CHUNK = 1 << 20  # bytes per read from plain or gzip inputs
+GZIP_EXPANSION = 8  # assumed size ratio when estimating decompressed input
+DEFAULT_BUCKETS = "512,1024,2048,4096"
+MAX_OPEN_PARTITIONS = 256  # spill files kept open at once (least recently used are closed)
+
+
+# =============================================================================
+# INPUT
+# =============================================================================
+
+def iter_lines(path: str) -> Iterator[bytes]:
+    """Lines of a .jsonl or .jsonl.gz file, read in fixed-size chunks"""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        tail = b""
+        while True:
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
+                break
+            lines = (tail + chunk).split(b"\n")
+            tail = lines.pop()
+            for line in lines:
+                if line.strip():
+                    yield line
+        if tail.strip():
+            yield tail
+
+
+def iter_records(paths: List[str], stats: Dict[str, int], source: str) -> Iterator[Dict[str, Any]]:
+    for path in paths:
+        for line in iter_lines(path):
+            try:
+                yield json.loads(line)
+            except ValueError:
+                stats[f"{source}_malformed"] = stats.get(f"{source}_malformed", 0) + 1
+
+
+def log_files(logs_dir: str, base: str) -> List[str]:
+    """The active log and its rotated gzip archives (see feedback_writer.py)"""
+    paths = sorted(glob.glob(os.path.join(logs_dir, f"{base}-*.jsonl.gz")))
+    active = os.path.join(logs_dir, f"{base}.jsonl")
+    return paths + ([active] if os.path.exists(active) else [])
+
+
+def expand(patterns: List[str]) -> List[str]:
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        paths.extend(matches or ([pattern] if os.path.exists(pattern) else []))
+    return [p for p in paths if p.endswith((".jsonl", ".jsonl.gz"))]
+
+
+def estimated_bytes(paths: List[str]) -> int:
+    return sum(os.path.getsize(p) * (GZIP_EXPANSION if p.endswith(".gz") else 1) for p in paths)
+
+
+# =============================================================================
+# SAMPLES
+# =============================================================================
+
+def sft_messages(record: Dict[str, Any]) -> Optional[List[Dict[str, str]]]:
+    if not record.get("output"):
+        return None
+    prompt = "\n\n".join(part for part in (record.get("instruction"), record.get("input")) if part)
+    return [{"role": "user", "content": prompt}, {"role": "model", "content": record["output"]}]
+
+
+def render_gemma(messages: List[Dict[str, str]]) -> str:
+    return "".join(f"<start_of_turn>{m['role']}\n{m['content']}<end_of_turn>\n" for m in messages)
+
+
+def content_hash(messages: List[Dict[str, str]]) -> str:
+    canonical = json.dumps(messages, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class Partitions:
+    """Append-only JSONL spill files keyed by a stable hash of a string key"""
+
+    def __init__(self, directory: str, name: str, count: int):
+        self.directory = directory
+        self.name = name
+        self.count = count
+        self._files: "OrderedDict[int, Any]" = OrderedDict()
+
+    def path(self, index: int) -> str:
+        return os.path.join(self.directory, f"{self.name}-{index:05d}.jsonl")
+
+    def add(self, key: str, record: Dict[str, Any]):
+        index = zlib.crc32(key.encode("utf-8")) % self.count
+        f = self._files.get(index)
+        if f is None:
+            if len(self._files) >= MAX_OPEN_PARTITIONS:
+                self._files.popitem(last=False)[1].close()
+            f = self._files[index] = open(self.path(index), "ab", buffering=64 * 1024)
+        else:
+            self._files.move_to_end(index)
+        f.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+    def read(self, index: int) -> Iterator[Dict[str, Any]]:
+        if os.path.exists(self.path(index)):
+            for line in iter_lines(self.path(index)):
+                yield json.loads(line)
+            os.remove(self.path(index))
+
+
+class BucketWriter:
+    """Greedy packing of samples into sequences of at most `max_tokens`, rolled into shards"""
+
+    def __init__(self, out_dir: str, max_tokens: int, shard_size: int, pack: bool):
+        self.out_dir = os.path.join(out_dir, f"bucket-{max_tokens}")
+        self.max_tokens = max_tokens
+        self.shard_size = shard_size
+        self.pack = pack
+        self.samples = self.sequences = self.tokens = self.shards = 0
+        self._pack: List[str] = []
+        self._pack_tokens = 0
+        self._file = None
+        self._in_shard = 0
+
+    def add(self, text: str, tokens: int):
+        self.samples += 1
+        self.tokens += tokens
+        if not self.pack:
+            self._emit({"text": text, "tokens": tokens, "samples": 1})
+            return
+        if self._pack and self._pack_tokens + tokens > self.max_tokens:
+            self._flush_pack()
+        self._pack.append(text)
+        self._pack_tokens += tokens
+
+    def _flush_pack(self):
+        if self._pack:
+            self._emit({"text": "".join(self._pack), "tokens": self._pack_tokens, "samples": len(self._pack)})
+            self._pack, self._pack_tokens = [], 0
+
+    def _emit(self, record: Dict[str, Any]):
+        if self._file is None or self._in_shard >= self.shard_size:
+            if self._file is not None:
+                self._file.close()
+            os.makedirs(self.out_dir, exist_ok=True)
+            self._file = open(os.path.join(self.out_dir, f"train-{self.shards:05d}.jsonl"), "wb")
+            self.shards += 1
+            self._in_shard = 0
+        self._file.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+        self._in_shard += 1
+        self.sequences += 1
+
+    def close(self):
+        self._flush_pack()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "max_tokens": self.max_tokens, "samples": self.samples, "sequences": self.sequences,
+            "tokens": self.tokens, "shards": self.shards,
+            "fill": round(self.tokens / (self.sequences * self.max_tokens), 4) if self.sequences and self.pack else None,
+        }
+
+
+# =============================================================================
+# PIPELINE
+# =============================================================================
+
+def partition_feedback(feedback: List[str], transcripts: List[str], parts: int, tmp: str, stats: Dict[str, int]):
+    """Spill feedback and transcripts into partitions by conversation id"""
+    fb_parts, tr_parts = Partitions(tmp, "feedback", parts), Partitions(tmp, "transcripts", parts)
+    for record in iter_records(feedback, stats, "feedback"):
+        if record.get("conversation_id"):
+            stats["feedback_entries"] = stats.get("feedback_entries", 0) + 1
+            fb_parts.add(record["conversation_id"], record)
+    for record in iter_records(transcripts, stats, "transcripts"):
+        if record.get("conversation_id") and record.get("user") and record.get("assistant"):
+            stats["transcript_turns"] = stats.get("transcript_turns", 0) + 1
+            tr_parts.add(record["conversation_id"], record)
+    fb_parts.close()
+    tr_parts.close()
+    return fb_parts, tr_parts
+
+
+def join_feedback(fb_parts: Partitions, tr_parts: Partitions, min_rating: int,
+                  samples: Partitions, stats: Dict[str, int]):
+    """Per partition: keep conversations whose latest feedback is good, as multi-turn samples"""
+    for index in range(fb_parts.count):
+        latest: Dict[str, Dict[str, Any]] = {}
+        for record in fb_parts.read(index):
+            current = latest.get(record["conversation_id"])
+            if current is None or str(record.get("timestamp", "")) >= str(current.get("timestamp", "")):
+                latest[record["conversation_id"]] = record
+        good = {
+            cid for cid, r in latest.items()
+            if r.get("good_response") and int(r.get("rating") or 0) >= min_rating
+        }
+        turns: Dict[str, List[Dict[str, Any]]] = {}
+        for record in tr_parts.read(index):
+            if record["conversation_id"] in good:
+                turns.setdefault(record["conversation_id"], []).append(record)
+        for cid, conv_turns in turns.items():
+            conv_turns.sort(key=lambda r: str(r.get("timestamp", "")))
+            messages = []
+            for turn in conv_turns:
+                messages.append({"role": "user", "content": turn["user"]})
+                messages.append({"role": "model", "content": turn["assistant"]})
+            digest = content_hash(messages)
+            samples.add(digest, {"hash": digest, "source": "feedback", "messages": messages})
+            stats["feedback_conversations"] = stats.get("feedback_conversations", 0) + 1
+
+
+def pack_unique(samples: Partitions, buckets: List[BucketWriter], stats: Dict[str, int], progress):
+    """Per partition: drop exact duplicates, token-count and route to the smallest bucket that fits"""
+    for index in range(samples.count):
+        seen = set()
+        for record in samples.read(index):
+            if record["hash"] in seen:
+                stats["duplicates"] = stats.get("duplicates", 0) + 1
+                continue
+            seen.add(record["hash"])
+            text = render_gemma(record["messages"])
+            tokens = count_tokens(text)
+            bucket = next((b for b in buckets if tokens <= b.max_tokens), None)
+            if bucket is None:
+                stats["too_long"] = stats.get("too_long", 0) + 1
+                continue
+            bucket.add(text, tokens)
+            stats[f"unique_{record['source']}"] = stats.get(f"unique_{record['source']}", 0) + 1
+        progress(index + 1, samples.count)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compile feedback logs and SFT shards into fine-tuning shards")
+    parser.add_argument("--sft", nargs="*", default=[os.path.join(SERVICE_DIR, "sft_dataset.jsonl")],
+                        help="SFT files or glob patterns (.jsonl / .jsonl.gz)")
+    parser.add_argument("--logs-dir", default=os.path.join(SERVICE_DIR, "logs"))
+    parser.add_argument("--out-dir", default="train_data")
+    parser.add_argument("--min-rating", type=int, default=4)
+    parser.add_argument("--buckets", default=DEFAULT_BUCKETS, help="Comma separated max tokens per length bucket")
+    parser.add_argument("--no-pack", dest="pack", action="store_false", help="One sample per line instead of packing")
+    parser.add_argument("--shard-size", type=int, default=50000, help="Sequences per output shard")
+    parser.add_argument("--partition-mb", type=int, default=64, help="Target spill partition size in memory")
+    parser.add_argument("--tmp-dir", default=None)
+    args = parser.parse_args(argv)
+
+    sft = expand(args.sft)
+    feedback = log_files(args.logs_dir, "feedback")
+    transcripts = log_files(args.logs_dir, "conversations")
+    input_bytes = estimated_bytes(sft + feedback + transcripts)
+    parts = max(1, math.ceil(input_bytes / (args.partition_mb * 1024 * 1024)))
+    print(f"🚀 Compiling {len(sft)} SFT file(s), {len(feedback)} feedback log(s), {len(transcripts)} transcript log(s) "
+          f"(~{input_bytes / 1e6:.1f} MB) through {parts} partition(s)")
+
+    # Replace a previous compile's output, never anything else in --out-dir
+    os.makedirs(args.out_dir, exist_ok=True)
+    for old in glob.glob(os.path.join(args.out_dir, "bucket-*")):
+        shutil.rmtree(old)
+    buckets = [BucketWriter(args.out_dir, int(b), args.shard_size, args.pack) for b in sorted(
+        {int(x) for x in args.buckets.split(",") if x.strip()})]
+
+    stats: Dict[str, int] = {}
+    started = time.perf_counter()
+
+    def progress(done: int, total: int):
+        elapsed = time.perf_counter() - started
+        written = sum(b.samples for b in buckets)
+        print(f"  partition {done}/{total}: {written:,} samples at {written / max(elapsed, 1e-9):,.0f} samples/s",
+              flush=True)
+
+    with tempfile.TemporaryDirectory(dir=args.tmp_dir, prefix="compile-") as tmp:
+        samples = Partitions(tmp, "samples", parts)
+        for record in iter_records(sft, stats, "sft"):
+            messages = sft_messages(record)
+            if messages is None:
+                continue
+            stats["sft_entries"] = stats.get("sft_entries", 0) + 1
+            digest = content_hash(messages)
+            samples.add(digest, {"hash": digest, "source": "sft", "messages": messages})
+
+        fb_parts, tr_parts = partition_feedback(feedback, transcripts, parts, tmp, stats)
+        join_feedback(fb_parts, tr_parts, args.min_rating, samples, stats)
+        samples.close()
+        pack_unique(samples, buckets, stats, progress)
+
+    for bucket in buckets:
+        bucket.close()
+    elapsed = time.perf_counter() - started
+    manifest = {
+        "inputs": {"sft": sft, "feedback": feedback, "transcripts": transcripts},
+        "min_rating": args.min_rating,
+        "packed": args.pack,
+        "partitions": parts,
+        "stats": stats,
+        "buckets": [b.summary() for b in buckets],
+        "seconds": round(elapsed, 3),
+    }
+    with open(os.path.join(args.out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    written = sum(b.samples for b in buckets)
+    print(f"✅ Compiled {written:,} unique samples into {sum(b.sequences for b in buckets):,} sequences in {elapsed:.2f}s "
+          f"({written / max(elapsed, 1e-9):,.0f} samples/s); {stats.get('duplicates', 0):,} duplicates, "
+          f"{stats.get('too_long', 0):,} over the largest bucket")
+    for b in buckets:
+        summary = b.summary()
+        fill = f", {summary['fill']:.0%} filled" if summary["fill"] is not None else ""
+        print(f"  bucket ≤{b.max_tokens}: {b.samples:,} samples in {b.sequences:,} sequences, {b.shards} shard(s){fill}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,31 @@
+"""
+Synthetic Supervised Fine-Tuning (SFT) dataset generator for SME financial analysis.
+
+Samples are generated in shards across worker processes. Every shard has its own
+seed derived from --seed and the shard index, so a given (--seed, --shards, --count)
+always produces the same files regardless of how many workers run them. Each shard
+is streamed to its own JSONL file (optionally gzip-compressed) without holding the
+dataset in memory. Exact duplicates are suppressed in two steps: within a shard they
+are skipped and replaced while generating, and duplicates of samples in an earlier
+shard are removed afterwards from per-shard 64-bit content digests. A manifest next
+to the shards records what was generated.
+
+Usage:
+    python scripts/generate_sft_data.py --count 100
+    python scripts/generate_sft_data.py --count 5000000 --shards 64 --workers 8 --gzip --out-dir data/sft
+"""
+import argparse
+import gzip
+import hashlib
 import json
+import multiprocessing
+import os
 import random
+import sys
+import time
+from typing import Iterable, Set
 
-# A Pro AI Developer knows that high-quality synthetic data is the secret to great LLMs
-# This script generates a Supervised Fine-Tuning (SFT) dataset for SME Financial Analysis
+import numpy as np
 
 INDUSTRIES = ["Manufacturing", "Retail", "IT Services", "Healthcare", "Logistics", "Ecommerce"]
 SCENARIOS = [
@@ -19,6 +42,12 @@ SCENARIOS = [
         "focus": "forecasting"
     }
 ]
+INSTRUCTION = "You are a Senior Financial Analyst. Analyze the following SME data."
+
+# Give up on a shard once this many consecutive samples were duplicates
+MAX_DUPLICATE_RUN = 10000
+WRITE_BATCH = 4096  # lines per write call
+
 
 def generate_analyst_response(scenario, data):
     # Pro behavior: Data-driven, structured, actionable
@@ -26,47 +55,232 @@ def generate_analyst_response(scenario, data):
         cr = data['cr']
         status = "CRITICAL" if cr < 1.0 else "FAIR" if cr < 1.2 else "STRONG"
         return f"### Executive Summary\nYour business is in a **{status}** liquidity position.\n\n### Key Insights\n- Current Ratio of {cr} is {'below' if cr < 1.2 else 'above'} the industry benchmark of 1.2.\n- Debt-to-Equity is {data['de']}, suggesting {'high' if data['de'] > 1.5 else 'moderate'} leverage.\n\n### Action Plan\n1. Optimize inventory turnover to free up cash.\n2. Review debt-servicing coverage ratio (DSCR)."
-    
+
     elif scenario["focus"] == "compliance":
         gst = data['gst']
         return f"### Executive Summary\nYour GST compliance score is **{gst}/100**.\n\n### Recommendations\n1. **Timely Filing**: Ensure GSTR-1 and GSTR-3B are filed by the 20th of every month.\n2. **Reconciliation**: Perform monthly GSTR-2B reconciliation to claim maximum ITC."
 
     return "### Analysis\nStandard financial analysis based on provided metrics."
 
-def create_dataset(count=50):
-    dataset = []
-    for _ in range(count):
-        industry = random.choice(INDUSTRIES)
-        scenario = random.choice(SCENARIOS)
-        
-        # Random sample data
-        data = {
-            "turnover": f"₹{random.randint(10, 500)}L",
-            "cr": round(random.uniform(0.5, 2.5), 2),
-            "de": round(random.uniform(0.1, 3.0), 2),
-            "gst": random.randint(40, 100),
-            "rev1": random.randint(5, 50),
-            "rev2": random.randint(5, 50),
-            "rev3": random.randint(5, 50),
-        }
-        
-        user_query = scenario["input"].format(**data)
-        assistant_response = generate_analyst_response(scenario, data)
-        
-        # Pro Format: Alpaca / ShareGPT / OpenAI
-        item = {
-            "instruction": "You are a Senior Financial Analyst. Analyze the following SME data.",
-            "input": f"Industry: {industry}. Query: {user_query}",
-            "output": assistant_response
+
+def create_sample(rng: random.Random) -> dict:
+    industry = rng.choice(INDUSTRIES)
+    scenario = rng.choice(SCENARIOS)
+
+    # Random sample data
+    data = {
+        "turnover": f"₹{rng.randint(10, 500)}L",
+        "cr": round(rng.uniform(0.5, 2.5), 2),
+        "de": round(rng.uniform(0.1, 3.0), 2),
+        "gst": rng.randint(40, 100),
+        "rev1": rng.randint(5, 50),
+        "rev2": rng.randint(5, 50),
+        "rev3": rng.randint(5, 50),
+    }
+
+    # Pro Format: Alpaca / ShareGPT / OpenAI
+    return {
+        "instruction": INSTRUCTION,
+        "input": f"Industry: {industry}. Query: {scenario['input'].format(**data)}",
+        "output": generate_analyst_response(scenario, data)
+    }
+
+
+def shard_seed(seed: int, shard: int) -> int:
+    """Stable per-shard seed (independent of PYTHONHASHSEED and worker count)"""
+    digest = hashlib.sha256(f"wealthwise-sft:{seed}:{shard}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def shard_path(out_dir: str, prefix: str, shard: int, shards: int, compress: bool) -> str:
+    suffix = ".jsonl.gz" if compress else ".jsonl"
+    return os.path.join(out_dir, f"{prefix}-{shard:05d}-of-{shards:05d}{suffix}")
+
+
+def content_key(line: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(line, digest_size=8).digest(), "little")
+
+
+def _write_lines(path: str, lines: Iterable[bytes], compress: bool) -> int:
+    """Stream lines to `path` via a temp file and rename; returns the number written"""
+    tmp_path = f"{path}.tmp"
+    written = 0
+    batch = []
+    with open(tmp_path, "wb") as raw:
+        # mtime=0 keeps the gzip header, and so the file bytes, reproducible
+        out = gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=6, mtime=0) if compress else raw
+        for line in lines:
+            batch.append(line)
+            written += 1
+            if len(batch) >= WRITE_BATCH:
+                out.write(b"".join(batch))
+                batch.clear()
+        out.write(b"".join(batch))
+        if compress:
+            out.close()
+    os.replace(tmp_path, path)
+    return written
+
+
+def generate_shard(task: dict) -> dict:
+    """Stream one shard to disk; returns its counts, timing and (when deduplicating) content keys"""
+    started = time.perf_counter()
+    rng = random.Random(shard_seed(task["seed"], task["shard"]))
+    path = shard_path(task["out_dir"], task["prefix"], task["shard"], task["shards"], task["gzip"])
+    seen: Set[int] = set()
+    stats = {"duplicates": 0}
+
+    def samples():
+        produced = duplicate_run = 0
+        while produced < task["count"]:
+            line = (json.dumps(create_sample(rng), ensure_ascii=False) + "\n").encode("utf-8")
+            if task["dedupe"]:
+                key = content_key(line)
+                if key in seen:
+                    stats["duplicates"] += 1
+                    duplicate_run += 1
+                    if duplicate_run >= MAX_DUPLICATE_RUN:
+                        return  # the sample space is exhausted for this shard
+                    continue
+                seen.add(key)
+                duplicate_run = 0
+            produced += 1
+            yield line
+
+    written = _write_lines(path, samples(), task["gzip"])
+    return {
+        "shard": task["shard"],
+        "path": path,
+        "seed": shard_seed(task["seed"], task["shard"]),
+        "requested": task["count"],
+        "written": written,
+        "duplicates_skipped": stats["duplicates"],
+        "bytes": os.path.getsize(path),
+        "seconds": round(time.perf_counter() - started, 3),
+        "keys": np.fromiter(seen, dtype=np.uint64, count=len(seen)).tobytes() if task["dedupe"] else None,
+    }
+
+
+def cross_shard_duplicates(keys_by_shard: list) -> dict:
+    """Keys each shard must drop because an earlier shard already holds the same sample"""
+    keys = [np.frombuffer(k, dtype=np.uint64) for k in keys_by_shard]
+    owners = np.repeat(np.arange(len(keys)), [len(k) for k in keys])
+    all_keys = np.concatenate(keys)
+    # np.unique returns the first occurrence, i.e. the lowest shard, for each key
+    _, first = np.unique(all_keys, return_index=True)
+    duplicate = np.ones(len(all_keys), dtype=bool)
+    duplicate[first] = False
+    drops = {}
+    for shard in np.unique(owners[duplicate]):
+        drops[int(shard)] = all_keys[duplicate & (owners == shard)].tobytes()
+    return drops
+
+
+def drop_from_shard(task: dict) -> dict:
+    """Rewrite a shard without the given content keys"""
+    drop = set(np.frombuffer(task["drop"], dtype=np.uint64).tolist())
+    opener = gzip.open if task["gzip"] else open
+
+    def kept():
+        with opener(task["path"], "rb") as f:
+            for line in f:
+                if content_key(line) not in drop:
+                    yield line
+
+    written = _write_lines(task["path"], kept(), task["gzip"])
+    return {"shard": task["shard"], "written": written, "dropped": len(drop), "bytes": os.path.getsize(task["path"])}
+
+
+def shard_counts(total: int, shards: int) -> list:
+    base, extra = divmod(total, shards)
+    return [base + (1 if i < extra else 0) for i in range(shards)]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic SFT dataset for SME financial analysis")
+    parser.add_argument("--count", type=int, default=100, help="Total number of samples")
+    parser.add_argument("--shards", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out-dir", default=".")
+    parser.add_argument("--prefix", default="sft_dataset")
+    parser.add_argument("--gzip", action="store_true", help="Write .jsonl.gz shards")
+    parser.add_argument("--no-dedupe", dest="dedupe", action="store_false",
+                        help="Keep exact duplicate samples")
+    args = parser.parse_args(argv)
+
+    if args.count < 1 or args.shards < 1 or args.workers < 1:
+        parser.error("--count, --shards and --workers must be positive")
+    shards = min(args.shards, args.count)
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    tasks = [
+        {
+            "shard": i, "shards": shards, "count": n, "seed": args.seed, "out_dir": args.out_dir,
+            "prefix": args.prefix, "gzip": args.gzip, "dedupe": args.dedupe
         }
-        dataset.append(item)
-    
-    return dataset
+        for i, n in enumerate(shard_counts(args.count, shards))
+    ]
+    workers = min(args.workers, shards)
+    print(f"🚀 Generating {args.count:,} samples in {shards} shard(s) with {workers} worker(s), seed {args.seed}")
+
+    started = time.perf_counter()
+    results = []
+    written = 0
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap_unordered(generate_shard, tasks):
+            results.append(result)
+            written += result["written"]
+            elapsed = time.perf_counter() - started
+            print(
+                f"  shard {result['shard']:>5}: {result['written']:,} samples "
+                f"({result['duplicates_skipped']:,} duplicates skipped) in {result['seconds']:.2f}s | "
+                f"total {written:,} at {written / max(elapsed, 1e-9):,.0f} samples/s",
+                flush=True
+            )
+
+        results.sort(key=lambda r: r["shard"])
+        keys = [r.pop("keys") for r in results]
+        if args.dedupe and shards > 1:
+            drops = cross_shard_duplicates(keys)
+            del keys
+            rewrite = [
+                {"shard": r["shard"], "path": r["path"], "gzip": args.gzip, "drop": drops[r["shard"]]}
+                for r in results if r["shard"] in drops
+            ]
+            for update in pool.imap_unordered(drop_from_shard, rewrite):
+                result = results[update["shard"]]
+                result["duplicates_skipped"] += update["dropped"]
+                result["written"], result["bytes"] = update["written"], update["bytes"]
+            written = sum(r["written"] for r in results)
+            if rewrite:
+                print(f"  removed {sum(len(d) // 8 for d in drops.values()):,} cross-shard duplicates "
+                      f"from {len(rewrite)} shard(s)", flush=True)
+
+    elapsed = time.perf_counter() - started
+    total_bytes = sum(r["bytes"] for r in results)
+    manifest = {
+        "seed": args.seed,
+        "shards": shards,
+        "requested": args.count,
+        "written": written,
+        "duplicates_skipped": sum(r["duplicates_skipped"] for r in results),
+        "gzip": args.gzip,
+        "dedupe": args.dedupe,
+        "seconds": round(elapsed, 3),
+        "files": results,
+    }
+    with open(os.path.join(args.out_dir, f"{args.prefix}-manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    print(
+        f"✅ Generated {written:,} samples ({total_bytes / 1e6:.1f} MB) in {elapsed:.2f}s: "
+        f"{written / max(elapsed, 1e-9):,.0f} samples/s, {total_bytes / 1e6 / max(elapsed, 1e-9):.1f} MB/s"
+    )
+    if written < args.count:
+        print(f"⚠️  Only {written:,} of {args.count:,} requested samples are unique for this generator")
+    return 0
+
 
 if __name__ == "__main__":
-    print("🚀 Generating professional synthetic dataset...")
-    data = create_dataset(100)
-    with open("sft_dataset.jsonl", "w", encoding="utf-8") as f:
-        for entry in data:
-            f.write(json.dumps(entry) + "\n")
-    print(f"✅ Generated 100 high-quality samples in sft_dataset.jsonl")
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""
+End-to-end load generator for the WealthWise AI service.
+
+Drives the FastAPI endpoints with a fixed number of concurrent workers and reports
+p50/p95/p99 latency, time-to-first-byte (time-to-first-token for streamed replies)
+and throughput per endpoint.
+
+Usage against an already running service:
+    python scripts/load_test.py --target http://localhost:8000 --concurrency 16 --duration 60
+
+Fully self-contained run (starts scripts/mock_llm_server.py and the service itself):
+    python scripts/load_test.py --spawn --concurrency 16 --duration 30 --mock-args "--latency-mean 0.2"
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shlex
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CREDIT_PAYLOAD = {
+    "business_name": "Sharma Textiles",
+    "industry_type": "MANUFACTURING",
+    "annual_turnover": 12500000,
+    "credit_score": 712,
+    "current_ratio": 1.3,
+    "debt_equity_ratio": 1.1,
+    "profit_margin": 7.5,
+    "overdue_receivables": 850000,
+    "total_debt": 3200000,
+    "gst_compliance_score": 88,
+    "language": "en"
+}
+
+ENDPOINTS = {
+    "chat": ("POST", "/api/v1/ai/chat", lambda i: {
+        "message": f"How can I reduce my working capital gap? (run {i})",
+        "user_id": i % 50,
+        "context": {"monthly_revenue": 950000, "monthly_expense": 810000}
+    }),
+    "credit-analysis": ("POST", "/api/v1/ai/credit-analysis", lambda i: {
+        **CREDIT_PAYLOAD, "annual_turnover": CREDIT_PAYLOAD["annual_turnover"] + i
+    }),
+    "risk-assessment": ("POST", "/api/v1/ai/risk-assessment", lambda i: {
+        "business_name": "Sharma Textiles",
+        "industry_type": "MANUFACTURING",
+        "cash_flow_trend": random.choice(["positive", "stable", "negative"]),
+        "overdue_amount": 250000 + i,
+        "days_cash_runway": 45
+    }),
+    "forecast": ("POST", "/api/v1/ai/forecast", lambda i: {
+        "business_name": "Sharma Textiles",
+        "industry_type": "MANUFACTURING",
+        "historical_revenue": [800000, 850000, 910000 + i],
+        "historical_expenses": [700000, 720000, 760000],
+        "forecast_months": 6
+    }),
+    "advanced-forecast": ("POST", "/api/v1/ai/forecast", lambda i: {
+        "businessId": f"biz-{i % 20}",
+        "history": [
+            {"date": f"2024-01-{d:02d}", "amount": 5000 + d * 10, "type": "CREDIT" if d % 3 else "DEBIT"}
+            for d in range(1, 29)
+        ],
+        "commitments": [],
+        "horizon": 90
+    }),
+    "advice": ("POST", "/api/v1/ai/advice", lambda i: {
+        "userId": i % 50,
+        "query": "How to improve GST compliance score?",
+        "financialSummary": {"totalIncome": 950000, "totalExpense": 810000}
+    }),
+    "categorize": ("POST", "/categorize-transactions", lambda i: {
+        "batch_id": f"batch-{i}",
+        "industry": "RETAIL",
+        "business_name": "Sharma Textiles",
+        "transactions": [
+            {"id": 1, "description": "Electricity bill March", "amount": 12000, "type": "DEBIT"},
+            {"id": 2, "description": "Salary payout", "amount": 250000, "type": "DEBIT"}
+        ]
+    }),
+}
+
+
+def percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.first_byte = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.status_codes = defaultdict(lambda: defaultdict(int))
+
+    def record(self, name: str, status: int, latency: float, ttfb: float):
+        self.status_codes[name][status] += 1
+        if 200 <= status < 300:
+            self.latencies[name].append(latency)
+            self.first_byte[name].append(ttfb)
+        else:
+            self.errors[name] += 1
+
+    def report(self, elapsed: float) -> dict:
+        report = {}
+        for name in sorted(set(self.latencies) | set(self.errors)):
+            lat = sorted(self.latencies[name])
+            ttfb = sorted(self.first_byte[name])
+            ok = len(lat)
+            report[name] = {
+                "requests": ok + self.errors[name],
+                "errors": self.errors[name],
+                "throughput_rps": round(ok / elapsed, 2) if elapsed > 0 else 0.0,
+                "latency_ms": {
+                    "p50": round(percentile(lat, 50) * 1000, 1),
+                    "p95": round(percentile(lat, 95) * 1000, 1),
+                    "p99": round(percentile(lat, 99) * 1000, 1),
+                },
+                "ttft_ms": {
+                    "p50": round(percentile(ttfb, 50) * 1000, 1),
+                    "p95": round(percentile(ttfb, 95) * 1000, 1),
+                    "p99": round(percentile(ttfb, 99) * 1000, 1),
+                },
+                "status_codes": dict(self.status_codes[name]),
+            }
+        return report
+
+
+async def issue(client: httpx.AsyncClient, recorder: Recorder, name: str, seq: int):
+    method, path, payload_fn = ENDPOINTS[name]
+    start = time.perf_counter()
+    ttfb = None
+    status = 0
+    try:
+        async with client.stream(method, path, json=payload_fn(seq)) as response:
+            status = response.status_code
+            async for _ in response.aiter_raw():
+                if ttfb is None:
+                    ttfb = time.perf_counter() - start
+    except httpx.HTTPError:
+        status = 599
+    latency = time.perf_counter() - start
+    recorder.record(name, status, latency, ttfb if ttfb is not None else latency)
+
+
+async def worker(client, recorder, names, deadline, counter):
+    while time.perf_counter() < deadline:
+        counter[0] += 1
+        await issue(client, recorder, random.choice(names), counter[0])
+
+
+async def run_load(target: str, names, concurrency: int, duration: float, timeout: float) -> dict:
+    recorder = Recorder()
+    counter = [0]
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=target, timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(worker(client, recorder, names, deadline, counter) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return {"duration_s": round(elapsed, 2), "concurrency": concurrency, "endpoints": recorder.report(elapsed)}
+
+
+def wait_for(url: str, timeout: float = 60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=2.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+def spawn_stack(args):
+    """Start the mock LLM server and the service pointed at it"""
+    mock_url = f"http://127.0.0.1:{args.mock_port}"
+    mock = subprocess.Popen(
+        [sys.executable, os.path.join(SERVICE_DIR, "scripts", "mock_llm_server.py"),
+         "--port", str(args.mock_port), *shlex.split(args.mock_args)],
+        cwd=SERVICE_DIR
+    )
+    env = {
+        **os.environ,
+        "OLLAMA_BASE_URL": mock_url,
+        "OPENAI_BASE_URL": f"{mock_url}/v1",
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "mock"),
+    }
+    service = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.service_port), "--log-level", "warning"],
+        cwd=SERVICE_DIR, env=env
+    )
+    wait_for(f"{mock_url}/api/tags")
+    wait_for(f"http://127.0.0.1:{args.service_port}/health")
+    return [service, mock], f"http://127.0.0.1:{args.service_port}"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the WealthWise AI service")
+    parser.add_argument("--target", default="http://localhost:8000")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS),
+                        help=f"Comma separated subset of: {', '.join(ENDPOINTS)}")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--spawn", action="store_true", help="Start mock LLM and service locally")
+    parser.add_argument("--mock-port", type=int, default=11535)
+    parser.add_argument("--service-port", type=int, default=8100)
+    parser.add_argument("--mock-args", default="", help="Extra arguments for mock_llm_server.py")
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.endpoints.split(",") if n.strip()]
+    unknown = [n for n in names if n not in ENDPOINTS]
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(unknown)}")
+    random.seed(args.seed)
+
+    processes = []
+    target = args.target
+    try:
+        if args.spawn:
+            processes, target = spawn_stack(args)
+        report = asyncio.run(run_load(target, names, args.concurrency, args.duration, args.timeout))
+    finally:
+        for proc in processes:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+"""
+Local LLM stand-in for load testing the WealthWise AI service.
+
+Implements the subset of the Ollama API used by main.py (`/api/generate`,
+`/api/tags`, `/api/pull`, `/api/ps`) plus OpenAI's `/v1/chat/completions`, so the service
+can be exercised end-to-end without a real gemma:2b behind it.
+
+Usage:
+    python scripts/mock_llm_server.py --port 11434 --latency lognormal --latency-mean 0.4 \
+        --tokens-per-second 40 --error-rate 0.02
+
+Then start the service against it:
+    OLLAMA_BASE_URL=http://localhost:11434 OPENAI_BASE_URL=http://localhost:11434/v1 \
+        OPENAI_API_KEY=mock uvicorn main:app --port 8000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+SAMPLE_RESPONSE = (
+    "### Executive Summary\n"
+    "The business shows a **moderate** financial profile with **stable** cash flows.\n\n"
+    "### Detailed Analysis\n"
+    "- **Current Ratio**: within the industry band.\n"
+    "- **Receivables**: collection cycle slightly above the median.\n\n"
+    "### Recommendations & Action Plan\n"
+    "1. Tighten credit control on overdue receivables. (Priority: High, Timeline: 30 days)\n"
+    "2. Review working capital limits with your bank. (Priority: Medium, Timeline: 60 days)\n"
+)
+
+CATEGORIZATION_RESPONSE = '[{"id": 1, "category": "Expenses", "sub_category": "Other Expenses", ' \
+                          '"confidence": 0.8, "is_tax_deductible": true, "explanation": "Mock categorization"}]'
+
+
+@dataclass
+class MockConfig:
+    latency: str = "lognormal"        # fixed | uniform | normal | lognormal | exponential
+    latency_mean: float = 0.3         # seconds of prefill / time-to-first-token
+    latency_spread: float = 0.5       # stddev (normal), sigma (lognormal) or +/- range (uniform)
+    tokens_per_second: float = 40.0   # decode speed; 0 disables the token delay
+    max_tokens: int = 160             # tokens emitted per reply unless num_predict is lower
+    error_rate: float = 0.0           # probability of an injected error reply
+    error_status: int = 500
+    timeout_rate: float = 0.0         # probability of hanging past the client timeout
+    timeout_seconds: float = 120.0
+    load_seconds: float = 0.0         # cold model load paid when the model is not resident
+    seed: int = None
+
+
+config = MockConfig()
+rng = random.Random()
+stats = {"requests": 0, "errors_injected": 0, "timeouts_injected": 0, "cold_loads": 0}
+resident_until: Dict[str, float] = {}  # model -> monotonic deadline set from each request's keep_alive
+
+app = FastAPI(title="WealthWise Mock LLM", version="1.0.0")
+
+
+def sample_latency() -> float:
+    """Draw a time-to-first-token delay from the configured distribution"""
+    mean, spread = config.latency_mean, config.latency_spread
+    if config.latency == "fixed":
+        value = mean
+    elif config.latency == "uniform":
+        value = rng.uniform(mean - spread, mean + spread)
+    elif config.latency == "normal":
+        value = rng.gauss(mean, spread)
+    elif config.latency == "exponential":
+        value = rng.expovariate(1.0 / mean) if mean > 0 else 0.0
+    else:
+        # lognormal parameterised so that the median equals latency_mean
+        value = mean * rng.lognormvariate(0.0, spread)
+    return max(0.0, value)
+
+
+def tokenize(text: str):
+    """Split a reply into whitespace-preserving pseudo tokens"""
+    tokens, current = [], ""
+    for ch in text:
+        current += ch
+        if ch in " \n":
+            tokens.append(current)
+            current = ""
+    if current:
+        tokens.append(current)
+    return tokens
+
+
+def pick_reply(prompt: str, limit: int):
+    text = CATEGORIZATION_RESPONSE if "JSON array" in prompt else SAMPLE_RESPONSE
+    return tokenize(text)[:max(1, min(limit, config.max_tokens))]
+
+
+async def maybe_inject_failure():
+    """Return an error response (or hang) according to the configured rates"""
+    roll = rng.random()
+    if roll < config.timeout_rate:
+        stats["timeouts_injected"] += 1
+        await asyncio.sleep(config.timeout_seconds)
+        return JSONResponse(status_code=504, content={"error": "injected timeout"})
+    if roll < config.timeout_rate + config.error_rate:
+        stats["errors_injected"] += 1
+        return JSONResponse(status_code=config.error_status, content={"error": "injected failure"})
+    return None
+
+
+async def token_delay():
+    if config.tokens_per_second > 0:
+        await asyncio.sleep(1.0 / config.tokens_per_second)
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def parse_keep_alive(value) -> float:
+    """Ollama keep_alive ("30m", "90s", "1h", seconds as a number, negative = forever)"""
+    if value is None:
+        return 300.0
+    if isinstance(value, (int, float)):
+        return float("inf") if value < 0 else float(value)
+    units = {"s": 1, "m": 60, "h": 3600}
+    value = str(value).strip()
+    if value[-1:] in units:
+        seconds = float(value[:-1]) * units[value[-1]]
+    else:
+        seconds = float(value)
+    return float("inf") if seconds < 0 else seconds
+
+
+async def ensure_loaded(model: str, keep_alive) -> float:
+    """Simulate a cold load if the model was unloaded; returns the load time in seconds"""
+    load = 0.0
+    if time.monotonic() >= resident_until.get(model, 0.0):
+        stats["cold_loads"] += 1
+        load = config.load_seconds
+        await asyncio.sleep(load)
+    resident_until[model] = time.monotonic() + parse_keep_alive(keep_alive)
+    return load
+
+
+# =============================================================================
+# OLLAMA API
+# =============================================================================
+@app.get("/api/tags")
+async def tags():
+    return {"models": [{
+        "name": "gemma:2b",
+        "model": "gemma:2b",
+        "modified_at": now_iso(),
+        "size": 1678456656,
+        "details": {"family": "gemma", "parameter_size": "3B", "quantization_level": "Q4_0"}
+    }]}
+
+
+@app.get("/api/ps")
+async def ps():
+    now = time.monotonic()
+    return {"models": [
+        {"name": model, "model": model, "size": 1678456656}
+        for model, until in resident_until.items() if now < until
+    ]}
+
+
+@app.post("/api/pull")
+async def pull(request: Request):
+    body = await request.json()
+    await asyncio.sleep(sample_latency())
+    return {"status": "success", "model": body.get("name") or body.get("model")}
+
+
+@app.post("/api/generate")
+async def generate(request: Request):
+    stats["requests"] += 1
+    body = await request.json()
+    failure = await maybe_inject_failure()
+    if failure is not None:
+        return failure
+
+    options = body.get("options") or {}
+    tokens = pick_reply(body.get("prompt", ""), int(options.get("num_predict", config.max_tokens)))
+    model = body.get("model", "gemma:2b")
+    started = time.perf_counter()
+    load = await ensure_loaded(model, body.get("keep_alive"))
+    prefill = sample_latency()
+
+    if not body.get("stream", True):
+        await asyncio.sleep(prefill)
+        for _ in tokens:
+            await token_delay()
+        elapsed = time.perf_counter() - started
+        reply = {
+            "model": model,
+            "created_at": now_iso(),
+            "response": "".join(tokens),
+            "done": True,
+            "total_duration": int(elapsed * 1e9),
+            "load_duration": int(load * 1e9),
+            "prompt_eval_count": len(tokenize(body.get("prompt", ""))),
+            "prompt_eval_duration": int(prefill * 1e9),
+            "eval_count": len(tokens),
+            "eval_duration": int((elapsed - prefill) * 1e9)
+        }
+        # Like Ollama, templated (non-raw) calls return the conversation context for reuse
+        if not body.get("raw"):
+            context = list(body.get("context") or [])
+            reply["context"] = context + list(range(reply["prompt_eval_count"] + reply["eval_count"]))
+        return reply
+
+    async def stream():
+        await asyncio.sleep(prefill)
+        for token in tokens:
+            yield json.dumps({"model": model, "created_at": now_iso(), "response": token, "done": False}) + "\n"
+            await token_delay()
+        elapsed = time.perf_counter() - started
+        yield json.dumps({
+            "model": model, "created_at": now_iso(), "response": "", "done": True,
+            "total_duration": int(elapsed * 1e9), "eval_count": len(tokens)
+        }) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+# =============================================================================
+# OPENAI API
+# =============================================================================
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    stats["requests"] += 1
+    body = await request.json()
+    failure = await maybe_inject_failure()
+    if failure is not None:
+        return failure
+
+    prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+    tokens = pick_reply(prompt, int(body.get("max_tokens") or config.max_tokens))
+    model = body.get("model", "gpt-4o")
+    completion_id = f"chatcmpl-mock{rng.randrange(1 << 32):08x}"
+    created = int(time.time())
+    prefill = sample_latency()
+
+    if not body.get("stream", False):
+        await asyncio.sleep(prefill)
+        for _ in tokens:
+            await token_delay()
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens)},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": len(tokenize(prompt)),
+                "completion_tokens": len(tokens),
+                "total_tokens": len(tokenize(prompt)) + len(tokens)
+            }
+        }
+
+    async def stream():
+        await asyncio.sleep(prefill)
+        for token in tokens:
+            chunk = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await token_delay()
+        final = {
+            "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+        }
+        yield f"data: {json.dumps(final)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+@app.get("/mock/stats")
+async def mock_stats():
+    return {**stats, "config": config.__dict__}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Mock Ollama/OpenAI server for load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", default=config.latency,
+                        choices=["fixed", "uniform", "normal", "lognormal", "exponential"])
+    parser.add_argument("--latency-mean", type=float, default=config.latency_mean)
+    parser.add_argument("--latency-spread", type=float, default=config.latency_spread)
+    parser.add_argument("--tokens-per-second", type=float, default=config.tokens_per_second)
+    parser.add_argument("--max-tokens", type=int, default=config.max_tokens)
+    parser.add_argument("--error-rate", type=float, default=config.error_rate)
+    parser.add_argument("--error-status", type=int, default=config.error_status)
+    parser.add_argument("--timeout-rate", type=float, default=config.timeout_rate)
+    parser.add_argument("--timeout-seconds", type=float, default=config.timeout_seconds)
+    parser.add_argument("--load-seconds", type=float, default=config.load_seconds)
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+def configure(args):
+    for field in MockConfig.__dataclass_fields__:
+        setattr(config, field, getattr(args, field))
+    rng.seed(config.seed)
+
+
+if __name__ == "__main__":
+    cli_args = parse_args()
+    configure(cli_args)
+    uvicorn.run(app, host=cli_args.host, port=cli_args.port, log_level="warning")
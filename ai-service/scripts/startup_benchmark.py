@@ -0,0 +1,168 @@
+"""
+Cold-start benchmark for the AI service and the forecasting service.
+
+For each service it measures, in fresh processes:
+- import time of `main` (median over --runs interpreter launches)
+- time from process launch until the port accepts connections
+- time until the first successful real request
+- time until /ready returns 200 (background warm-up finished)
+
+Each measurement is checked against a budget, and the script exits 1 if any budget
+is exceeded, so CI can run it as a gate:
+    python scripts/startup_benchmark.py --services ai,forecast --import-budget-ms 1000 --first-request-budget-ms 3000
+
+Services run from a temporary working directory so their caches, logs and job
+databases do not touch the source tree. The AI service runs with
+OLLAMA_WARMUP=false and without a reachable LLM, so the probe uses the
+heuristic-first credit analysis (?narrative=async).
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(SERVICE_DIR)
+
+SERVICES = {
+    "ai": {
+        "dir": SERVICE_DIR,
+        "env": {"OLLAMA_WARMUP": "false", "OLLAMA_BASE_URL": "http://127.0.0.1:9", "OPENAI_API_KEY": ""},
+        "probe": ("POST", "/api/v1/ai/credit-analysis?narrative=async", {
+            "business_name": "Sharma Textiles",
+            "industry_type": "MANUFACTURING",
+            "annual_turnover": 12500000,
+            "credit_score": 712,
+            "current_ratio": 1.3,
+            "debt_equity_ratio": 1.1,
+            "profit_margin": 7.5,
+            "language": "en"
+        }),
+    },
+    "forecast": {
+        "dir": os.path.join(REPO_DIR, "python-ai-service"),
+        "env": {},
+        "probe": ("POST", "/api/v1/forecast", {
+            "businessId": "startup-benchmark",
+            "history": [
+                {"date": f"2024-{m:02d}-{d:02d}", "amount": 5000 + d * 10, "type": "CREDIT" if d % 3 else "DEBIT"}
+                for m in (1, 2, 3) for d in range(1, 29)
+            ],
+            "commitments": [],
+            "horizon": 30
+        }),
+    },
+}
+
+IMPORT_SNIPPET = "import sys, time; sys.path.insert(0, sys.argv[1]); t = time.perf_counter(); import main; " \
+                 "print((time.perf_counter() - t) * 1000)"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_import(service: dict, workdir: str, runs: int) -> float:
+    env = {**os.environ, **service["env"]}
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET, service["dir"]],
+            cwd=workdir, env=env, capture_output=True, text=True, check=True
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def measure_cold_start(service: dict, workdir: str, timeout: float) -> dict:
+    """Launch uvicorn and time port-open, first successful probe and readiness"""
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    method, path, payload = service["probe"]
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", service["dir"],
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env={**os.environ, **service["env"]}
+    )
+    result = {"port_open_ms": None, "first_request_ms": None, "ready_ms": None}
+    try:
+        deadline = started + timeout
+        with httpx.Client(timeout=30.0) as client:
+            while time.perf_counter() < deadline and proc.poll() is None:
+                elapsed = round((time.perf_counter() - started) * 1000, 1)
+                try:
+                    if result["port_open_ms"] is None:
+                        client.get(f"{base}/health")
+                        result["port_open_ms"] = elapsed
+                    if result["first_request_ms"] is None:
+                        response = client.request(method, f"{base}{path}", json=payload)
+                        if response.status_code == 200:
+                            result["first_request_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                    if result["ready_ms"] is None and client.get(f"{base}/ready").status_code == 200:
+                        result["ready_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                except httpx.TransportError:
+                    pass
+                if None not in result.values():
+                    break
+                time.sleep(0.02)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure cold-start time of the WealthWise Python services")
+    parser.add_argument("--services", default=",".join(SERVICES), help=f"Comma separated subset of: {', '.join(SERVICES)}")
+    parser.add_argument("--runs", type=int, default=3, help="Interpreter launches for the import measurement")
+    parser.add_argument("--import-budget-ms", type=float, default=1000.0)
+    parser.add_argument("--first-request-budget-ms", type=float, default=3000.0)
+    parser.add_argument("--ready-budget-ms", type=float, default=None, help="Optional budget for /ready")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for a service")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    budgets = {
+        "import_ms": args.import_budget_ms,
+        "first_request_ms": args.first_request_budget_ms,
+        "ready_ms": args.ready_budget_ms,
+    }
+    report, failures = {}, []
+    for name in [s.strip() for s in args.services.split(",") if s.strip()]:
+        service = SERVICES[name]
+        with tempfile.TemporaryDirectory(prefix=f"startup-{name}-") as workdir:
+            result = {"import_ms": round(measure_import(service, workdir, args.runs), 1)}
+            result.update(measure_cold_start(service, workdir, args.timeout))
+        for metric, budget in budgets.items():
+            if budget is None:
+                continue
+            value = result.get(metric)
+            if value is None or value > budget:
+                failures.append(f"{name}.{metric} = {value} ms (budget {budget:.0f} ms)")
+        report[name] = result
+
+    report["budgets"] = budgets
+    report["failures"] = failures
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if failures:
+        print("Startup budget exceeded:\n  " + "\n  ".join(failures), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
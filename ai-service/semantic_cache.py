@@ -0,0 +1,247 @@
+"""
+Lexical near-duplicate cache for free-text chat and advice answers.
+
+Queries are normalised and embedded on the CPU with hashed word and character
+n-gram features (no model download). This catches rewordings that share most of
+their words (stopwords, punctuation, word order), not paraphrases, so the
+similarity threshold is kept high. Answers are partitioned by language, a bucketed
+signature of the financial context and every number, date and month in the query:
+questions about different amounts, ratios or periods can never share an entry.
+Within a partition, candidates come from a random-hyperplane LSH index and are
+confirmed with an exact cosine similarity check against the threshold.
+"""
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.97"))
+SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", str(24 * 3600)))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "5000"))
+
+STOPWORDS = frozenset(
+    "a an the i me my we our you your is are am be to of for in on at by and or it "
+    "this that can could should would do does how what please tell about".split()
+)
+_NON_WORD = re.compile(r"[^\w\s]+", re.UNICODE)
+_SPACES = re.compile(r"\s+")
+# Numbers (with thousands separators and decimals), e.g. 5, 1,00,000, 0.8, 2024
+_NUMBER = re.compile(r"(?<![a-z\d])\d+(?:[,.]\d+)*")
+_MONTHS = {
+    m[:3]: m for m in (
+        "january february march april may june july august september october november december"
+    ).split()
+}
+_PERIOD = re.compile(r"\b(?:q[1-4]|fy\d{2,4}|h[12])\b")
+
+
+def _canonical_number(token: str) -> str:
+    """`1,00,000` -> `100000`, `0.80` -> `0.8`; commas are read as thousands separators"""
+    parts = token.replace(",", "").split(".")
+    if len(parts) != 2:
+        return ".".join(p.lstrip("0") or "0" for p in parts)  # integers, or dotted dates like 01.02.2024
+    whole, fraction = parts[0].lstrip("0") or "0", parts[1].rstrip("0")
+    return f"{whole}.{fraction}" if fraction else whole
+
+
+def exact_terms(text: str) -> List[str]:
+    """Numbers, months and fiscal periods in a query; these must match exactly for a cache hit"""
+    lowered = text.lower()
+    terms = [_canonical_number(t) for t in _NUMBER.findall(lowered)]
+    terms.extend(_MONTHS[w[:3]] for w in re.findall(r"[a-z]+", lowered)
+                 if w[:3] in _MONTHS and _MONTHS[w[:3]].startswith(w) and len(w) >= 3)
+    terms.extend(_PERIOD.findall(lowered))
+    return sorted(set(terms))
+
+
+def normalize_query(text: str) -> str:
+    text = _NUMBER.sub(lambda m: _canonical_number(m.group()), text.lower())
+    text = _NON_WORD.sub(" ", text)
+    words = [w for w in _SPACES.split(text) if w and w not in STOPWORDS]
+    return " ".join(words)
+
+
+def _bucket_number(value: float) -> str:
+    """Quarter-decade log bucket: values within roughly x1.8 of each other share a bucket"""
+    if value == 0 or not math.isfinite(value):
+        return "0"
+    sign = "-" if value < 0 else ""
+    return f"{sign}e{round(math.log10(abs(value)) * 4) / 4:g}"
+
+
+def bucket_summary(payload: Any, prefix: str = "") -> List[str]:
+    """Flatten a context/summary dict into sorted `path=bucket` tokens"""
+    items = []
+    if isinstance(payload, dict):
+        for key in sorted(payload):
+            items.extend(bucket_summary(payload[key], f"{prefix}{key}."))
+    elif isinstance(payload, (list, tuple)):
+        items.append(f"{prefix}len={len(payload)}")
+    elif isinstance(payload, bool):
+        items.append(f"{prefix[:-1]}={payload}")
+    elif isinstance(payload, (int, float)):
+        items.append(f"{prefix[:-1]}={_bucket_number(float(payload))}")
+    elif payload is not None:
+        items.append(f"{prefix[:-1]}={str(payload).strip().lower()[:40]}")
+    return items
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        dim: int = 512,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        ttl: int = SEMANTIC_CACHE_TTL,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        num_tables: int = 8,
+        num_bits: int = 10,
+        enabled: bool = SEMANTIC_CACHE_ENABLED,
+        seed: int = 7
+    ):
+        self.dim = dim
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal((num_tables, num_bits, dim)).astype(np.float32)
+        self._bit_weights = (1 << np.arange(num_bits)).astype(np.int64)
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._created = np.zeros(max_entries, dtype=np.float64)
+        self._slots: List[Optional[Dict[str, Any]]] = [None] * max_entries
+        self._tables = [defaultdict(set) for _ in range(num_tables)]
+        self._next_slot = 0
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------ embedding
+    def embed(self, normalized: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        words = normalized.split()
+        features = list(words)
+        features.extend(f"{a}_{b}" for a, b in zip(words, words[1:]))
+        for word in words:
+            padded = f"<{word}>"
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        for feature in features:
+            h = zlib.crc32(feature.encode("utf-8"))
+            vec[h % self.dim] += 1.0 if (h >> 16) & 1 else -1.0
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else vec
+
+    def _signatures(self, vec: np.ndarray) -> np.ndarray:
+        bits = (np.einsum("tbd,d->tb", self._planes, vec) > 0).astype(np.int64)
+        return bits @ self._bit_weights
+
+    @staticmethod
+    def scope(endpoint: str, language: str, payload: Any, query: str = "") -> str:
+        return f"{endpoint}|{language}|{'&'.join(bucket_summary(payload or {}))}|{','.join(exact_terms(query))}"
+
+    # ------------------------------------------------------------------ index ops
+    def _evict(self, slot: int):
+        entry = self._slots[slot]
+        if entry is None:
+            return
+        for table, sig in zip(self._tables, entry["signatures"]):
+            key = (entry["scope"], int(sig))
+            bucket = table.get(key)
+            if bucket is not None:
+                bucket.discard(slot)
+                if not bucket:
+                    del table[key]
+        self._slots[slot] = None
+        self._created[slot] = 0.0
+
+    def lookup(self, endpoint: str, query: str, language: str, payload: Any) -> Optional[str]:
+        if not self.enabled:
+            return None
+        normalized = normalize_query(query)
+        if not normalized:
+            return None
+        scope = self.scope(endpoint, language, payload, query)
+        vec = self.embed(normalized)
+        sigs = self._signatures(vec)
+        now = time.time()
+
+        with self._lock:
+            # Buckets are keyed by (scope, signature) so only same-scope entries become candidates
+            candidates = set()
+            for table, sig in zip(self._tables, sigs):
+                candidates |= table.get((scope, int(sig)), set())
+
+            best_slot = None
+            if candidates:
+                ids = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+                expired = ids[self._created[ids] < now - self.ttl]
+                for slot in expired.tolist():
+                    self._evict(slot)
+                ids = ids[self._created[ids] >= now - self.ttl]
+                if len(ids):
+                    scores = self._vectors[ids] @ vec
+                    top = int(np.argmax(scores))
+                    if scores[top] >= self.threshold:
+                        best_slot = int(ids[top])
+
+            if best_slot is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._slots[best_slot]["answer"]
+
+    def store(self, endpoint: str, query: str, language: str, payload: Any, answer: str):
+        if not self.enabled or not answer:
+            return
+        normalized = normalize_query(query)
+        if not normalized:
+            return
+        vec = self.embed(normalized)
+        sigs = self._signatures(vec)
+
+        with self._lock:
+            # Ring buffer: with a uniform TTL the slot being reused is always the oldest entry
+            slot = self._next_slot
+            self._next_slot = (slot + 1) % self.max_entries
+            self._evict(slot)
+            scope = self.scope(endpoint, language, payload, query)
+            self._vectors[slot] = vec
+            self._created[slot] = time.time()
+            self._slots[slot] = {"scope": scope, "answer": answer, "signatures": sigs}
+            for table, sig in zip(self._tables, sigs):
+                table[(scope, int(sig))].add(slot)
+
+    def purge_expired(self) -> int:
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            live = np.array([e is not None for e in self._slots])
+            stale = np.flatnonzero(live & (self._created < cutoff))
+            for slot in stale.tolist():
+                self._evict(slot)
+        return len(stale)
+
+    def clear(self) -> int:
+        with self._lock:
+            count = sum(1 for e in self._slots if e is not None)
+            self._slots = [None] * self.max_entries
+            self._created[:] = 0.0
+            self._tables = [defaultdict(set) for _ in self._tables]
+            self._next_slot = 0
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": sum(1 for e in self._slots if e is not None),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "threshold": self.threshold
+        }
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+# Importing main must not reach for Ollama or write traces into the source tree
+os.environ.setdefault("OLLAMA_WARMUP", "false")
+os.environ.setdefault("OLLAMA_BASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("OPENAI_API_KEY", "")
+os.environ.setdefault("TRACE_EXPORTER", "none")
+
+
+@pytest.fixture(scope="session")
+def main_module(tmp_path_factory):
+    """The service module, imported from a scratch directory so caches and logs stay out of the tree"""
+    os.chdir(tmp_path_factory.mktemp("service"))
+    import main
+    return main
@@ -0,0 +1,109 @@
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from anomaly_detector import AnomalyDetector
+
+
+def rows(n, amount=1000.0, start=0):
+    return [
+        {"id": i, "date": f"2024-{1 + i // 28 % 12:02d}-{1 + i % 28:02d}", "amount": amount + (i % 7) * 10,
+         "type": "DEBIT", "category": "rent"}
+        for i in range(start, start + n)
+    ]
+
+
+def test_flags_an_outlier_after_warm_up():
+    detector = AnomalyDetector(path="")
+    detector.score("b1", rows(40))
+    result = detector.score("b1", [{"id": 99, "amount": 90000.0, "type": "DEBIT", "category": "rent"}], learn=False)
+    assert result["results"][0]["is_anomaly"]
+    assert result["results"][0]["direction"] == "high"
+
+
+def test_read_only_scoring_creates_and_evicts_nothing():
+    detector = AnomalyDetector(path="", max_businesses=2)
+    detector.score("real", rows(20))
+    before = detector.info("real")
+    for unknown in ("x1", "x2", "x3"):
+        result = detector.score(unknown, rows(3), learn=False)
+        assert not result["applied"]
+        assert detector.info(unknown) is None
+    assert detector.info("real") == before
+
+
+def test_delta_id_is_applied_once():
+    detector = AnomalyDetector(path="")
+    first = detector.score("b1", rows(5), delta_id="d1")
+    again = detector.score("b1", rows(5), delta_id="d1")
+    assert first["applied"] and not again["applied"]
+    assert detector.info("b1")["transactions"] == 5
+
+
+def test_state_survives_save_and_load(tmp_path):
+    path = str(tmp_path / "state.json")
+    detector = AnomalyDetector(path=path)
+    detector.load()
+    detector.score("b1", rows(30), delta_id="d1")
+    assert detector.dirty
+    assert detector.save() == 1
+    assert not detector.dirty
+
+    probe = rows(3, amount=5000.0, start=30)
+    expected = detector.score("b1", probe, learn=False)["results"]
+    restored = AnomalyDetector(path=path)
+    assert restored.load() == 1
+    assert restored.score("b1", probe, learn=False)["results"] == expected
+    assert not restored.score("b1", rows(30), delta_id="d1")["applied"]
+
+
+def test_save_before_restore_keeps_the_file(tmp_path):
+    path = tmp_path / "state.json"
+    saved = AnomalyDetector(path=str(path))
+    saved.load()
+    saved.score("b1", rows(30))
+    saved.save()
+    snapshot = json.loads(path.read_text())
+
+    starting = AnomalyDetector(path=str(path))
+    assert not starting.restored
+    assert starting.save() == 0
+    assert json.loads(path.read_text()) == snapshot
+
+
+def test_unreadable_state_file_still_finishes_restore(tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text("{not json")
+    detector = AnomalyDetector(path=str(path))
+    assert detector.load() == 0
+    assert detector.restored
+
+
+@pytest.fixture
+def client(main_module):
+    with TestClient(main_module.app) as c:
+        deadline = time.monotonic() + 10
+        while not main_module.startup_task.done() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        yield c
+
+
+def test_per_business_endpoints_wait_for_restore(main_module, client, monkeypatch):
+    monkeypatch.setattr(main_module.anomaly_detector, "restored", False)
+    tx = {"transactions": [{"date": "2024-01-01", "amount": 100, "description": "rent", "type": "DEBIT"}]}
+    assert client.post("/api/v1/anomalies/b1/transactions", json=tx).status_code == 503
+    assert client.get("/api/v1/anomalies/b1").status_code == 503
+    # A self-contained batch needs no stored state
+    assert client.post("/api/v1/anomalies/score", json=tx).status_code == 200
+
+
+def test_delta_endpoint_learns_and_unknown_business_is_404(main_module, client):
+    tx = [{"date": f"2024-01-{d:02d}", "amount": 100 + d, "description": "rent", "type": "DEBIT"} for d in range(1, 21)]
+    response = client.post("/api/v1/anomalies/t1/transactions", json={"transactions": tx, "deltaId": "d1"})
+    assert response.status_code == 200
+    assert client.get("/api/v1/anomalies/t1").json()["transactions"] == 20
+    read_only = {"business_id": "never-seen", "learn": False, "transactions": tx[:2]}
+    assert client.post("/api/v1/anomalies/score", json=read_only).status_code == 200
+    assert client.get("/api/v1/anomalies/never-seen").status_code == 404
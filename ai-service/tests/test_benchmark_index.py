@@ -0,0 +1,36 @@
+import json
+
+from benchmark_index import BenchmarkIndex, INDUSTRY_BENCHMARKS, summary_distributions
+
+
+def write_index(path, observed):
+    distributions = summary_distributions(INDUSTRY_BENCHMARKS)
+    distributions["RETAIL"]["current_ratio"] = sorted(0.5 + i * 0.05 for i in range(40))
+    path.write_text(json.dumps({"version": "t", "observed": observed, "distributions": distributions}))
+
+
+def test_only_observed_series_are_exact(tmp_path):
+    path = tmp_path / "index.json"
+    write_index(path, {"RETAIL": ["current_ratio"]})
+    index = BenchmarkIndex(path=str(path))
+    assert not index.estimated("RETAIL", "current_ratio")
+    assert index.estimated("RETAIL", "debt_equity")
+    assert index.info()["observed_series"] == 1
+
+
+def test_builtin_and_legacy_indexes_are_estimated(tmp_path):
+    assert BenchmarkIndex(path=str(tmp_path / "missing.json"), fallback=INDUSTRY_BENCHMARKS).estimated("RETAIL", "roe")
+    path = tmp_path / "legacy.json"
+    write_index(path, None)
+    assert BenchmarkIndex(path=str(path)).estimated("RETAIL", "current_ratio")
+
+
+def test_credit_analysis_labels_estimated_percentiles(main_module):
+    request = main_module.CreditAnalysisRequest(
+        business_name="Acme", industry_type="RETAIL", annual_turnover=5_000_000, credit_score=700,
+        current_ratio=0.9, debt_equity_ratio=1.5, profit_margin=2.0
+    )
+    result = main_module.analyze_credit_heuristic(request)
+    assert set(result.estimated_percentiles) == set(result.industry_percentiles)
+    assert "est. P" in result.industry_comparison
+    assert any("est. P" in factor for factor in result.risk_factors)
@@ -0,0 +1,31 @@
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from bulk_input import HistoryColumns, history_frame_from_columns
+
+
+def test_history_columns_normalise_and_check_types():
+    frame = history_frame_from_columns(HistoryColumns(
+        date=["2024-01-01", "2024-01-02"], amount=[10.0, 5.0], type=[" credit", "Debit "]
+    ))
+    assert frame["type"].tolist() == ["CREDIT", "DEBIT"]
+
+    with pytest.raises(HTTPException) as e:
+        history_frame_from_columns(HistoryColumns(date=["2024-01-01"], amount=[1.0], type=["REFUND"]))
+    assert e.value.status_code == 422
+
+
+def test_history_points_use_the_same_type_rules(main_module):
+    assert main_module.HistoryPoint(date="2024-01-01", amount=1.0, type=" credit").type == "CREDIT"
+    with pytest.raises(ValidationError):
+        main_module.HistoryPoint(date="2024-01-01", amount=1.0, type="REFUND")
+
+
+def test_history_baselines_count_lowercase_rows(main_module):
+    request = main_module.AdvancedForecastRequest(
+        businessId="a", commitments=[], horizon=3,
+        history=[{"date": "2024-01-01", "amount": 100.0, "type": "credit"},
+                 {"date": "2024-01-02", "amount": 40.0, "type": "debit"}],
+    )
+    assert main_module.history_baselines(request) == (100.0, 40.0)
@@ -0,0 +1,19 @@
+import pytest
+
+from feedback_writer import redact
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("write to a.b+c@example.co.in", "write to [EMAIL]"),
+    ("GSTIN 27AAPFU0939F1ZV, PAN ABCDE1234F", "GSTIN [GSTIN], PAN [PAN]"),
+    ("IFSC HDFC0001234 account 50100234567890", "IFSC [IFSC] account [ACCOUNT]"),
+    ("aadhaar 1234 5678 9012", "aadhaar [AADHAAR]"),
+    ("call +91 9876543210", "call [PHONE]"),
+])
+def test_redact_masks_identifiers(text, expected):
+    assert redact(text) == expected
+
+
+def test_redact_keeps_amounts_and_periods():
+    text = "Revenue was 1,50,000 in FY24 and 2500000.50 over 12 months"
+    assert redact(text) == text
@@ -0,0 +1,115 @@
+import asyncio
+import time
+
+from job_queue import CANCELLED, DONE, FAILED, PENDING, JobQueue
+
+
+async def wait_for_status(queue, job_id, *statuses, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = await queue.get(job_id, include_payload=True)
+        if job["status"] in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"{job_id} is {job['status']}, expected {statuses}")
+
+
+def make_queue(tmp_path, workers=1):
+    queue = JobQueue(path=str(tmp_path / "jobs.sqlite3"), workers=workers)
+
+    async def echo(params, ctx):
+        return params
+
+    async def block(params, ctx):
+        await asyncio.Event().wait()
+
+    queue.register("echo", echo)
+    queue.register("block", block)
+    return queue
+
+
+def test_cancel_right_after_submit_keeps_the_worker(tmp_path):
+    async def scenario():
+        queue = make_queue(tmp_path)
+        await queue.start()
+        try:
+            job = await queue.submit("echo", {"n": 1})
+            cancelled = await queue.cancel(job["id"])
+            assert cancelled["status"] == CANCELLED
+            follow_up = await queue.submit("echo", {"n": 2})
+            done = await wait_for_status(queue, follow_up["id"], DONE)
+            assert done["result"] == {"n": 2}
+            assert (await queue.get(job["id"]))["status"] == CANCELLED
+        finally:
+            await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_cancel_running_job(tmp_path):
+    async def scenario():
+        queue = make_queue(tmp_path)
+        await queue.start()
+        try:
+            job = await queue.submit("block", {})
+            while job["id"] not in queue._running:
+                await asyncio.sleep(0.01)
+            await queue.cancel(job["id"])
+            await wait_for_status(queue, job["id"], CANCELLED)
+            follow_up = await queue.submit("echo", {})
+            await wait_for_status(queue, follow_up["id"], DONE)
+        finally:
+            await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_job_without_handler_fails(tmp_path):
+    async def scenario():
+        queue = make_queue(tmp_path)
+        await queue.start()
+        try:
+            job = await queue.submit("echo", {})
+            del queue._handlers["echo"]
+            failed = await wait_for_status(queue, job["id"], FAILED, DONE)
+            assert failed["status"] == FAILED and "No handler" in failed["error"]
+        finally:
+            await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_restart_requeues_unfinished_and_purges_old_jobs(tmp_path):
+    async def scenario():
+        queue = make_queue(tmp_path)
+        await queue.start()
+        running = await queue.submit("block", {})
+        await wait_for_status(queue, running["id"], "running")
+        await queue.stop()
+
+        # Cancelled while down, plus a finished job past retention
+        stale = "job_stale"
+        queue._execute(
+            "INSERT INTO jobs (id, kind, status, created_at, finished_at) VALUES (?, ?, ?, ?, ?)",
+            (stale, "echo", DONE, 0.0, 1.0)
+        )
+        cancelled = "job_cancelled"
+        queue._execute(
+            "INSERT INTO jobs (id, kind, status, created_at, cancel_requested) VALUES (?, ?, ?, ?, 1)",
+            (cancelled, "echo", PENDING, time.time())
+        )
+        queue._conn.close()
+        queue._conn = None
+
+        restarted = make_queue(tmp_path)
+        restarted.register("block", restarted._handlers["echo"])
+        await restarted.start()
+        try:
+            done = await wait_for_status(restarted, running["id"], DONE)
+            assert done["message"] == "requeued after restart"
+            assert (await restarted.get(cancelled))["status"] == CANCELLED
+            assert await restarted.get(stale) is None
+        finally:
+            await restarted.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from llm_cache import CompletionCache
+from model_router import ModelRouter
+
+MODELS = ["small", "mid", "large"]
+
+
+def slow_down(router, model, seconds=20.0, prompt_tokens=100):
+    """Record one call on `model` that took `seconds`, enough to break the default SLO"""
+    started = router.begin(model)
+    router.finish(model, started - seconds, prompt_tokens, True)
+
+
+def decision_count(router):
+    return sum(router.decisions.values())
+
+
+def test_preferred_records_nothing_and_ignores_slo():
+    router = ModelRouter(MODELS, "mid")
+    slow_down(router, "mid")
+    assert router.preferred("chat", 100) == "mid"
+    assert decision_count(router) == 0
+    assert router.route("chat", 100) == "small"
+    assert router.decisions["chat|small|slo"] == 1
+
+
+def test_long_prompts_step_down_one_tier():
+    router = ModelRouter(MODELS, "mid", long_prompt_tokens=500)
+    assert router.preferred("credit", 100) == "large"
+    assert router.preferred("credit", 1000) == "mid"
+
+
+@pytest.fixture
+def ollama(main_module, monkeypatch, tmp_path):
+    """call_ollama against a fresh router and cache, with a fake generate that counts calls"""
+    calls = []
+
+    async def fake_generate(full_prompt, options, context=None, endpoint="default", model=None, **kwargs):
+        calls.append(model)
+        return {"response": f"answer from {model}"}
+
+    router = ModelRouter(MODELS, "mid")
+    monkeypatch.setattr(main_module, "model_router", router)
+    monkeypatch.setattr(main_module, "completion_cache", CompletionCache(path=str(tmp_path / "llm.sqlite3")))
+    monkeypatch.setattr(main_module, "ollama_generate", fake_generate)
+    return main_module, router, calls
+
+
+def test_cache_hit_is_not_a_routing_decision(ollama):
+    main, router, calls = ollama
+    first = asyncio.run(main.call_ollama("How is my cash flow?", endpoint="chat"))
+    assert first == "answer from mid" and calls == ["mid"]
+    assert decision_count(router) == 1
+
+    again = asyncio.run(main.call_ollama("How is my cash flow?", endpoint="chat"))
+    assert again == first and calls == ["mid"]
+    assert decision_count(router) == 1
+
+
+def test_cached_answer_of_preferred_model_survives_an_slo_step_down(ollama):
+    main, router, calls = ollama
+    asyncio.run(main.call_ollama("How is my cash flow?", endpoint="chat"))
+    slow_down(router, "mid")
+
+    # Cached: served from the preferred model's entry, no step-down recorded
+    assert asyncio.run(main.call_ollama("How is my cash flow?", endpoint="chat")) == "answer from mid"
+    assert router.decisions["chat|small|slo"] == 0
+
+    # Not cached: routed to the smaller model
+    assert asyncio.run(main.call_ollama("What is my runway?", endpoint="chat")) == "answer from small"
+    assert calls == ["mid", "small"]
+    assert router.decisions["chat|small|slo"] == 1
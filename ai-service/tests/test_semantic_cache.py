@@ -0,0 +1,45 @@
+import pytest
+
+from semantic_cache import SemanticCache, exact_terms
+
+ANSWER = "stored answer"
+
+
+@pytest.fixture
+def cache():
+    return SemanticCache(max_entries=64, enabled=True)
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("How do I claim GST input credit for March 2024?", "How do I claim GST input credit for March 2023?"),
+    ("Can I get a working capital loan of 5 lakh?", "Can I get a working capital loan of 50 lakh?"),
+    ("Is a current ratio of 0.8 healthy?", "Is a current ratio of 1.8 healthy?"),
+    ("What should my GST liability be for March?", "What should my GST liability be for April?"),
+    ("Cash flow outlook for Q1", "Cash flow outlook for Q2"),
+])
+def test_queries_differing_in_numbers_or_periods_never_share_an_entry(cache, stored, asked):
+    cache.store("chat", stored, "en", {}, ANSWER)
+    assert cache.lookup("chat", asked, "en", {}) is None
+    assert cache.lookup("chat", stored, "en", {}) == ANSWER
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("How can I improve my cash flow?", "how do I improve cash flow"),
+    ("Loan of 1,00,000 for my shop?", "loan of 100000 for shop"),
+])
+def test_rewordings_with_the_same_terms_hit(cache, stored, asked):
+    cache.store("chat", stored, "en", {}, ANSWER)
+    assert cache.lookup("chat", asked, "en", {}) == ANSWER
+
+
+def test_scope_separates_language_endpoint_and_business_size(cache):
+    query = "How can I improve my cash flow?"
+    cache.store("advice", query, "en", {"revenue": 100000}, ANSWER)
+    assert cache.lookup("advice", query, "hi", {"revenue": 100000}) is None
+    assert cache.lookup("chat", query, "en", {"revenue": 100000}) is None
+    assert cache.lookup("advice", query, "en", {"revenue": 5000000}) is None
+    assert cache.lookup("advice", query, "en", {"revenue": 110000}) == ANSWER
+
+
+def test_exact_terms_are_canonical():
+    assert exact_terms("1,00,000 in Sept, FY24 and 0.80") == ["0.8", "100000", "fy24", "september"]
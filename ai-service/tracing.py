@@ -0,0 +1,276 @@
+"""
+Lightweight distributed tracing with W3C trace-context propagation.
+
+Incoming `traceparent` headers continue the caller's trace (the Spring backend sends
+one on every AI call); requests without one start a new trace. Spans nest through a
+context variable, so a span opened in a handler becomes the parent of the spans
+opened by the helpers it awaits. The sampling decision is made once per trace (an
+upstream decision in `traceparent` wins) and unsampled spans only carry ids, so
+TRACE_SAMPLE_RATE bounds the overhead under load. Finished spans are queued and
+written in batches by a background thread to a pluggable exporter: JSONL file,
+console (logging), none, or any `module:Class` implementing SpanExporter.
+"""
+import contextvars
+import functools
+import importlib
+import inspect
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "wealthwise-ai-service")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))  # share of new traces recorded
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "file")  # file | console | none | module:Class
+TRACE_FILE_PATH = os.getenv("TRACE_FILE_PATH", "logs/traces.jsonl")
+TRACE_FLUSH_INTERVAL = float(os.getenv("TRACE_FLUSH_INTERVAL", "2.0"))  # seconds
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "10000"))  # finished spans buffered before dropping
+
+_TRACEPARENT = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class SpanContext:
+    __slots__ = ("trace_id", "span_id", "sampled")
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[SpanContext]:
+    match = _TRACEPARENT.match((header or "").strip().lower())
+    if match is None or match.group(1) == "ff":
+        return None
+    trace_id, span_id = match.group(2), match.group(3)
+    if trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return SpanContext(trace_id, span_id, bool(int(match.group(4), 16) & 1))
+
+
+class Span:
+    __slots__ = ("name", "context", "parent_id", "kind", "start", "_started", "duration_ms", "attributes", "error")
+
+    def __init__(self, name: str, context: SpanContext, parent_id: Optional[str], kind: str):
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.attributes: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+
+    def set(self, key: str, value: Any):
+        if self.context.sampled:
+            self.attributes[key] = value
+
+    def traceparent(self) -> str:
+        return self.context.traceparent()
+
+    def finish(self):
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "service": TRACE_SERVICE_NAME,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+# ---------------------------------------------------------------------- exporters
+class SpanExporter:
+    """Receives batches of finished, sampled spans (as dicts) from the background thread"""
+
+    def export(self, spans: List[Dict[str, Any]]):
+        raise NotImplementedError
+
+    def shutdown(self):
+        pass
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends one JSON object per span to a local file"""
+
+    def __init__(self, path: str = TRACE_FILE_PATH):
+        self.path = path
+
+    def export(self, spans: List[Dict[str, Any]]):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(s, separators=(",", ":"), default=str) + "\n" for s in spans))
+
+
+class ConsoleSpanExporter(SpanExporter):
+    def export(self, spans: List[Dict[str, Any]]):
+        for s in spans:
+            logger.info(
+                f"span {s['name']} trace={s['trace_id']} span={s['span_id']} parent={s['parent_id']} "
+                f"{s['duration_ms']} ms {json.dumps(s['attributes'], default=str)}"
+                + (f" error={s['error']}" if s["error"] else "")
+            )
+
+
+class NoopSpanExporter(SpanExporter):
+    def export(self, spans: List[Dict[str, Any]]):
+        pass
+
+
+def load_exporter(spec: str = TRACE_EXPORTER) -> SpanExporter:
+    if spec == "file":
+        return FileSpanExporter()
+    if spec == "console":
+        return ConsoleSpanExporter()
+    if spec in ("none", ""):
+        return NoopSpanExporter()
+    module, _, name = spec.partition(":")
+    return getattr(importlib.import_module(module), name)()
+
+
+# ---------------------------------------------------------------------- tracer
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+class Tracer:
+    def __init__(self, exporter: Optional[SpanExporter] = None, sample_rate: float = TRACE_SAMPLE_RATE,
+                 flush_interval: float = TRACE_FLUSH_INTERVAL, queue_size: int = TRACE_QUEUE_SIZE):
+        self.exporter = exporter if exporter is not None else load_exporter()
+        self.sample_rate = sample_rate
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.exported = 0
+        self.dropped = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def current(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def traceparent(self) -> Optional[str]:
+        """Header value for outgoing calls made inside the current span"""
+        span = _current_span.get()
+        return span.traceparent() if span is not None else None
+
+    def start_span(self, name: str, parent: Optional[SpanContext] = None, kind: str = "internal") -> Span:
+        if parent is None:
+            current = _current_span.get()
+            parent = current.context if current is not None else None
+        if parent is not None:
+            context = SpanContext(parent.trace_id, f"{random.getrandbits(64):016x}", parent.sampled)
+            return Span(name, context, parent.span_id, kind)
+        sampled = self.sample_rate >= 1.0 or random.random() < self.sample_rate
+        context = SpanContext(f"{random.getrandbits(128):032x}", f"{random.getrandbits(64):016x}", sampled)
+        return Span(name, context, None, kind)
+
+    def end_span(self, span: Span):
+        span.finish()
+        if not span.context.sampled:
+            return
+        with self._lock:
+            if len(self._buffer) >= self.queue_size:
+                self.dropped += 1
+                return
+            self._buffer.append(span.to_dict())
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[SpanContext] = None, kind: str = "internal", **attributes):
+        """Open a span as the current one for the enclosed block (sync or async code)"""
+        span = self.start_span(name, parent, kind)
+        for key, value in attributes.items():
+            span.set(key, value)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+    def annotate(self, **attributes):
+        """Set attributes on the current span (no-op outside a span or when unsampled)"""
+        span = _current_span.get()
+        if span is not None:
+            for key, value in attributes.items():
+                span.set(key, value)
+
+    def traced(self, name: str, kind: str = "internal"):
+        """Decorator: run the function (sync or async) inside a span called `name`"""
+        def decorate(fn):
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(name, kind=kind):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name, kind=kind):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    # ------------------------------------------------------------------ export
+    def _take(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        return batch
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._flush()
+
+    def _flush(self):
+        batch = self._take()
+        if not batch:
+            return
+        try:
+            self.exporter.export(batch)
+            self.exported += len(batch)
+        except Exception as e:
+            self.dropped += len(batch)
+            logger.error(f"Span export failed: {e}")
+
+    def shutdown(self):
+        """Export everything still buffered and stop the background thread"""
+        self._stopped = True
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self._flush()
+        self.exporter.shutdown()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sample_rate": self.sample_rate,
+            "exporter": type(self.exporter).__name__,
+            "buffered": len(self._buffer),
+            "exported": self.exported,
+            "dropped": self.dropped,
+        }
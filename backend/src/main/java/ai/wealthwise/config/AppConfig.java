@@ -1,5 +1,6 @@
 package ai.wealthwise.config;
 
+import ai.wealthwise.tracing.TracingInterceptor;
 import org.springframework.boot.web.client.RestTemplateBuilder;
 import org.springframework.context.annotation.Bean;
 import org.springframework.context.annotation.Configuration;
@@ -11,10 +12,11 @@ import java.time.Duration;
 public class AppConfig {
 
     @Bean
-    public RestTemplate restTemplate(RestTemplateBuilder builder) {
+    public RestTemplate restTemplate(RestTemplateBuilder builder, TracingInterceptor tracingInterceptor) {
         return builder
                 .setConnectTimeout(Duration.ofSeconds(10))
                 .setReadTimeout(Duration.ofSeconds(30))
+                .additionalInterceptors(tracingInterceptor)
                 .build();
     }
 }
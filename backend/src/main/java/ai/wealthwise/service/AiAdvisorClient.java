@@ -17,7 +17,7 @@ import java.util.Map;
 @Slf4j
 public class AiAdvisorClient {
 
-    private final RestTemplate restTemplate = new RestTemplate();
+    private final RestTemplate restTemplate;
 
     @Value("${ai.service.url}")
     private String aiServiceUrl;
@@ -16,7 +16,7 @@ import java.util.List;
 @Slf4j
 public class PythonAiClient {
 
-    private final RestTemplate restTemplate = new RestTemplate();
+    private final RestTemplate restTemplate;
     private final String AI_SERVICE_URL = "http://localhost:8000/api/v1/ai/forecast";
 
     @Data
@@ -0,0 +1,40 @@
+package ai.wealthwise.tracing;
+
+import com.fasterxml.jackson.databind.ObjectMapper;
+
+import java.io.BufferedWriter;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.nio.file.Path;
+import java.nio.file.Paths;
+import java.nio.file.StandardOpenOption;
+import java.util.List;
+import java.util.Map;
+
+/**
+ * File exporter - appends one JSON object per span (same format as the AI service's traces.jsonl)
+ */
+public class FileSpanExporter implements SpanExporter {
+
+    private final ObjectMapper objectMapper = new ObjectMapper();
+    private final Path path;
+
+    public FileSpanExporter(String path) {
+        this.path = Paths.get(path);
+    }
+
+    @Override
+    public void export(List<Map<String, Object>> spans) throws Exception {
+        Path parent = path.toAbsolutePath().getParent();
+        if (parent != null) {
+            Files.createDirectories(parent);
+        }
+        try (BufferedWriter writer = Files.newBufferedWriter(path, StandardCharsets.UTF_8,
+                StandardOpenOption.CREATE, StandardOpenOption.APPEND)) {
+            for (Map<String, Object> span : spans) {
+                writer.write(objectMapper.writeValueAsString(span));
+                writer.newLine();
+            }
+        }
+    }
+}
@@ -0,0 +1,23 @@
+package ai.wealthwise.tracing;
+
+import com.fasterxml.jackson.databind.ObjectMapper;
+import lombok.extern.slf4j.Slf4j;
+
+import java.util.List;
+import java.util.Map;
+
+/**
+ * Console exporter - writes each span as one JSON log line
+ */
+@Slf4j
+public class LoggingSpanExporter implements SpanExporter {
+
+    private final ObjectMapper objectMapper = new ObjectMapper();
+
+    @Override
+    public void export(List<Map<String, Object>> spans) throws Exception {
+        for (Map<String, Object> span : spans) {
+            log.info("span {}", objectMapper.writeValueAsString(span));
+        }
+    }
+}
@@ -0,0 +1,101 @@
+package ai.wealthwise.tracing;
+
+import lombok.AccessLevel;
+import lombok.Getter;
+
+import java.util.LinkedHashMap;
+import java.util.Map;
+import java.util.concurrent.ThreadLocalRandom;
+import java.util.regex.Matcher;
+import java.util.regex.Pattern;
+
+/**
+ * A timed unit of work in a trace, identified with W3C trace-context ids
+ */
+@Getter
+public class Span {
+
+    private static final Pattern TRACEPARENT = Pattern
+            .compile("^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$");
+
+    private final String traceId;
+    private final String spanId;
+    private final String parentId;
+    private final boolean sampled;
+    private final String name;
+    private final String kind;
+    private final long startEpochMillis = System.currentTimeMillis();
+    private final long startNanos = System.nanoTime();
+    private final Map<String, Object> attributes = new LinkedHashMap<>();
+    private Double durationMs;
+    private String error;
+    @Getter(AccessLevel.NONE)
+    Span previous;
+
+    Span(String traceId, String parentId, boolean sampled, String name, String kind) {
+        this.traceId = traceId;
+        this.spanId = randomHex(16);
+        this.parentId = parentId;
+        this.sampled = sampled;
+        this.name = name;
+        this.kind = kind;
+    }
+
+    public Span set(String key, Object value) {
+        if (sampled) {
+            attributes.put(key, value);
+        }
+        return this;
+    }
+
+    public void setError(Throwable t) {
+        this.error = t.getClass().getSimpleName() + ": " + t.getMessage();
+    }
+
+    void finish() {
+        this.durationMs = Math.round((System.nanoTime() - startNanos) / 1_000.0) / 1_000.0;
+    }
+
+    public String traceparent() {
+        return "00-" + traceId + "-" + spanId + (sampled ? "-01" : "-00");
+    }
+
+    /**
+     * Parent ids from an incoming traceparent header: {traceId, spanId, flags}, or null if absent/invalid
+     */
+    static String[] parseTraceparent(String header) {
+        if (header == null) {
+            return null;
+        }
+        Matcher m = TRACEPARENT.matcher(header.trim().toLowerCase());
+        if (!m.matches() || m.group(1).equals("ff")
+                || m.group(2).chars().allMatch(c -> c == '0') || m.group(3).chars().allMatch(c -> c == '0')) {
+            return null;
+        }
+        return new String[] { m.group(2), m.group(3), m.group(4) };
+    }
+
+    static String randomHex(int length) {
+        StringBuilder sb = new StringBuilder(length);
+        ThreadLocalRandom random = ThreadLocalRandom.current();
+        while (sb.length() < length) {
+            sb.append(String.format("%016x", random.nextLong()));
+        }
+        return sb.substring(0, length);
+    }
+
+    public Map<String, Object> toMap(String service) {
+        Map<String, Object> map = new LinkedHashMap<>();
+        map.put("trace_id", traceId);
+        map.put("span_id", spanId);
+        map.put("parent_id", parentId);
+        map.put("name", name);
+        map.put("kind", kind);
+        map.put("service", service);
+        map.put("start", startEpochMillis / 1000.0);
+        map.put("duration_ms", durationMs);
+        map.put("attributes", attributes);
+        map.put("error", error);
+        return map;
+    }
+}
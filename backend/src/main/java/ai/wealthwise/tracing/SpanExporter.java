@@ -0,0 +1,15 @@
+package ai.wealthwise.tracing;
+
+import java.util.List;
+import java.util.Map;
+
+/**
+ * Receives batches of finished, sampled spans from the tracer's export thread
+ */
+public interface SpanExporter {
+
+    void export(List<Map<String, Object>> spans) throws Exception;
+
+    default void shutdown() {
+    }
+}
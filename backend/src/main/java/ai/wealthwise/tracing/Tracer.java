@@ -0,0 +1,156 @@
+package ai.wealthwise.tracing;
+
+import jakarta.annotation.PreDestroy;
+import lombok.extern.slf4j.Slf4j;
+import org.springframework.beans.factory.annotation.Value;
+import org.springframework.stereotype.Component;
+
+import java.util.ArrayList;
+import java.util.List;
+import java.util.Map;
+import java.util.concurrent.ArrayBlockingQueue;
+import java.util.concurrent.BlockingQueue;
+import java.util.concurrent.ThreadLocalRandom;
+import java.util.concurrent.TimeUnit;
+import java.util.concurrent.atomic.AtomicLong;
+
+/**
+ * Tracer - starts spans, keeps the current span per thread and exports finished
+ * spans in batches from a background thread.
+ *
+ * The sampling decision is made once per trace (an upstream traceparent decision
+ * wins); unsampled spans still propagate ids but are never queued.
+ */
+@Component
+@Slf4j
+public class Tracer {
+
+    private static final ThreadLocal<Span> CURRENT = new ThreadLocal<>();
+
+    private final String serviceName;
+    private final double sampleRate;
+    private final SpanExporter exporter;
+    private final BlockingQueue<Map<String, Object>> queue;
+    private final Thread exportThread;
+    private final AtomicLong exported = new AtomicLong();
+    private final AtomicLong dropped = new AtomicLong();
+    private volatile boolean stopped;
+
+    public Tracer(
+            @Value("${spring.application.name:wealthwise-backend}") String serviceName,
+            @Value("${tracing.sample-rate:0.1}") double sampleRate,
+            @Value("${tracing.exporter:file}") String exporter,
+            @Value("${tracing.file-path:logs/traces.jsonl}") String filePath,
+            @Value("${tracing.queue-size:10000}") int queueSize) {
+        this.serviceName = serviceName;
+        this.sampleRate = sampleRate;
+        this.exporter = createExporter(exporter, filePath);
+        this.queue = new ArrayBlockingQueue<>(queueSize);
+        this.exportThread = new Thread(this::run, "span-exporter");
+        this.exportThread.setDaemon(true);
+        this.exportThread.start();
+    }
+
+    private static SpanExporter createExporter(String spec, String filePath) {
+        switch (spec) {
+            case "file":
+                return new FileSpanExporter(filePath);
+            case "console":
+                return new LoggingSpanExporter();
+            case "none":
+            case "":
+                return spans -> {
+                };
+            default:
+                try {
+                    return (SpanExporter) Class.forName(spec).getDeclaredConstructor().newInstance();
+                } catch (ReflectiveOperationException e) {
+                    throw new IllegalArgumentException("Unknown span exporter: " + spec, e);
+                }
+        }
+    }
+
+    public Span current() {
+        return CURRENT.get();
+    }
+
+    /**
+     * Start a span as a child of the current one, or of the given traceparent header
+     * when there is none (a new trace if both are absent). Must be closed with end().
+     */
+    public Span start(String name, String kind, String traceparent) {
+        Span parent = CURRENT.get();
+        Span span;
+        String[] remote;
+        if (parent != null) {
+            span = new Span(parent.getTraceId(), parent.getSpanId(), parent.isSampled(), name, kind);
+        } else if ((remote = Span.parseTraceparent(traceparent)) != null) {
+            span = new Span(remote[0], remote[1], (Integer.parseInt(remote[2], 16) & 1) == 1, name, kind);
+        } else {
+            boolean sampled = sampleRate >= 1.0 || ThreadLocalRandom.current().nextDouble() < sampleRate;
+            span = new Span(Span.randomHex(32), null, sampled, name, kind);
+        }
+        span.previous = parent;
+        CURRENT.set(span);
+        return span;
+    }
+
+    public Span start(String name, String kind) {
+        return start(name, kind, null);
+    }
+
+    /**
+     * Finish the span, restore its parent as current and queue it for export
+     */
+    public void end(Span span) {
+        span.finish();
+        if (span.previous != null) {
+            CURRENT.set(span.previous);
+        } else {
+            CURRENT.remove();
+        }
+        if (span.isSampled() && !queue.offer(span.toMap(serviceName))) {
+            dropped.incrementAndGet();
+        }
+    }
+
+    private void run() {
+        while (!stopped) {
+            try {
+                Map<String, Object> first = queue.poll(2, TimeUnit.SECONDS);
+                if (first != null) {
+                    List<Map<String, Object>> batch = new ArrayList<>();
+                    batch.add(first);
+                    queue.drainTo(batch, 999);
+                    flush(batch);
+                }
+            } catch (InterruptedException e) {
+                Thread.currentThread().interrupt();
+                return;
+            }
+        }
+    }
+
+    private void flush(List<Map<String, Object>> batch) {
+        try {
+            exporter.export(batch);
+            exported.addAndGet(batch.size());
+        } catch (Exception e) {
+            dropped.addAndGet(batch.size());
+            log.error("Span export failed: {}", e.getMessage());
+        }
+    }
+
+    @PreDestroy
+    public void shutdown() throws InterruptedException {
+        stopped = true;
+        exportThread.join(5000);
+        List<Map<String, Object>> rest = new ArrayList<>();
+        queue.drainTo(rest);
+        if (!rest.isEmpty()) {
+            flush(rest);
+        }
+        exporter.shutdown();
+        log.info("Tracer stopped: {} spans exported, {} dropped", exported.get(), dropped.get());
+    }
+}
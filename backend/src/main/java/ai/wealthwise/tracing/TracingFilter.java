@@ -0,0 +1,55 @@
+package ai.wealthwise.tracing;
+
+import jakarta.servlet.FilterChain;
+import jakarta.servlet.ServletException;
+import jakarta.servlet.http.HttpServletRequest;
+import jakarta.servlet.http.HttpServletResponse;
+import lombok.RequiredArgsConstructor;
+import org.slf4j.MDC;
+import org.springframework.core.Ordered;
+import org.springframework.core.annotation.Order;
+import org.springframework.lang.NonNull;
+import org.springframework.stereotype.Component;
+import org.springframework.web.filter.OncePerRequestFilter;
+import org.springframework.web.servlet.HandlerMapping;
+
+import java.io.IOException;
+
+/**
+ * Tracing Filter - opens a server span per request, continuing the caller's trace
+ * from its traceparent header, and returns the span's traceparent to the client
+ */
+@Component
+@Order(Ordered.HIGHEST_PRECEDENCE)
+@RequiredArgsConstructor
+public class TracingFilter extends OncePerRequestFilter {
+
+    private final Tracer tracer;
+
+    @Override
+    protected void doFilterInternal(
+            @NonNull HttpServletRequest request,
+            @NonNull HttpServletResponse response,
+            @NonNull FilterChain filterChain) throws ServletException, IOException {
+        Span span = tracer.start(request.getMethod() + " " + request.getRequestURI(), "server",
+                request.getHeader("traceparent"));
+        span.set("http.method", request.getMethod());
+        span.set("http.target", request.getRequestURI());
+        response.setHeader("traceparent", span.traceparent());
+        MDC.put("traceId", span.getTraceId());
+        try {
+            filterChain.doFilter(request, response);
+        } catch (IOException | ServletException | RuntimeException e) {
+            span.setError(e);
+            throw e;
+        } finally {
+            Object route = request.getAttribute(HandlerMapping.BEST_MATCHING_PATTERN_ATTRIBUTE);
+            if (route != null) {
+                span.set("http.route", route);
+            }
+            span.set("http.status_code", response.getStatus());
+            MDC.remove("traceId");
+            tracer.end(span);
+        }
+    }
+}
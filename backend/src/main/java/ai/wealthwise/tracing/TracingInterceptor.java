@@ -0,0 +1,43 @@
+package ai.wealthwise.tracing;
+
+import lombok.RequiredArgsConstructor;
+import org.springframework.http.HttpRequest;
+import org.springframework.http.client.ClientHttpRequestExecution;
+import org.springframework.http.client.ClientHttpRequestInterceptor;
+import org.springframework.http.client.ClientHttpResponse;
+import org.springframework.lang.NonNull;
+import org.springframework.stereotype.Component;
+
+import java.io.IOException;
+
+/**
+ * Tracing Interceptor - wraps each outbound RestTemplate call (AI service, parsers)
+ * in a client span and forwards its traceparent so the callee joins the trace
+ */
+@Component
+@RequiredArgsConstructor
+public class TracingInterceptor implements ClientHttpRequestInterceptor {
+
+    private final Tracer tracer;
+
+    @Override
+    @NonNull
+    public ClientHttpResponse intercept(@NonNull HttpRequest request, @NonNull byte[] body,
+            @NonNull ClientHttpRequestExecution execution) throws IOException {
+        Span span = tracer.start("HTTP " + request.getMethod() + " " + request.getURI().getPath(), "client");
+        span.set("http.method", String.valueOf(request.getMethod()));
+        span.set("http.url", request.getURI().toString());
+        span.set("request.bytes", body.length);
+        request.getHeaders().set("traceparent", span.traceparent());
+        try {
+            ClientHttpResponse response = execution.execute(request, body);
+            span.set("http.status_code", response.getStatusCode().value());
+            return response;
+        } catch (IOException | RuntimeException e) {
+            span.setError(e);
+            throw e;
+        } finally {
+            tracer.end(span);
+        }
+    }
+}
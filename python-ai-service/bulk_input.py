@@ -0,0 +1,110 @@
+"""
+Columnar and file-based history input for the forecasting service.
+
+Multi-year histories are parsed straight into pandas from parallel arrays or from
+uploaded CSV/Parquet files, and validated column-wise instead of per object.
+
+Every history shape (records, columns, uploads) gets the same checks, which match
+the AI service's copy of this module: ISO 8601 dates, finite amounts, and
+CREDIT/DEBIT types (trimmed and upper-cased first). Locale formats such as
+01/02/2024 are rejected rather than guessed, because DD/MM and MM/DD read them
+differently.
+"""
+from __future__ import annotations
+
+import io
+import os
+from typing import TYPE_CHECKING, List
+
+import numpy as np
+from fastapi import HTTPException, UploadFile
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))  # 50 MB default, as in ai-service
+
+HISTORY_COLUMNS = ("date", "amount", "type")
+HISTORY_TYPES = ("CREDIT", "DEBIT")
+
+
+class HistoryColumns(BaseModel):
+    """History as parallel arrays: date[i], amount[i], type[i] describe one entry"""
+    date: List[str]  # ISO 8601 (YYYY-MM-DD), the same format accepted for per-row history
+    amount: List[float]
+    type: List[str]
+
+
+def _invalid(message: str, mask: np.ndarray):
+    rows = np.flatnonzero(mask)
+    preview = ", ".join(str(r) for r in rows[:5])
+    raise HTTPException(status_code=422, detail=f"{message} ({len(rows)} rows, first at index {preview})")
+
+
+def validate_history_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Vectorised validation/normalisation of a date/amount/type history frame"""
+    import pandas as pd
+    missing = [c for c in HISTORY_COLUMNS if c not in df.columns]
+    if missing:
+        raise HTTPException(status_code=422, detail=f"History is missing columns: {', '.join(missing)}")
+
+    out = pd.DataFrame({
+        "date": pd.to_datetime(df["date"], errors="coerce", format="ISO8601"),
+        "amount": pd.to_numeric(df["amount"], errors="coerce"),
+        "type": df["type"].astype(str).str.strip().str.upper(),
+    })
+    bad_date = out["date"].isna().to_numpy()
+    if bad_date.any():
+        _invalid("History dates must be ISO 8601 (YYYY-MM-DD)", bad_date)
+    bad_amount = ~np.isfinite(out["amount"].to_numpy(dtype=float))
+    if bad_amount.any():
+        _invalid("Non-numeric history amounts", bad_amount)
+    bad_type = ~out["type"].isin(HISTORY_TYPES).to_numpy()
+    if bad_type.any():
+        _invalid("History type must be CREDIT or DEBIT", bad_type)
+    return out
+
+
+def history_frame_from_columns(columns: HistoryColumns) -> pd.DataFrame:
+    import pandas as pd
+    lengths = {"date": len(columns.date), "amount": len(columns.amount), "type": len(columns.type)}
+    if len(set(lengths.values())) > 1:
+        raise HTTPException(status_code=422, detail=f"History columns differ in length: {lengths}")
+    return validate_history_frame(pd.DataFrame({
+        "date": columns.date, "amount": columns.amount, "type": columns.type
+    }))
+
+
+def history_frame_from_points(points) -> pd.DataFrame:
+    """Validated frame from HistoryPoint objects without a per-row dict() round trip"""
+    import pandas as pd
+    return validate_history_frame(pd.DataFrame({
+        "date": [p.date for p in points],
+        "amount": np.fromiter((p.amount for p in points), dtype=float, count=len(points)),
+        "type": [p.type for p in points],
+    }))
+
+
+async def read_upload_frame(file: UploadFile) -> pd.DataFrame:
+    """Parse an uploaded CSV or Parquet history file into a validated DataFrame"""
+    import pandas as pd
+    raw = await file.read(MAX_UPLOAD_BYTES + 1)
+    if len(raw) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {MAX_UPLOAD_BYTES} bytes")
+
+    name = (file.filename or "").lower()
+    content_type = (file.content_type or "").lower()
+    try:
+        if name.endswith(".parquet") or "parquet" in content_type:
+            try:
+                df = pd.read_parquet(io.BytesIO(raw), columns=list(HISTORY_COLUMNS))
+            except ImportError:
+                raise HTTPException(status_code=415, detail="Parquet support requires pyarrow to be installed")
+        else:
+            df = pd.read_csv(io.BytesIO(raw), usecols=lambda c: c in HISTORY_COLUMNS)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Could not parse uploaded file: {e}")
+    return validate_history_frame(df)
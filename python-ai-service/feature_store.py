@@ -0,0 +1,205 @@
+"""
+Per-business feature store for forecasting.
+
+Each business keeps its daily CREDIT/DEBIT rollups in a raw float64 file that is
+memory-mapped on read, plus a small JSON sidecar with the date range and derived
+aggregates (running sums / sums of squares and a weekday profile). Callers send
+append-only deltas of new transactions; only the touched days are updated in place
+(new days are appended to the file), so a forecast no longer needs the full
+history resent and re-aggregated on every request.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+FEATURE_STORE_DIR = os.getenv("FEATURE_STORE_DIR", "feature_store")
+FEATURE_STORE_MAX_DAYS = int(os.getenv("FEATURE_STORE_MAX_DAYS", str(20 * 366)))
+DELTA_IDS_KEPT = 500  # recent deltaIds remembered so retried deltas are not applied twice
+
+COLUMNS = ("CREDIT", "DEBIT")
+DATA_FILE = "daily.f64"
+META_FILE = "meta.json"
+
+
+class FeatureStore:
+    def __init__(self, root: str = FEATURE_STORE_DIR, max_days: int = FEATURE_STORE_MAX_DAYS):
+        self.root = root
+        self.max_days = max_days
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    # ------------------------------------------------------------------ storage
+    def _dir(self, business_id: str) -> str:
+        slug = re.sub(r"[^A-Za-z0-9_-]", "_", business_id)[:40]
+        digest = hashlib.sha1(business_id.encode("utf-8")).hexdigest()[:10]
+        return os.path.join(self.root, f"{slug}-{digest}")
+
+    def _lock(self, business_id: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(business_id, threading.Lock())
+
+    def _read_meta(self, directory: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(directory, META_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _write_meta(directory: str, meta: Dict[str, Any]):
+        tmp = os.path.join(directory, f"{META_FILE}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(directory, META_FILE))
+
+    @staticmethod
+    def _new_meta(business_id: str, start: pd.Timestamp) -> Dict[str, Any]:
+        return {
+            "businessId": business_id,
+            "start": start.strftime("%Y-%m-%d"),
+            "days": 0,
+            "transactions": 0,
+            "sum": [0.0, 0.0],
+            "sumSq": [0.0, 0.0],
+            "weekdaySum": [[0.0, 0.0] for _ in range(7)],
+            "deltaIds": [],
+            "updatedAt": None,
+        }
+
+    def _resize(self, directory: str, meta: Dict[str, Any], first: pd.Timestamp, last: pd.Timestamp):
+        """Grow the data file so it covers first..last (appends in place, rewrites only to prepend)"""
+        import pandas as pd
+        path = os.path.join(directory, DATA_FILE)
+        start = pd.Timestamp(meta["start"])
+        end = start + pd.Timedelta(days=meta["days"] - 1)
+        span = (max(last, end) - min(first, start)).days + 1
+        if span > self.max_days:
+            raise ValueError(f"Stored history would span {span} days (limit {self.max_days})")
+        # A crash between appending days and writing the sidecar leaves extra rows; the sidecar wins
+        if os.path.exists(path) and os.path.getsize(path) != meta["days"] * 16:
+            with open(path, "r+b") as f:
+                f.truncate(meta["days"] * 16)
+        if first < start:
+            prepend = (start - first).days
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as dst:
+                dst.write(np.zeros((prepend, 2)).tobytes())
+                if os.path.exists(path):
+                    with open(path, "rb") as src:
+                        shutil.copyfileobj(src, dst)
+            os.replace(tmp, path)
+            meta["start"] = first.strftime("%Y-%m-%d")
+            meta["days"] += prepend
+            start = first
+        needed = (last - start).days + 1
+        if needed > meta["days"]:
+            with open(path, "ab") as f:
+                f.write(np.zeros((needed - meta["days"], 2)).tobytes())
+            meta["days"] = needed
+
+    # ------------------------------------------------------------------ public API
+    def apply(self, business_id: str, df: pd.DataFrame, delta_id: Optional[str] = None) -> Dict[str, Any]:
+        """Add a date/amount/type delta of new transactions to the business's daily rollups"""
+        import pandas as pd
+        directory = self._dir(business_id)
+        with self._lock(business_id):
+            meta = self._read_meta(directory)
+            if meta is not None and delta_id and delta_id in meta["deltaIds"]:
+                return self._info(meta, applied=False)
+
+            rows = df[df["type"].isin(COLUMNS)]
+            rollup = rows.groupby([rows["date"].dt.normalize(), "type"])["amount"].sum().unstack(fill_value=0.0)
+            rollup = rollup.reindex(columns=list(COLUMNS), fill_value=0.0)
+            os.makedirs(directory, exist_ok=True)
+            if meta is None:
+                first = rollup.index.min() if len(rollup) else pd.Timestamp.now().normalize()
+                meta = self._new_meta(business_id, first)
+
+            if len(rollup):
+                self._resize(directory, meta, rollup.index.min(), rollup.index.max())
+                offsets = (rollup.index - pd.Timestamp(meta["start"])).days.to_numpy()
+                delta = rollup.to_numpy(dtype=float)
+                data = np.memmap(os.path.join(directory, DATA_FILE), dtype=np.float64, mode="r+",
+                                 shape=(meta["days"], 2))
+                old = np.array(data[offsets])
+                new = old + delta
+                data[offsets] = new
+                data.flush()
+                del data
+
+                # Derived aggregates, updated from the touched days only
+                meta["sum"] = (np.asarray(meta["sum"]) + delta.sum(axis=0)).tolist()
+                meta["sumSq"] = (np.asarray(meta["sumSq"]) + (new ** 2 - old ** 2).sum(axis=0)).tolist()
+                weekday_sum = np.asarray(meta["weekdaySum"])
+                np.add.at(weekday_sum, rollup.index.dayofweek.to_numpy(), delta)
+                meta["weekdaySum"] = weekday_sum.tolist()
+
+            meta["transactions"] += int(len(rows))
+            if delta_id:
+                meta["deltaIds"] = (meta["deltaIds"] + [delta_id])[-DELTA_IDS_KEPT:]
+            meta["updatedAt"] = time.time()
+            self._write_meta(directory, meta)
+            return self._info(meta, applied=True)
+
+    def daily(self, business_id: str) -> Optional[pd.DataFrame]:
+        """Stored daily CREDIT/DEBIT totals (a copy of the mapped file), or None"""
+        import pandas as pd
+        directory = self._dir(business_id)
+        with self._lock(business_id):
+            meta = self._read_meta(directory)
+            if meta is None or meta["days"] == 0:
+                return None
+            data = np.memmap(os.path.join(directory, DATA_FILE), dtype=np.float64, mode="r",
+                             shape=(meta["days"], 2))
+            values = np.array(data)
+            del data
+        index = pd.date_range(meta["start"], periods=meta["days"], freq="D", name="date")
+        return pd.DataFrame(values, index=index, columns=list(COLUMNS))
+
+    def info(self, business_id: str) -> Optional[Dict[str, Any]]:
+        meta = self._read_meta(self._dir(business_id))
+        return self._info(meta) if meta is not None else None
+
+    def delete(self, business_id: str) -> bool:
+        directory = self._dir(business_id)
+        with self._lock(business_id):
+            if not os.path.isdir(directory):
+                return False
+            shutil.rmtree(directory)
+            return True
+
+    @staticmethod
+    def _info(meta: Dict[str, Any], applied: Optional[bool] = None) -> Dict[str, Any]:
+        import pandas as pd
+        days = max(meta["days"], 1)
+        mean = np.asarray(meta["sum"]) / days
+        std = np.sqrt(np.maximum(np.asarray(meta["sumSq"]) / days - mean ** 2, 0.0))
+        end = pd.Timestamp(meta["start"]) + pd.Timedelta(days=meta["days"] - 1)
+        info = {
+            "businessId": meta["businessId"],
+            "start": meta["start"],
+            "end": end.strftime("%Y-%m-%d") if meta["days"] else None,
+            "days": meta["days"],
+            "transactions": meta["transactions"],
+            "dailyMean": dict(zip(COLUMNS, np.round(mean, 2).tolist())),
+            "dailyStd": dict(zip(COLUMNS, np.round(std, 2).tolist())),
+            "weekdayProfile": {
+                col: np.round(np.asarray(meta["weekdaySum"])[:, i], 2).tolist() for i, col in enumerate(COLUMNS)
+            },
+            "updatedAt": meta["updatedAt"],
+        }
+        if applied is not None:
+            info["applied"] = applied
+        return info
@@ -0,0 +1,142 @@
+"""
+Vectorised lag / rolling-window features for direct multi-horizon forecasting.
+
+Each training row pairs a forecast origin (the last known day) with a horizon h and
+describes the target day origin + h using only what is known at the origin: the
+latest values, rolling means/std over 7 and 28 days, the recent same-weekday mean,
+the same weekday one year earlier, calendar and month-end effects, and h itself.
+One model therefore predicts any step of the horizon directly, so inference is a
+single predict call per window instead of a day-by-day recursion. All features are
+built with array indexing over the daily CREDIT/DEBIT matrix; there is no per-day
+Python loop.
+"""
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+SERIES = ("CREDIT", "DEBIT")
+# Horizons sampled per origin when building training rows
+TRAIN_HORIZONS = np.array([1, 2, 3, 4, 5, 6, 7, 10, 14, 21, 28, 35, 42, 56, 70, 91, 120, 150, 182, 273, 364])
+MIN_CONTEXT_DAYS = 28  # origins need this much history when the series allows it
+SAME_WEEKDAY_WEEKS = 4
+YEAR_LAG = 364  # 52 weeks: same weekday one year earlier
+MAX_TRAIN_ROWS = int(os.getenv("FORECAST_MAX_TRAIN_ROWS", "20000"))
+
+_SERIES_FEATURES = ("last", "mean_7", "mean_28", "std_28", "same_weekday_mean", "last_year")
+CALENDAR_FEATURES = (
+    "horizon", "day_of_week", "is_weekend", "day_of_month", "month",
+    "is_month_end", "is_month_start", "days_to_month_end"
+)
+FEATURE_NAMES: List[str] = list(CALENDAR_FEATURES) + [
+    f"{name}_{series.lower()}" for series in SERIES for name in _SERIES_FEATURES
+]
+
+# Explainability drivers: each feature's contributions are reported under one driver
+_DRIVERS = {
+    "Recent Level": ("last", "mean_7"),
+    "Historical Cycle": ("mean_28", "std_28"),
+    "Weekly Pattern": ("same_weekday_mean", "day_of_week", "is_weekend"),
+    "Seasonal Baseline": ("last_year", "month"),
+    "Month-End Effects": ("day_of_month", "is_month_end", "is_month_start", "days_to_month_end"),
+    "Forecast Horizon": ("horizon",),
+}
+FEATURE_DRIVERS: Dict[str, str] = {
+    feature: driver
+    for driver, names in _DRIVERS.items()
+    for feature in FEATURE_NAMES
+    if feature in names or feature.rsplit("_", 1)[0] in names
+}
+
+
+def _trailing_stats(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean and std over the `window` days ending at each index (shorter at the start)"""
+    n = len(values)
+    csum = np.concatenate(([[0.0] * values.shape[1]], np.cumsum(values, axis=0)))
+    csq = np.concatenate(([[0.0] * values.shape[1]], np.cumsum(values ** 2, axis=0)))
+    end = np.arange(1, n + 1)
+    begin = np.maximum(0, end - window)
+    count = (end - begin)[:, None]
+    mean = (csum[end] - csum[begin]) / count
+    var = np.maximum((csq[end] - csq[begin]) / count - mean ** 2, 0.0)
+    return mean, np.sqrt(var)
+
+
+def build_features(values: np.ndarray, start: pd.Timestamp, origins: np.ndarray, horizons: np.ndarray,
+                   max_horizon: int) -> np.ndarray:
+    """
+    Feature rows for targets origins + horizons.
+    `values` is the (days, 2) CREDIT/DEBIT matrix starting on `start`; only rows
+    up to each origin are used.
+    """
+    import pandas as pd
+    targets = origins + horizons
+    mean_7, _ = _trailing_stats(values, 7)
+    mean_28, std_28 = _trailing_stats(values, 28)
+
+    # Most recent same-weekday days at or before the origin: t - 7k for k >= ceil(h / 7)
+    first_k = -(-horizons // 7)
+    same_idx = targets[:, None] - 7 * (first_k[:, None] + np.arange(SAME_WEEKDAY_WEEKS)[None, :])
+    same_valid = same_idx >= 0
+    same_vals = np.where(same_valid[:, :, None], values[np.maximum(same_idx, 0)], 0.0)
+    same_count = same_valid.sum(axis=1)[:, None]
+    same_mean = np.where(same_count > 0, same_vals.sum(axis=1) / np.maximum(same_count, 1), np.nan)
+
+    year_idx = targets - YEAR_LAG
+    year_valid = (year_idx >= 0) & (year_idx <= origins)
+    last_year = np.where(year_valid[:, None], values[np.clip(year_idx, 0, len(values) - 1)], np.nan)
+
+    dates = start + pd.to_timedelta(targets, unit="D")
+    days_in_month = dates.days_in_month.to_numpy()
+    day = dates.day.to_numpy()
+    calendar = [
+        np.minimum(horizons, max_horizon),
+        dates.dayofweek.to_numpy(),
+        (dates.dayofweek.to_numpy() >= 5),
+        day,
+        dates.month.to_numpy(),
+        day >= 25,
+        day <= 3,
+        days_in_month - day,
+    ]
+
+    series = []
+    for i in range(len(SERIES)):
+        series.extend([
+            values[origins, i], mean_7[origins, i], mean_28[origins, i], std_28[origins, i],
+            same_mean[:, i], last_year[:, i],
+        ])
+    return np.column_stack(calendar + series).astype(np.float32)
+
+
+def training_set(values: np.ndarray, start: pd.Timestamp) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """(X, Y, target day index, max trained horizon) over every usable origin x TRAIN_HORIZONS pair"""
+    n = len(values)
+    first_origin = min(MIN_CONTEXT_DAYS, max(0, n // 2 - 1))
+    origins = np.arange(first_origin, n - 1)
+    if len(origins) == 0:
+        raise ValueError("At least 2 days of history are needed to forecast")
+    # Long histories: thin out origins so the row count stays bounded
+    stride = max(1, int(np.ceil(len(origins) * len(TRAIN_HORIZONS) / MAX_TRAIN_ROWS)))
+    origins = origins[::-1][::stride][::-1]
+
+    origin_grid = np.repeat(origins, len(TRAIN_HORIZONS))
+    horizon_grid = np.tile(TRAIN_HORIZONS, len(origins))
+    keep = origin_grid + horizon_grid < n
+    origin_grid, horizon_grid = origin_grid[keep], horizon_grid[keep]
+    max_horizon = int(horizon_grid.max())
+
+    targets = origin_grid + horizon_grid
+    X = build_features(values, start, origin_grid, horizon_grid, max_horizon)
+    return X, values[targets], targets, max_horizon
+
+
+def future_features(values: np.ndarray, start: pd.Timestamp, steps: np.ndarray, max_horizon: int) -> np.ndarray:
+    """Feature rows for forecast steps (1 = the day after the last history day)"""
+    origins = np.full(len(steps), len(values) - 1)
+    return build_features(values, start, origins, steps, max_horizon)
@@ -0,0 +1,146 @@
+"""
+Training engine for the revenue/expense forecast.
+
+Revenue and expense are fitted as one multi-output XGBoost model (a single booster,
+one histogram quantisation of the shared feature matrix, one predict call) with the
+`hist` tree method. The tree budget grows with the length of the history, and the
+actual tree count is chosen by early stopping on a held-out tail (rows whose target
+day falls in the most recent days), with a floor of FORECAST_EARLY_STOP_FLOOR trees.
+The model is then refitted on all rows with that tree count, so the latest days
+still inform the forecast. Training time and tree count are returned with the model
+for per-request CPU accounting. xgboost itself is imported on first use (or by the
+warm-up started at application startup), which keeps it off the import path of
+every new replica.
+
+Forecasts are predicted through XGBoost's tree-contribution output: one batched call
+per window gives every row's per-feature contributions, and their sum is the
+prediction, so explanations cost no extra pass over the trees. The running totals
+kept with the fitted model are turned into driver weights once the horizon is done.
+"""
+import os
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+FORECAST_LEARNING_RATE = float(os.getenv("FORECAST_LEARNING_RATE", "0.1"))
+FORECAST_MAX_DEPTH = int(os.getenv("FORECAST_MAX_DEPTH", "6"))
+FORECAST_MAX_BIN = int(os.getenv("FORECAST_MAX_BIN", "64"))
+FORECAST_MIN_TREES = int(os.getenv("FORECAST_MIN_TREES", "40"))
+FORECAST_MAX_TREES = int(os.getenv("FORECAST_MAX_TREES", "300"))
+FORECAST_EARLY_STOPPING = int(os.getenv("FORECAST_EARLY_STOPPING", "20"))  # rounds without improvement
+# Fewest trees early stopping may pick: a holdout that stops improving after one or two
+# rounds (e.g. a level shift in the last days) would otherwise leave a near-constant model
+FORECAST_EARLY_STOP_FLOOR = int(os.getenv("FORECAST_EARLY_STOP_FLOOR", "20"))
+FORECAST_HOLDOUT_FRACTION = float(os.getenv("FORECAST_HOLDOUT_FRACTION", "0.1"))
+MIN_HOLDOUT_DAYS = 14
+MIN_TRAIN_ROWS_FOR_HOLDOUT = 200  # below this, early stopping is skipped and the budget is used
+# Exact TreeSHAP instead of path (Saabas) contributions: same additivity, ~100x slower
+FORECAST_EXACT_CONTRIBS = os.getenv("FORECAST_EXACT_CONTRIBS", "false").lower() == "true"
+COMMITMENTS_DRIVER = "Pending Invoices"
+
+
+def tree_budget(history_days: int) -> int:
+    """Upper bound on boosting rounds: short histories cannot support many trees"""
+    return int(np.clip(FORECAST_MIN_TREES + history_days // 5, FORECAST_MIN_TREES, FORECAST_MAX_TREES))
+
+
+def load_xgboost():
+    import xgboost
+    return xgboost
+
+
+def _regressor(n_estimators: int, **kwargs):
+    return load_xgboost().XGBRegressor(
+        n_estimators=n_estimators,
+        learning_rate=FORECAST_LEARNING_RATE,
+        max_depth=FORECAST_MAX_DEPTH,
+        max_bin=FORECAST_MAX_BIN,
+        tree_method="hist",
+        multi_strategy="one_output_per_tree",
+        **kwargs
+    )
+
+
+def fit_joint_model(X, Y: np.ndarray, targets: np.ndarray, history_days: int) -> Dict[str, Any]:
+    """
+    Fit one model for both columns of Y (revenue, expense).
+    `targets` is each row's target day index, used to hold out the most recent days.
+    """
+    started = time.perf_counter()
+    budget = tree_budget(history_days)
+    holdout_days = max(MIN_HOLDOUT_DAYS, int(history_days * FORECAST_HOLDOUT_FRACTION))
+    valid = targets >= history_days - holdout_days
+    trees, early_stopped, validation_mae = budget, False, None
+
+    if (~valid).sum() >= MIN_TRAIN_ROWS_FOR_HOLDOUT and valid.any():
+        probe = _regressor(budget, early_stopping_rounds=FORECAST_EARLY_STOPPING, eval_metric="mae")
+        probe.fit(X[~valid], Y[~valid], eval_set=[(X[valid], Y[valid])], verbose=False)
+        trees = max(int(probe.best_iteration) + 1, min(FORECAST_EARLY_STOP_FLOOR, budget))
+        early_stopped = trees < budget
+        validation_mae = float(probe.best_score)
+
+    model = _regressor(trees)
+    model.fit(X, Y)
+    return {
+        "model": model,
+        "training": {
+            "engine": "xgboost-hist-multioutput",
+            "trees": trees,
+            "treeBudget": budget,
+            "earlyStopped": early_stopped,
+            "rows": int(len(Y)),
+            "validationMae": round(validation_mae, 2) if validation_mae is not None else None,
+            "trainingMs": round((time.perf_counter() - started) * 1000, 1),
+        },
+    }
+
+
+def predict_with_contributions(model, X) -> Tuple[np.ndarray, np.ndarray]:
+    """(predictions (rows, outputs), contributions (rows, outputs, features + bias)) in one call"""
+    xgb = load_xgboost()
+    contribs = model.get_booster().predict(
+        xgb.DMatrix(X), pred_contribs=True, approx_contribs=not FORECAST_EXACT_CONTRIBS
+    )
+    if contribs.ndim == 2:  # single-output model
+        contribs = contribs[:, None, :]
+    return contribs.sum(axis=-1), contribs
+
+
+class Attribution:
+    """Contribution totals over every predicted row, grouped into named drivers"""
+
+    def __init__(self, feature_names: Sequence[str], feature_drivers: Dict[str, str]):
+        self.drivers = sorted(set(feature_drivers.values())) + [COMMITMENTS_DRIVER]
+        index = {name: i for i, name in enumerate(self.drivers)}
+        # feature -> driver matrix; the trailing bias column maps to no driver
+        self.grouping = np.zeros((len(feature_names) + 1, len(self.drivers)))
+        for i, feature in enumerate(feature_names):
+            self.grouping[i, index[feature_drivers[feature]]] = 1.0
+        self.abs_total = np.zeros(len(self.drivers))
+        self.signed_total = np.zeros((2, len(self.drivers)))
+        self.rows = 0
+
+    def add(self, contribs: np.ndarray, commitments: np.ndarray):
+        """contribs: (rows, 2, features + 1); commitments: (rows, 2) amounts added analytically"""
+        grouped = contribs @ self.grouping  # (rows, 2, drivers)
+        grouped[:, :, -1] += commitments
+        self.abs_total += np.abs(grouped).sum(axis=(0, 1))
+        self.signed_total += grouped.sum(axis=0)
+        self.rows += len(contribs)
+
+    def weights(self) -> List[Dict[str, Any]]:
+        """Drivers by share of absolute contribution, with mean daily revenue/expense impact"""
+        total = self.abs_total.sum()
+        rows = max(self.rows, 1)
+        out = [
+            {
+                "feature": driver,
+                "weight": round(float(self.abs_total[i] / total), 4) if total > 0 else 0.0,
+                "revenueImpact": round(float(self.signed_total[0, i] / rows), 2),
+                "expenseImpact": round(float(self.signed_total[1, i] / rows), 2),
+            }
+            for i, driver in enumerate(self.drivers)
+            if self.abs_total[i] > 0
+        ]
+        return sorted(out, key=lambda d: d["weight"], reverse=True)
@@ -1,15 +1,69 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
-import pandas as pd
+from __future__ import annotations
+
+from fastapi import FastAPI, HTTPException, Request, Query, UploadFile, File, Form
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import TYPE_CHECKING, List, Optional, Dict, Any
 import numpy as np
+import asyncio
+import importlib
+import json
+import os
+import time
+from contextlib import asynccontextmanager
 from datetime import date, timedelta
-import xgboost as xgb
-from sklearn.ensemble import RandomForestRegressor
-from xgboost import XGBRegressor
 import uvicorn
 
-app = FastAPI(title="WealthWise AI Forecasting Service")
+if TYPE_CHECKING:
+    import pandas as pd
+
+from bulk_input import HistoryColumns, history_frame_from_columns, history_frame_from_points, read_upload_frame
+from feature_store import FeatureStore
+from forecast_features import FEATURE_DRIVERS, FEATURE_NAMES, future_features, training_set
+from forecast_model import Attribution, fit_joint_model, load_xgboost, predict_with_contributions
+from monte_carlo import Shocks, daily_flows, simulate_cash_flow
+
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib encoder
+    orjson = None
+
+try:
+    import msgpack  # optional: enables ?format=msgpack
+except ImportError:
+    msgpack = None
+
+PROCESS_STARTED = time.perf_counter()
+readiness = {"xgboost_loaded": False, "startup_ms": None}
+
+async def warm_up():
+    """Import pandas and xgboost after the port is open, so replicas accept connections sooner"""
+    try:
+        await asyncio.to_thread(importlib.import_module, "pandas")
+        await asyncio.to_thread(load_xgboost)
+    except Exception as e:
+        print(f"Warm-up failed: {str(e)}")
+        return
+    readiness["xgboost_loaded"] = True
+    readiness["startup_ms"] = round((time.perf_counter() - PROCESS_STARTED) * 1000, 1)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    task = asyncio.create_task(warm_up())
+    try:
+        yield
+    finally:
+        task.cancel()
+
+app = FastAPI(title="WealthWise AI Forecasting Service", lifespan=lifespan)
+
+MAX_SIMULATION_PATHS = int(os.getenv("MAX_SIMULATION_PATHS", "50000"))
+MAX_SIMULATION_HORIZON = int(os.getenv("MAX_SIMULATION_HORIZON", "1095"))
+# Upper bound for forecast horizons, checked before a streamed response starts
+MAX_FORECAST_HORIZON = int(os.getenv("MAX_FORECAST_HORIZON", str(100 * 365)))
+
+# Daily rollups per business, so requests can send only new transactions
+feature_store = FeatureStore()
 
 class HistoryPoint(BaseModel):
     date: date
@@ -23,9 +77,12 @@ class Commitment(BaseModel):
 
 class ForecastRequest(BaseModel):
     businessId: str
-    history: List[HistoryPoint]
+    history: List[HistoryPoint] = []
+    historyColumns: Optional[HistoryColumns] = None  # columnar alternative to `history`
+    historyDelta: List[HistoryPoint] = []  # without full history: new transactions for the stored history
+    deltaId: Optional[str] = None  # makes a retried delta a no-op
     commitments: List[Commitment]
-    horizon: int = 90
+    horizon: int = Field(90, ge=1, le=MAX_FORECAST_HORIZON)
 
 class PredictionPoint(BaseModel):
     date: date
@@ -38,106 +95,393 @@ class PredictionPoint(BaseModel):
 class FeatureWeight(BaseModel):
     feature: str
     weight: float
+    revenueImpact: Optional[float] = None  # mean signed contribution per forecast day
+    expenseImpact: Optional[float] = None
 
 class Explainability(BaseModel):
     summary: str
     drivers: List[FeatureWeight]
 
+class TrainingReport(BaseModel):
+    engine: str
+    trees: int
+    treeBudget: int
+    earlyStopped: bool
+    rows: int
+    validationMae: Optional[float] = None
+    trainingMs: float
+
 class ForecastResponse(BaseModel):
     predictions: List[PredictionPoint]
     explainability: Explainability
+    training: Optional[TrainingReport] = None
+
+class ScenarioShocks(BaseModel):
+    revenueDropPct: float = Field(0, ge=0, le=100)
+    shockStartDay: int = Field(0, ge=0)
+    shockDurationDays: Optional[int] = Field(None, ge=1)
+    paymentDelayDays: float = Field(0, ge=0, description="Mean extra days receivables (AR) are paid late")
+    rateHikeBps: float = Field(0, ge=0)
+    debtOutstanding: float = Field(0, ge=0)
+
+class SimulationRequest(BaseModel):
+    businessId: str
+    openingBalance: float
+    history: List[HistoryPoint] = []
+    historyColumns: Optional[HistoryColumns] = None
+    historyDelta: List[HistoryPoint] = []
+    deltaId: Optional[str] = None
+    commitments: List[Commitment] = []
+    horizon: int = Field(365, ge=7, le=MAX_SIMULATION_HORIZON)
+    paths: int = Field(10000, ge=100, le=MAX_SIMULATION_PATHS)
+    shocks: ScenarioShocks = ScenarioShocks()
+    seed: Optional[int] = None
+    bandStep: int = Field(7, ge=1, description="Days between balance percentile band points")
+
+class TransactionDelta(BaseModel):
+    transactions: List[HistoryPoint] = []
+    historyColumns: Optional[HistoryColumns] = None
+    deltaId: Optional[str] = None
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.wealthwise.columnar+json"
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "64"))  # predictions per predict call / flush
+MAX_BUFFERED_HORIZON = int(os.getenv("MAX_BUFFERED_HORIZON", "3650"))  # longer horizons must stream
+PREDICTION_FIELDS = ["date", "revenue", "expense", "confidence", "lowerBound", "upperBound"]
+
+def resolve_response_format(http_request: Request, requested: Optional[str]) -> str:
+    """Pick records, columnar, msgpack or ndjson from ?format= or the Accept header"""
+    accept = http_request.headers.get("accept", "")
+    if requested:
+        fmt = requested.lower()
+        if fmt not in ("records", "columnar", "msgpack", "ndjson"):
+            raise HTTPException(status_code=400, detail=f"Unsupported format '{requested}'")
+    elif NDJSON_MEDIA_TYPE in accept:
+        fmt = "ndjson"
+    elif MSGPACK_MEDIA_TYPE in accept:
+        fmt = "msgpack"
+    elif COLUMNAR_MEDIA_TYPE in accept:
+        fmt = "columnar"
+    else:
+        fmt = "records"
+    if fmt == "msgpack" and msgpack is None:
+        raise HTTPException(status_code=406, detail="MessagePack support is not installed")
+    return fmt
+
+def _as_lists(columns: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v.tolist() if isinstance(v, np.ndarray) else v for k, v in columns.items()}
+
+def ndjson_line(obj: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj) + b"\n"
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8") + b"\n"
+
+def encode_columnar(columns: Dict[str, Any], explainability: Explainability, fmt: str,
+                    training: Optional[Dict[str, Any]] = None) -> Response:
+    """Serialize parallel prediction arrays directly, skipping PredictionPoint construction"""
+    payload = {
+        "format": "columnar",
+        "length": len(columns["date"]),
+        "predictions": columns,
+        "explainability": explainability.model_dump(),
+        "training": training
+    }
+    if fmt == "msgpack":
+        payload["predictions"] = _as_lists(columns)
+        return Response(content=msgpack.packb(payload, use_bin_type=True), media_type=MSGPACK_MEDIA_TYPE)
+    if orjson is not None:
+        body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    else:
+        payload["predictions"] = _as_lists(columns)
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return Response(content=body, media_type=COLUMNAR_MEDIA_TYPE)
+
+def request_daily(business_id: str, history: List[HistoryPoint], history_columns: Optional[HistoryColumns],
+                  delta: List[HistoryPoint], delta_id: Optional[str]) -> pd.DataFrame:
+    """Daily CREDIT/DEBIT totals from a full history, or from the feature store plus a delta"""
+    if history_columns is not None:
+        return daily_flows(history_frame_from_columns(history_columns))
+    if history:
+        return daily_flows(history_frame_from_points(history))
+    if delta:
+        try:
+            feature_store.apply(business_id, history_frame_from_points(delta), delta_id)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    daily = feature_store.daily(business_id)
+    if daily is None:
+        raise HTTPException(status_code=400, detail="History is empty")
+    return daily
+
+@app.get("/health")
+async def health():
+    return {"status": "healthy"}
+
+@app.get("/ready")
+async def ready(response: Response):
+    """503 until the background warm-up has loaded the model libraries"""
+    if not readiness["xgboost_loaded"]:
+        response.status_code = 503
+    return {"ready": readiness["xgboost_loaded"], **readiness}
 
 @app.post("/api/v1/forecast", response_model=ForecastResponse)
-async def generate_forecast(request: ForecastRequest):
+async def generate_forecast(
+    request: ForecastRequest,
+    http_request: Request,
+    response_format: Optional[str] = Query(None, alias="format", description="records | columnar | msgpack | ndjson")
+):
+    fmt = resolve_response_format(http_request, response_format)
     try:
-        if not request.history:
-            raise HTTPException(status_code=400, detail="History is empty")
-
-        # 1. Feature Engineering
-        df = pd.DataFrame([h.dict() for h in request.history])
-        df['date'] = pd.to_datetime(df['date'])
-        
-        # Aggregate by day
-        daily = df.groupby(['date', 'type'])['amount'].sum().unstack(fill_value=0)
-        daily = daily.asfreq('D', fill_value=0)
-        
-        # 2. Time-Series Engineering (Lags, Seasonality)
-        daily['day_of_week'] = daily.index.dayofweek
-        daily['is_weekend'] = daily.index.dayofweek.isin([5, 6]).astype(int)
-        daily['day_of_month'] = daily.index.day
-        daily['is_month_end'] = (daily.index.day >= 25).astype(int)
-        
-        # 3. Model Training (XGBoost Ensemble)
-        # We model Inflow (Revenue)
-        if 'CREDIT' not in daily: daily['CREDIT'] = 0
-        if 'DEBIT' not in daily: daily['DEBIT'] = 0
-        
-        # Sample Training
-        X = daily[['day_of_week', 'is_weekend', 'day_of_month', 'is_month_end']]
-        y_rev = daily['CREDIT']
-        y_exp = daily['DEBIT']
-        
-        model_rev = XGBRegressor(n_estimators=100, learning_rate=0.1)
-        model_exp = XGBRegressor(n_estimators=100, learning_rate=0.05)
-        
-        model_rev.fit(X, y_rev)
-        model_exp.fit(X, y_exp)
-        
-        # 4. Inferencing
-        predictions = []
-        last_date = daily.index.max()
-        
-        for i in range(1, request.horizon + 1):
-            future_date = last_date + timedelta(days=i)
-            features = pd.DataFrame([{
-                'day_of_week': future_date.dayofweek,
-                'is_weekend': 1 if future_date.dayofweek >= 5 else 0,
-                'day_of_month': future_date.day,
-                'is_month_end': 1 if future_date.day >= 25 else 0
-            }])
-            
-            # Predict
-            pred_rev = float(model_rev.predict(features)[0])
-            pred_exp = float(model_exp.predict(features)[0])
-            
-            # Inject commitments (Invoices)
-            comm_in = sum(c.amount for c in request.commitments if c.dueDate == future_date.date() and c.type == 'AR')
-            comm_out = sum(c.amount for c in request.commitments if c.dueDate == future_date.date() and c.type == 'AP')
-            
-            pred_rev += comm_in
-            pred_exp += comm_out
-            
-            # Variance calculation (simplified for this turn)
-            std = np.std(y_rev) if len(y_rev) > 1 else 100
-            conf = max(0.4, 0.95 - (i * 0.003))
-            margin = (1 - conf) * std * np.sqrt(i)
-            
-            predictions.append(PredictionPoint(
-                date=future_date.date(),
-                revenue=max(0, pred_rev),
-                expense=max(0, pred_exp),
-                confidence=conf,
-                lowerBound=max(0, pred_rev - margin),
-                upperBound=pred_rev + margin
-            ))
-            
-        # 5. Explainability (SHAP Lite)
-        drivers = [
-            FeatureWeight(feature="Historical Cycle", weight=0.6),
-            FeatureWeight(feature="Pending Invoices", weight=0.25),
-            FeatureWeight(feature="Seasonal Baseline", weight=0.15)
-        ]
-        
-        summary = f"Accuracy optimized using XGBoost. Primary driver: {'Commitments' if request.commitments else 'Market Seasonality'}."
-        
-        return ForecastResponse(
-            predictions=predictions,
-            explainability=Explainability(summary=summary, drivers=drivers)
+        daily = request_daily(
+            request.businessId, request.history, request.historyColumns, request.historyDelta, request.deltaId
         )
+        return respond_forecast(request.businessId, daily, request.commitments, request.horizon, fmt)
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/v1/forecast/upload", response_model=ForecastResponse)
+async def generate_forecast_from_upload(
+    http_request: Request,
+    file: UploadFile = File(..., description="CSV or Parquet with date, amount, type columns"),
+    businessId: str = Form(...),
+    horizon: int = Form(90, ge=1, le=MAX_FORECAST_HORIZON),
+    commitments: str = Form("[]", description="JSON list of commitments"),
+    response_format: Optional[str] = Query(None, alias="format", description="records | columnar | msgpack | ndjson")
+):
+    """Forecast from an uploaded history file instead of a JSON history list"""
+    fmt = resolve_response_format(http_request, response_format)
+    try:
+        commitment_list = [Commitment(**c) for c in json.loads(commitments)]
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Invalid commitments: {e}")
+
+    df = await read_upload_frame(file)
+    if df.empty:
+        raise HTTPException(status_code=400, detail="History is empty")
+    try:
+        return respond_forecast(businessId, daily_flows(df), commitment_list, horizon, fmt)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         print(f"Error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/v1/features/{business_id}/transactions")
+def append_transactions(business_id: str, request: TransactionDelta):
+    """Add new transactions to the business's stored daily rollups"""
+    if request.historyColumns is not None:
+        df = history_frame_from_columns(request.historyColumns)
+    elif request.transactions:
+        df = history_frame_from_points(request.transactions)
+    else:
+        raise HTTPException(status_code=400, detail="No transactions")
+    try:
+        return feature_store.apply(business_id, df, request.deltaId)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@app.get("/api/v1/features/{business_id}")
+def get_features(business_id: str):
+    info = feature_store.info(business_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail="No stored history for this business")
+    return info
+
+@app.delete("/api/v1/features/{business_id}")
+def delete_features(business_id: str):
+    if not feature_store.delete(business_id):
+        raise HTTPException(status_code=404, detail="No stored history for this business")
+    return {"status": "deleted", "businessId": business_id}
+
+def fit_forecast(daily: pd.DataFrame, commitments: List[Commitment]) -> Dict[str, Any]:
+    """Train the revenue/expense models on daily CREDIT/DEBIT totals"""
+    import pandas as pd
+    # 1. Daily totals come pre-aggregated (request history or the feature store)
+    values = daily.reindex(columns=['CREDIT', 'DEBIT'], fill_value=0).to_numpy(dtype=float)
+    start = daily.index.min()
+    
+    # 2. Time-Series Engineering (Lags, Rolling Windows, Seasonality, Month-End)
+    # Direct multi-horizon rows: features known at an origin day + horizon -> target day
+    X, Y, targets, max_horizon = training_set(values, start)
+    X = pd.DataFrame(X, columns=FEATURE_NAMES)
+    y_rev = values[:, 0]
+    
+    # 3. Model Training (one joint revenue/expense XGBoost model, hist + early stopping)
+    engine = fit_joint_model(X, Y, targets, len(values))
+
+    # Commitments aggregated per due date, looked up per prediction window
+    by_day = None
+    if commitments:
+        commit_df = pd.DataFrame({
+            'dueDate': pd.to_datetime([c.dueDate for c in commitments]),
+            'amount': [c.amount for c in commitments],
+            'type': [c.type for c in commitments]
+        })
+        by_day = commit_df.groupby(['dueDate', 'type'])['amount'].sum().unstack(fill_value=0)
+
+    return {
+        'model': engine['model'],
+        'training': engine['training'],
+        'values': values,
+        'start': start,
+        'max_horizon': max_horizon,
+        'last_date': daily.index.max(),
+        'std': np.std(y_rev) if len(y_rev) > 1 else 100,
+        'commitments': by_day,
+        # 5. Explainability: contribution totals filled in as windows are predicted
+        'attribution': Attribution(FEATURE_NAMES, FEATURE_DRIVERS)
+    }
+
+def predict_window(fit: Dict[str, Any], start: int, stop: int) -> Dict[str, Any]:
+    """Predict forecast steps start..stop-1 (1 = day after the last history date) as arrays"""
+    import pandas as pd
+    # 4. Inferencing (one predict call per model for the whole window, no day-by-day recursion)
+    future = pd.date_range(fit['last_date'] + timedelta(days=start), periods=stop - start, freq='D')
+    features = pd.DataFrame(
+        future_features(fit['values'], fit['start'], np.arange(start, stop), fit['max_horizon']),
+        columns=FEATURE_NAMES
+    )
+
+    # Predictions are the row sums of the per-feature tree contributions (same batched call)
+    pred, contribs = predict_with_contributions(fit['model'], features)
+    pred = pred.astype(float)
+
+    # Inject commitments (Invoices); their contribution is the amount itself
+    committed = np.zeros((len(future), 2))
+    by_day = fit['commitments']
+    if by_day is not None:
+        for i, col in enumerate(('AR', 'AP')):
+            if col in by_day:
+                committed[:, i] = by_day[col].reindex(future, fill_value=0).to_numpy(dtype=float)
+    fit['attribution'].add(contribs, committed)
+    pred_rev, pred_exp = pred[:, 0] + committed[:, 0], pred[:, 1] + committed[:, 1]
+
+    # Variance calculation (simplified for this turn)
+    steps = np.arange(start, stop)
+    conf = np.maximum(0.4, 0.95 - (steps * 0.003))
+    margin = (1 - conf) * fit['std'] * np.sqrt(steps)
+
+    return {
+        'date': future.strftime('%Y-%m-%d').tolist(),
+        'revenue': np.maximum(0, pred_rev),
+        'expense': np.maximum(0, pred_exp),
+        'confidence': conf,
+        'lowerBound': np.maximum(0, pred_rev - margin),
+        'upperBound': pred_rev + margin
+    }
+
+def explain(fit: Dict[str, Any]) -> Explainability:
+    """Driver weights from the contributions accumulated over the predicted days"""
+    attribution = fit['attribution']
+    drivers = [FeatureWeight(**d) for d in attribution.weights()]
+    if not drivers:
+        return Explainability(summary="No forecast days predicted yet.", drivers=[])
+    top = drivers[0]
+    summary = (
+        f"XGBoost tree contributions over {attribution.rows} forecast days. "
+        f"Primary driver: {top.feature} ({top.weight:.0%})."
+    )
+    return Explainability(summary=summary, drivers=drivers)
+
+def build_forecast(daily: pd.DataFrame, commitments: List[Commitment], horizon: int):
+    """Train on daily totals and predict `horizon` days as arrays"""
+    fit = fit_forecast(daily, commitments)
+    columns = predict_window(fit, 1, horizon + 1)
+    return columns, explain(fit), fit['training']
+
+def stream_forecast(business_id: str, fit: Dict[str, Any], horizon: int):
+    """NDJSON lines: a meta header, one prediction per line, then explainability"""
+    yield ndjson_line({"meta": {
+        "businessId": business_id, "horizon": horizon, "fields": PREDICTION_FIELDS, "training": fit['training']
+    }})
+    for start in range(1, horizon + 1, STREAM_CHUNK_SIZE):
+        cols = _as_lists(predict_window(fit, start, min(start + STREAM_CHUNK_SIZE, horizon + 1)))
+        yield b"".join(
+            ndjson_line(dict(zip(PREDICTION_FIELDS, row)))
+            for row in zip(*(cols[f] for f in PREDICTION_FIELDS))
+        )
+    yield ndjson_line({"explainability": explain(fit).model_dump()})
+
+def respond_forecast(business_id: str, daily: pd.DataFrame, commitments: List[Commitment], horizon: int, fmt: str):
+    if fmt == "ndjson":
+        # Train up front so failures surface as a normal error response
+        fit = fit_forecast(daily, commitments)
+        return StreamingResponse(stream_forecast(business_id, fit, horizon), media_type=NDJSON_MEDIA_TYPE)
+    if horizon > MAX_BUFFERED_HORIZON:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Horizon above {MAX_BUFFERED_HORIZON} days must be streamed (?format=ndjson)"
+        )
+    columns, explainability, training = build_forecast(daily, commitments, horizon)
+    return render_forecast(columns, explainability, fmt, training)
+
+def render_forecast(columns: Dict[str, Any], explainability: Explainability, fmt: str,
+                    training: Optional[Dict[str, Any]] = None):
+    if fmt != "records":
+        return encode_columnar(columns, explainability, fmt, training)
+
+    predictions = [
+        PredictionPoint(date=d, revenue=r, expense=e, confidence=c, lowerBound=lo, upperBound=hi)
+        for d, r, e, c, lo, hi in zip(
+            columns['date'], columns['revenue'].tolist(), columns['expense'].tolist(),
+            columns['confidence'].tolist(), columns['lowerBound'].tolist(), columns['upperBound'].tolist()
+        )
+    ]
+
+    return ForecastResponse(
+        predictions=predictions,
+        explainability=explainability,
+        training=training
+    )
+
+@app.post("/api/v1/scenarios/simulate")
+def simulate_scenario(request: SimulationRequest):
+    """
+    Monte Carlo cash-flow paths from the business's own history and commitments, with
+    optional shocks. Returns runway percentiles, cash-out probabilities and balance bands.
+    Sync (threadpool) endpoint: the simulation is CPU-bound NumPy work.
+    """
+    import pandas as pd
+    daily = request_daily(
+        request.businessId, request.history, request.historyColumns, request.historyDelta, request.deltaId
+    )
+    last_day = daily.index.max()
+    receivables, payables = [], []
+    for c in request.commitments:
+        offset = (pd.Timestamp(c.dueDate) - last_day).days - 1
+        (receivables if c.type == "AR" else payables).append((offset, c.amount))
+
+    shocks = request.shocks
+    started = time.perf_counter()
+    try:
+        result = simulate_cash_flow(
+            daily, request.openingBalance, request.horizon, request.paths,
+            receivables=receivables, payables=payables,
+            shocks=Shocks(
+                revenue_drop_pct=shocks.revenueDropPct,
+                shock_start_day=shocks.shockStartDay,
+                shock_duration_days=shocks.shockDurationDays,
+                payment_delay_days=shocks.paymentDelayDays,
+                rate_hike_bps=shocks.rateHikeBps,
+                debt_outstanding=shocks.debtOutstanding
+            ),
+            seed=request.seed,
+            band_step=request.bandStep
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    result["businessId"] = request.businessId
+    result["elapsedMs"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)